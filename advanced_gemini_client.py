@@ -3,14 +3,29 @@
 Advanced Gemini + MCP-Mem0 Client
 ----------------------------------
 Advanced client that connects to MCP server and uses Gemini with memory.
+
+Turns are pipelined: the Gemini call is awaited without blocking the event
+loop, each turn's memory save runs in the background (overlapping the next
+question's input and memory search) and the answer is streamed into a live
+panel as it is generated with GEMINI_STREAMING=true. `!stats` shows per-stage
+latency, including time to first token.
+
+With MEMORY_PREFETCH=true, memories related to the last turn are fetched
+while the user types the next question and the question is answered from
+that local cache when it covers it (see MemoryPrefetcher).
 """
 
 import asyncio
+import hashlib
 import json
 import os
+import statistics
 import sys
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 try:
     import httpx
@@ -27,11 +42,19 @@ except ImportError as e:
     print("🔧 Install with: pip install google-generativeai httpx rich")
     sys.exit(1)
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from stream_render import render_stream_async, streaming_enabled
+from lexical_index import LexicalIndex, tokenize
+from context_builder import ContextBuilder
+
 # Configuration
 console = Console()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'YOUR_GEMINI_API_KEY_HERE')
 MCP_SERVER_URL = "http://localhost:8050"
 
+# Stages timed per chat turn; "turn" is what the user waits for (search + generate)
+STAGES = ("search", "first_token", "generate", "save", "turn")
+
 class RealMCPClient:
     """Real client to connect with MCP-Mem0 server via HTTP"""
     
@@ -48,10 +71,11 @@ class RealMCPClient:
             console.print(f"❌ [red]Connection failed:[/red] {e}")
             return False
     
-    async def save_memory(self, text: str) -> Dict[str, Any]:
-        """Save memory via MCP server"""
+    async def save_memory(self, text: str, async_ingest: bool = True, verbose: bool = True) -> Dict[str, Any]:
+        """Save memory via MCP server (queued server-side by default so chat turns don't wait on extraction)"""
         try:
-            console.print(f"💾 [green]Saving memory:[/green] {text[:80]}{'...' if len(text) > 80 else ''}")
+            if verbose:
+                console.print(f"💾 [green]Saving memory:[/green] {text[:80]}{'...' if len(text) > 80 else ''}")
             
             # Call the MCP server tool
             payload = {
@@ -59,7 +83,8 @@ class RealMCPClient:
                 "params": {
                     "name": "save_memory",
                     "arguments": {
-                        "text": text
+                        "text": text,
+                        "async_ingest": async_ingest
                     }
                 }
             }
@@ -79,10 +104,11 @@ class RealMCPClient:
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
-    async def search_memories(self, query: str, limit: int = 5) -> Dict[str, Any]:
+    async def search_memories(self, query: str, limit: int = 5, verbose: bool = True) -> Dict[str, Any]:
         """Search memories via MCP server"""
         try:
-            console.print(f"🔍 [blue]Searching memories for:[/blue] {query}")
+            if verbose:
+                console.print(f"🔍 [blue]Searching memories for:[/blue] {query}")
             
             # Call the MCP server tool
             payload = {
@@ -91,7 +117,8 @@ class RealMCPClient:
                     "name": "search_memories",
                     "arguments": {
                         "query": query,
-                        "limit": limit
+                        "limit": limit,
+                        "structured": True
                     }
                 }
             }
@@ -107,9 +134,18 @@ class RealMCPClient:
                 content = result.get("content", "[]")
                 try:
                     memories = json.loads(content) if isinstance(content, str) else content
+                    scores, score_kind = None, "distance"
+                    # Structured results carry scores; older servers answer with a plain list of texts
+                    if isinstance(memories, dict):
+                        records = memories.get("memories", [])
+                        score_kind = memories.get("score_kind", score_kind)
+                        memories = [record.get("memory", "") for record in records]
+                        scores = [record.get("score") for record in records]
                     return {
                         "status": "success",
                         "memories": memories,
+                        "scores": scores,
+                        "score_kind": score_kind,
                         "count": len(memories) if isinstance(memories, list) else 0
                     }
                 except json.JSONDecodeError:
@@ -145,6 +181,9 @@ class RealMCPClient:
                 content = result.get("content", "[]")
                 try:
                     memories = json.loads(content) if isinstance(content, str) else content
+                    if isinstance(memories, dict):
+                        # Paginated response: {"memories": [...], "next_cursor": ...}
+                        memories = memories.get("memories", [])
                     return {
                         "status": "success",
                         "memories": memories,
@@ -158,6 +197,87 @@ class RealMCPClient:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+class MemoryPrefetcher:
+    """Speculative memory cache, warmed between turns.
+
+    After each answer the last question, the start of the answer and the recent
+    questions are searched in the background (while the user types) and the
+    results are kept in a small local BM25 index. The next question is ranked
+    against that cache; it counts as a hit when the top candidates contain at
+    least MEMORY_PREFETCH_MIN_COVERAGE of the question's terms, otherwise the
+    client falls back to a normal server search (whose results are cached too).
+
+    Configuration (environment variables):
+        MEMORY_PREFETCH: enable prefetching (default: false)
+        MEMORY_PREFETCH_LIMIT: memories fetched per speculative query (default: 20)
+        MEMORY_PREFETCH_MAX_ITEMS: memories kept in the local cache (default: 200)
+        MEMORY_PREFETCH_MIN_COVERAGE: share of question terms the candidates must contain (default: 0.5)
+    """
+
+    def __init__(self, mcp_client: RealMCPClient):
+        self.mcp = mcp_client
+        self.limit = int(os.getenv("MEMORY_PREFETCH_LIMIT", "20"))
+        self.max_items = int(os.getenv("MEMORY_PREFETCH_MAX_ITEMS", "200"))
+        self.min_coverage = float(os.getenv("MEMORY_PREFETCH_MIN_COVERAGE", "0.5"))
+        self.index = LexicalIndex()
+        self.items: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def remember(self, memories: List[Any]):
+        """Add memories to the cache, evicting the least recently seen ones"""
+        for memory in memories:
+            text = str(memory)
+            memory_id = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+            if memory_id in self.items:
+                self.items.move_to_end(memory_id)
+                continue
+            self.items[memory_id] = text
+            self.index.add(memory_id, {"data": text})
+            while len(self.items) > self.max_items:
+                evicted, _ = self.items.popitem(last=False)
+                self.index.remove(evicted)
+
+    def schedule(self, recent_turns: List[Dict[str, Any]]):
+        """Start warming the cache for the next question"""
+        if not recent_turns:
+            return
+        last = recent_turns[-1]
+        queries = [last["user"], last["assistant"][:300], " ".join(turn["user"] for turn in recent_turns)]
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = asyncio.create_task(self._warm(list(dict.fromkeys(q for q in queries if q.strip()))))
+
+    async def _warm(self, queries: List[str]):
+        results = await asyncio.gather(
+            *(self.mcp.search_memories(query, limit=self.limit, verbose=False) for query in queries),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, dict) and result.get("status") == "success":
+                self.remember(result.get("memories") or [])
+
+    def lookup(self, question: str, limit: int) -> Optional[Tuple[List[str], List[float]]]:
+        """Cached memories for the question with their BM25 scores, or None when the cache does not cover it"""
+        terms = set(tokenize(question))
+        ranked = self.index.search(question, limit=limit) if terms else []
+        covered = set()
+        for memory_id, _ in ranked:
+            covered.update(tokenize(self.items[memory_id]))
+        if not ranked or len(terms & covered) < self.min_coverage * len(terms):
+            self.misses += 1
+            return None
+        self.hits += 1
+        for memory_id, _ in ranked:
+            self.items.move_to_end(memory_id)
+        return [self.items[memory_id] for memory_id, _ in ranked], [score for _, score in ranked]
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = f"{self.hits / lookups * 100:.0f}%" if lookups else "-"
+        return f"{rate} hits ({self.hits}/{lookups}), {len(self.items)} cached"
+
 class AdvancedGeminiChat:
     """Advanced client for chatting with Gemini including memory"""
     
@@ -169,20 +289,57 @@ class AdvancedGeminiChat:
         self.session_start = datetime.now()
         self.current_session = None
         self.session_buffer = []
+        # Milliseconds per stage, and the saves still running in the background
+        self.stage_latency: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.pending_saves = set()
+        self.failed_saves = 0
+        # GEMINI_STREAMING renders the answer as it is generated
+        self.streaming = streaming_enabled()
+        # Relevance threshold, de-duplication and token budget for retrieved memories
+        self.context_builder = ContextBuilder()
+        self.prefetcher = (MemoryPrefetcher(mcp_client)
+                           if os.getenv("MEMORY_PREFETCH", "false").lower() == "true" else None)
+
+    def record_latency(self, stage: str, started: float):
+        self.stage_latency[stage].append((time.perf_counter() - started) * 1000)
+
+    async def persist(self, conversation_entry: str):
+        """Save a finished turn; runs as a background task"""
+        started = time.perf_counter()
+        result = await self.mcp.save_memory(conversation_entry, verbose=False)
+        self.record_latency("save", started)
+        if result.get("status") != "success":
+            self.failed_saves += 1
+
+    async def flush(self):
+        """Wait for background saves to finish (before exiting)"""
+        if self.pending_saves:
+            console.print(f"💾 [dim]Finishing {len(self.pending_saves)} memory save(s)...[/dim]")
+            await asyncio.gather(*self.pending_saves, return_exceptions=True)
         
     async def get_context_from_memory(self, user_input: str) -> str:
         """Search for relevant context from memory"""
         try:
-            result = await self.mcp.search_memories(user_input, limit=3)
-            
-            if result.get("status") == "success" and result.get("memories"):
-                memories = result["memories"]
-                if memories:
-                    context_parts = []
-                    for i, memory in enumerate(memories, 1):
-                        context_parts.append(f"{i}. {memory}")
-                    
-                    return f"""
+            candidates = self.context_builder.candidates
+            memories, scores, score_kind = None, None, "distance"
+            cached = self.prefetcher.lookup(user_input, limit=candidates) if self.prefetcher else None
+            if cached is not None:
+                (memories, scores), score_kind = cached, "bm25"
+            else:
+                result = await self.mcp.search_memories(user_input, limit=candidates)
+                if result.get("status") == "success":
+                    memories, scores, score_kind = result.get("memories"), result.get("scores"), result.get("score_kind")
+                if self.prefetcher and memories:
+                    self.prefetcher.remember(memories)
+            if memories:
+                memories = self.context_builder.select(memories, scores, score_kind or "distance")
+            
+            if memories:
+                context_parts = []
+                for i, memory in enumerate(memories, 1):
+                    context_parts.append(f"{i}. {memory}")
+                
+                return f"""
 Relevant context from previous memories:
 {chr(10).join(context_parts)}
 
@@ -196,8 +353,12 @@ Relevant context from previous memories:
     async def chat_with_memory(self, user_input: str, save_conversation: bool = True) -> str:
         """Chat with Gemini including automatic memory management"""
         try:
-            # Step 1: Search for relevant context
+            turn_started = time.perf_counter()
+
+            # Step 1: Search for relevant context (the previous turn's save may still be running)
+            started = time.perf_counter()
             context = await self.get_context_from_memory(user_input)
+            self.record_latency("search", started)
             
             # Step 2: Prepare detailed prompt
             system_prompt = f"""
@@ -216,12 +377,22 @@ Instructions:
 4. Be friendly and helpful
 """
 
-            # Step 3: Send to Gemini with spinner
-            with console.status("[bold green]🤖 Gemini is thinking...") as status:
-                response = self.model.generate_content(system_prompt)
-                answer = response.text
+            # Step 3: Send to Gemini (async call, so background saves keep running), streaming
+            # the answer into a live panel or waiting behind a spinner
+            started = time.perf_counter()
+            if self.streaming:
+                response = await self.model.generate_content_async(system_prompt, stream=True)
+                request_seconds = time.perf_counter() - started
+                answer, first_token = await render_stream_async(response, console)
+                if first_token is not None:
+                    self.stage_latency["first_token"].append((request_seconds + first_token) * 1000)
+            else:
+                with console.status("[bold green]🤖 Gemini is thinking...") as status:
+                    response = await self.model.generate_content_async(system_prompt)
+                    answer = response.text
+            self.record_latency("generate", started)
             
-            # Step 4: Save conversation to memory
+            # Step 4: Save conversation to memory in the background; the answer is shown meanwhile
             if save_conversation:
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 conversation_entry = f"""
@@ -229,7 +400,9 @@ Instructions:
 Question: {user_input}
 Answer: {answer[:500]}{'...' if len(answer) > 500 else ''}
 """
-                await self.mcp.save_memory(conversation_entry)
+                task = asyncio.create_task(self.persist(conversation_entry))
+                self.pending_saves.add(task)
+                task.add_done_callback(self.pending_saves.discard)
             
             # Step 5: Add to session if active
             self.add_to_session(user_input, answer)
@@ -242,6 +415,10 @@ Answer: {answer[:500]}{'...' if len(answer) > 500 else ''}
                 "had_context": bool(context.strip())
             })
             
+            self.record_latency("turn", turn_started)
+            if self.prefetcher:
+                # Warm the cache for the next question while this answer is read
+                self.prefetcher.schedule(self.conversation_history[-3:])
             return answer
             
         except Exception as e:
@@ -261,8 +438,22 @@ Answer: {answer[:500]}{'...' if len(answer) > 500 else ''}
             "session_duration": str(session_duration).split('.')[0],
             "context_usage_rate": f"{questions_with_context/total_questions*100:.1f}%" if total_questions > 0 else "0%",
             "current_session": self.current_session,
-            "session_buffer_size": len(self.session_buffer)
+            "session_buffer_size": len(self.session_buffer),
+            "pending_saves": len(self.pending_saves),
+            "failed_saves": self.failed_saves,
+            "memory_prefetch": self.prefetcher.stats() if self.prefetcher else "off",
+            "context_memories": "{selected}/{candidates} used, {tokens} tokens".format(**self.context_builder.stats()),
+            **{f"{stage}_latency": self.latency_summary(stage) for stage in STAGES}
         }
+
+    def latency_summary(self, stage: str) -> str:
+        """last / p50 / p95 milliseconds for one stage"""
+        samples = self.stage_latency[stage]
+        if not samples:
+            return "-"
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return f"last {samples[-1]:.0f} ms | p50 {statistics.median(ordered):.0f} ms | p95 {p95:.0f} ms (n={len(samples)})"
     
     def start_session(self, session_name: str) -> str:
         """Start a new conversation session"""
@@ -374,6 +565,25 @@ Answer: {answer[:500]}{'...' if len(answer) > 500 else ''}
             entry += f"**A:** {assistant_response}\n\n---\n\n"
             self.session_buffer.append(entry)
 
+async def ask(prompt: str) -> str:
+    """Prompt.ask on a daemon thread, so background saves progress while waiting for input"""
+    loop = asyncio.get_running_loop()
+    answer = loop.create_future()
+
+    def settle(setter, value):
+        if not answer.done():
+            setter(value)
+
+    def read():
+        try:
+            value = Prompt.ask(prompt)
+            loop.call_soon_threadsafe(settle, answer.set_result, value)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, answer.set_exception, e)
+
+    threading.Thread(target=read, daemon=True).start()
+    return await answer
+
 async def display_welcome():
     """Display welcome screen"""
     welcome_text = """
@@ -435,7 +645,7 @@ async def main():
     # Main chat loop
     while True:
         try:
-            user_input = Prompt.ask("\n[bold blue]🗣️ Your question")
+            user_input = await ask("\n[bold blue]🗣️ Your question")
             
             if not user_input.strip():
                 continue
@@ -529,6 +739,9 @@ async def main():
             
             # Regular question to Gemini
             answer = await gemini.chat_with_memory(user_input)
+            if gemini.streaming:
+                # Already rendered while streaming
+                continue
             
             # Display the answer
             console.print(f"\n[bold green]🤖 Gemini:[/bold green]")
@@ -538,13 +751,15 @@ async def main():
                 padding=(1, 2)
             ))
             
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             console.print("\n\n👋 [yellow]Goodbye![/yellow]")
             break
         except Exception as e:
             console.print(f"\n❌ [red]Error:[/red] {e}")
             console.print("[dim]Please try again or type !help for commands[/dim]")
 
+    await gemini.flush()
+
 if __name__ == "__main__":
     try:
         asyncio.run(main())
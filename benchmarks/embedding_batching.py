@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Embedding micro-batching benchmark
+----------------------------------
+Compares one forward pass per request (what Mem0 does on its own) with the
+EmbeddingBatcher at several concurrency levels, reporting throughput and
+p50/p99 latency.
+
+    python benchmarks/embedding_batching.py
+    python benchmarks/embedding_batching.py --concurrency 1 8 32 --window-ms 2 5 10
+    python benchmarks/embedding_batching.py --simulate   # no model download needed
+
+--simulate replaces the sentence-transformer with a serialized fake encoder
+whose cost is a fixed per-call overhead plus a per-text cost, which is the
+shape that makes batching pay off on CPU.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+QUERIES = [
+    "What are my favorite programming languages?",
+    "Where did I go on vacation last summer?",
+    "Which database does the project use?",
+    "What is my daughter's name?",
+    "Remind me what I said about the deployment pipeline",
+    "Which foods am I allergic to?",
+    "What did we decide about the API rate limits?",
+    "How do I usually take my coffee?",
+]
+
+
+def load_encoder(simulate: bool, overhead_ms: float, per_text_ms: float):
+    if simulate:
+        device = threading.Lock()
+
+        def encode(texts):
+            with device:
+                time.sleep((overhead_ms + per_text_ms * len(texts)) / 1000)
+            return [[float(len(text))] * 384 for text in texts]
+        return encode
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(os.getenv("EMBEDDER_MODEL_PATH") or "sentence-transformers/all-MiniLM-L6-v2")
+
+    def encode(texts):
+        return model.encode(texts, convert_to_numpy=True)
+    return encode
+
+
+def run_load(embed_one, concurrency: int, requests_per_worker: int):
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(concurrency + 1)
+
+    def worker(worker_id):
+        local = []
+        start_gate.wait()
+        for i in range(requests_per_worker):
+            text = QUERIES[(worker_id + i) % len(QUERIES)] + f" #{worker_id}-{i}"
+            started = time.perf_counter()
+            embed_one(text)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrent caller")
+    parser.add_argument("--window-ms", type=float, nargs="+", default=[5.0])
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--simulate", action="store_true", help="use a fake encoder instead of the model")
+    parser.add_argument("--overhead-ms", type=float, default=4.0, help="simulated fixed cost per forward pass")
+    parser.add_argument("--per-text-ms", type=float, default=0.4, help="simulated cost per text")
+    args = parser.parse_args()
+
+    encode = load_encoder(args.simulate, args.overhead_ms, args.per_text_ms)
+    encode(["warmup"])
+    print(f"🔬 Encoder: {'simulated' if args.simulate else 'sentence-transformer'}, "
+          f"{args.requests} requests per caller\n")
+
+    batchers = {window: EmbeddingBatcher(encode, args.max_batch, window) for window in args.window_ms}
+
+    header = f"{'concurrency':>11} | {'mode':<16} | {'req/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | {'avg batch':>9}"
+    print(header)
+    print("-" * len(header))
+    for concurrency in args.concurrency:
+        result = run_load(lambda text: encode([text]), concurrency, args.requests)
+        print(f"{concurrency:>11} | {'unbatched':<16} | {result['throughput']:>9.1f} | "
+              f"{result['p50_ms']:>8.2f} | {result['p99_ms']:>8.2f} | {1:>9.2f}")
+        for window, batcher in batchers.items():
+            before = batcher.stats()
+            result = run_load(lambda text: batcher.submit([text]), concurrency, args.requests)
+            after = batcher.stats()
+            batches = after["batches"] - before["batches"]
+            avg_batch = (after["texts"] - before["texts"]) / batches if batches else 0.0
+            print(f"{concurrency:>11} | {f'batched {window:g} ms':<16} | {result['throughput']:>9.1f} | "
+                  f"{result['p50_ms']:>8.2f} | {result['p99_ms']:>8.2f} | {avg_batch:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Uses Mem0 directly for memory management without MCP protocol
 
 import os
 import sys
+import time
 import asyncio
 import json
 from datetime import datetime
@@ -24,15 +25,21 @@ except ImportError as e:
     print("🔧 Install with: pip install google-generativeai rich mem0ai")
     sys.exit(1)
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from stream_render import EMPTY_ANSWER, render_stream, streaming_enabled
+from context_builder import ContextBuilder
+
 # Configuration
 console = Console()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'YOUR_GEMINI_API_KEY_HERE')
-DEFAULT_USER_ID = "user"
+DEFAULT_USER_ID = os.getenv('MEM0_USER_ID', 'user')
+VECTOR_STORE = os.getenv('VECTOR_STORE', '').lower()
 
 class DirectMemoryClient:
     """Direct client that uses Mem0 without MCP"""
     
-    def __init__(self):
+    def __init__(self, user_id: str = DEFAULT_USER_ID):
+        self.user_id = user_id
         # Initialize Mem0 with a PURE GEMINI configuration - NO OPENAI!
         config = {
             "llm": {
@@ -48,11 +55,15 @@ class DirectMemoryClient:
                     "model": "sentence-transformers/all-MiniLM-L6-v2"
                 }
             }
-            # Using default vector store (SQLite) for simplicity
+            # Using default vector store for simplicity (VECTOR_STORE=local swaps in the embedded store)
         }
         
         try:
             self.memory = Memory.from_config(config)
+            if VECTOR_STORE == 'local':
+                # Embedded on-disk store from src/local_store.py instead of Mem0's default
+                from local_store import LocalVectorStore
+                self.memory.vector_store = LocalVectorStore("direct_client", 384)
             console.print("✅ [green]Connected to Mem0 directly[/green]")
         except Exception as e:
             console.print(f"❌ [red]Failed to connect to Mem0: {e}[/red]")
@@ -64,7 +75,7 @@ class DirectMemoryClient:
             console.print(f"💾 [green]Saving memory:[/green] {text[:80]}{'...' if len(text) > 80 else ''}")
             
             messages = [{"role": "user", "content": text}]
-            result = self.memory.add(messages, user_id=DEFAULT_USER_ID)
+            result = self.memory.add(messages, user_id=self.user_id)
             
             return {
                 "status": "success",
@@ -79,19 +90,23 @@ class DirectMemoryClient:
         try:
             console.print(f"🔍 [blue]Searching memories for:[/blue] {query}")
             
-            memories = self.memory.search(query, user_id=DEFAULT_USER_ID, limit=limit)
+            memories = self.memory.search(query, user_id=self.user_id, limit=limit)
             
             # Extract just the memory text from the results
             if isinstance(memories, dict) and "results" in memories:
-                memory_texts = [memory["memory"] for memory in memories["results"]]
+                results = memories["results"]
             elif isinstance(memories, list):
-                memory_texts = [memory.get("memory", str(memory)) for memory in memories]
+                results = memories
             else:
-                memory_texts = []
+                results = []
+            memory_texts = [memory.get("memory", str(memory)) for memory in results]
             
             return {
                 "status": "success",
                 "memories": memory_texts,
+                # Cosine distance from the local store, similarity from Mem0's default (Qdrant)
+                "scores": [memory.get("score") for memory in results],
+                "score_kind": "distance" if VECTOR_STORE == 'local' else "similarity",
                 "count": len(memory_texts)
             }
         except Exception as e:
@@ -102,7 +117,7 @@ class DirectMemoryClient:
         try:
             console.print("📚 [blue]Fetching all memories[/blue]")
             
-            memories = self.memory.get_all(user_id=DEFAULT_USER_ID)
+            memories = self.memory.get_all(user_id=self.user_id)
             
             # Extract just the memory text from the results
             if isinstance(memories, dict) and "results" in memories:
@@ -129,15 +144,23 @@ class DirectGeminiChat:
         self.memory = memory_client
         self.conversation_history = []
         self.session_start = datetime.now()
+        # GEMINI_STREAMING renders the answer as it is generated
+        self.streaming = streaming_enabled()
+        self.first_token_seconds = []
+        # Relevance threshold, de-duplication and token budget for retrieved memories
+        self.context_builder = ContextBuilder()
         
     def get_context_from_memory(self, user_input: str) -> str:
         """Search for relevant context from memory"""
         try:
-            result = self.memory.search_memories(user_input, limit=3)
+            result = self.memory.search_memories(user_input, limit=self.context_builder.candidates)
             
             if result["status"] == "success" and result["memories"]:
+                memories = self.context_builder.select(result["memories"], result.get("scores"), result.get("score_kind", "similarity"))
+                if not memories:
+                    return ""
                 context = "Previous relevant information:\n"
-                for i, memory in enumerate(result["memories"], 1):
+                for i, memory in enumerate(memories, 1):
                     context += f"{i}. {memory}\n"
                 return context
             return ""
@@ -171,9 +194,8 @@ class DirectGeminiChat:
             else:
                 prompt = user_input
             
-            # Generate response
-            response = self.model.generate_content(prompt)
-            answer = response.text if response.text else "Sorry, I couldn't generate a response."
+            # Generate response (streamed answers are rendered while they arrive)
+            answer = self.generate(prompt)
             
             # Save conversation to memory
             self.save_conversation_to_memory(user_input, answer)
@@ -193,6 +215,19 @@ class DirectGeminiChat:
             console.print(f"❌ [red]{error_msg}[/red]")
             return error_msg
     
+    def generate(self, prompt: str) -> str:
+        """Ask Gemini; in streaming mode the answer panel is rendered live"""
+        if self.streaming:
+            started = time.perf_counter()
+            response = self.model.generate_content(prompt, stream=True)
+            request_seconds = time.perf_counter() - started
+            answer, first_token = render_stream(response, console)
+            if first_token is not None:
+                self.first_token_seconds.append(request_seconds + first_token)
+            return answer
+        response = self.model.generate_content(prompt)
+        return response.text if response.text else EMPTY_ANSWER
+
     def get_session_stats(self) -> Dict[str, Any]:
         """Current session statistics"""
         total_questions = len(self.conversation_history)
@@ -203,7 +238,10 @@ class DirectGeminiChat:
             "total_questions": total_questions,
             "questions_with_context": questions_with_context,
             "session_duration": str(session_duration).split('.')[0],
-            "context_usage_rate": f"{questions_with_context/total_questions*100:.1f}%" if total_questions > 0 else "0%"
+            "context_usage_rate": f"{questions_with_context/total_questions*100:.1f}%" if total_questions > 0 else "0%",
+            "context_memories": "{selected}/{candidates} used, {tokens} tokens".format(**self.context_builder.stats()),
+            "time_to_first_token": (f"{sum(self.first_token_seconds) / len(self.first_token_seconds):.2f}s avg"
+                                    if self.first_token_seconds else "-")
         }
 
 def display_welcome():
@@ -252,6 +290,8 @@ def display_stats(chat_client: DirectGeminiChat):
     table.add_row("Questions with Context", str(stats["questions_with_context"]))
     table.add_row("Context Usage Rate", stats["context_usage_rate"])
     table.add_row("Session Duration", stats["session_duration"])
+    table.add_row("Context Memories", stats["context_memories"])
+    table.add_row("Time To First Token", stats["time_to_first_token"])
     
     console.print(table)
 
@@ -333,6 +373,11 @@ async def main():
                 # Regular chat
                 console.print(f"🔍 [blue]Searching memories for:[/blue] {user_input}")
                 
+                if chat_client.streaming:
+                    # The answer panel renders itself while tokens arrive
+                    chat_client.chat_with_context(user_input)
+                    continue
+
                 with console.status("[bold green]Thinking...") as status:
                     answer = chat_client.chat_with_context(user_input)
                 
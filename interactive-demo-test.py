@@ -35,17 +35,21 @@ def search_memories(query):
         return []
 
 def get_all_memories():
-    response = requests.get(f"{BASE_URL}/get_all_memories")
-    if response.status_code == 200:
+    memories, params = [], {}
+    while True:
+        response = requests.get(f"{BASE_URL}/get_all_memories", params=params)
+        if response.status_code != 200:
+            print(f"❌ Failed to get memories: {response.text}")
+            return memories
         result = response.json()
-        memories = result.get('memories', [])
-        print(f"📚 Total memories: {len(memories)}")
-        for i, memory in enumerate(memories, 1):
-            print(f"   {i}. {memory}")
-        return memories
-    else:
-        print(f"❌ Failed to get memories: {response.text}")
-        return []
+        memories.extend(result.get('memories', []))
+        if not result.get('next_cursor'):
+            break
+        params = {"cursor": result['next_cursor']}
+    print(f"📚 Total memories: {len(memories)}")
+    for i, memory in enumerate(memories, 1):
+        print(f"   {i}. {memory}")
+    return memories
 
 def interactive_demo():
     print("🤖 MCP-Mem0 Interactive Demo")
@@ -6,6 +6,7 @@ Uses simple file-based storage for conversations instead of complex vector store
 
 import os
 import sys
+import time
 import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -22,82 +23,89 @@ except ImportError as e:
     print("🔧 Install with: pip install google-generativeai rich")
     sys.exit(1)
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from memory_log import MemoryLog
+from lexical_index import LexicalIndex
+from stream_render import EMPTY_ANSWER, render_stream, streaming_enabled
+from context_builder import ContextBuilder
+
 # Configuration
 console = Console()
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'YOUR_GEMINI_API_KEY_HERE')
-MEMORY_FILE = "/app/memories.json"
+MEMORY_FILE = "/app/memories.json"  # legacy JSON array, imported into the log on first run
+MEMORY_LOG_FILE = os.getenv('MEMORY_LOG_FILE', '/app/memories.jsonl')
 
 class SimpleMemoryClient:
     """Simple file-based memory client"""
     
     def __init__(self):
-        self.memory_file = MEMORY_FILE
-        self.memories = self._load_memories()
-        console.print("✅ [green]Connected to simple memory[/green]")
+        self.memory_file = MEMORY_LOG_FILE
+        # Append-only log: a save writes one line instead of rewriting every memory
+        self.store = MemoryLog(self.memory_file, legacy_json=MEMORY_FILE)
+        self.index_file = self.memory_file + ".bm25"
+        self.index = self._load_index()
+        console.print(f"✅ [green]Connected to simple memory[/green] ({len(self.store)} memories)")
 
-    def _load_memories(self) -> List[Dict]:
-        """Load memories from file"""
-        try:
-            if os.path.exists(self.memory_file):
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            console.print(f"⚠️ [yellow]Could not load memories: {e}[/yellow]")
-        return []
+    def _load_index(self) -> LexicalIndex:
+        """Load the saved BM25 index and bring it in line with the log"""
+        index = LexicalIndex()
+        if os.path.exists(self.index_file):
+            try:
+                index.load(self.index_file)
+            except Exception as e:
+                console.print(f"⚠️ [yellow]Rebuilding search index ({e})[/yellow]")
+                index.clear()
+        # Memories saved after the index was last written (e.g. before a crash)
+        indexed = set(index.ids())
+        stored = {str(memory_id) for memory_id in self.store.ids()}
+        for memory_id in indexed - stored:
+            index.remove(memory_id)
+        missing = sorted(int(memory_id) for memory_id in stored - indexed)
+        for start in range(0, len(missing), 1000):
+            for memory in self.store.get_many(missing[start:start + 1000]):
+                index.add(memory["id"], {"data": memory["content"]})
+        return index
 
-    def _save_memories(self):
-        """Save memories to file"""
-        try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memories, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            console.print(f"❌ [red]Could not save memories: {e}[/red]")
+    def close(self):
+        """Flush the log and save its offset and search indexes"""
+        self.store.close()
+        self.index.save(self.index_file)
 
     def save_memory(self, text: str) -> Dict[str, Any]:
         """Save memory to file"""
         try:
             console.print(f"💾 [green]Saving memory:[/green] {text[:80]}{'...' if len(text) > 80 else ''}")
             
-            memory = {
-                "id": len(self.memories) + 1,
+            memory_id = self.store.append({
                 "content": text,
                 "timestamp": datetime.now().isoformat(),
                 "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            self.memories.append(memory)
-            self._save_memories()
+            })
+            self.index.add(memory_id, {"data": text})
             
             return {
                 "status": "success",
                 "message": f"Successfully saved memory: {text[:100]}..." if len(text) > 100 else f"Successfully saved memory: {text}",
-                "id": memory["id"]
+                "id": memory_id
             }
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
     def search_memories(self, query: str, limit: int = 3) -> Dict[str, Any]:
-        """Search memories by text similarity"""
+        """Search memories by keyword relevance (BM25)"""
         try:
             console.print(f"🔍 [blue]Searching memories for:[/blue] {query}")
             
-            # Simple keyword-based search
-            query_words = query.lower().split()
-            scored_memories = []
-            
-            for memory in self.memories:
-                content = memory["content"].lower()
-                score = sum(1 for word in query_words if word in content)
-                if score > 0:
-                    scored_memories.append((score, memory))
-            
-            # Sort by score and get top results
-            scored_memories.sort(reverse=True, key=lambda x: x[0])
-            top_memories = [mem[1]["content"] for mem in scored_memories[:limit]]
+            # Inverted index lookup: only memories sharing a query term are scored
+            hits = self.index.search(query, limit=limit)
+            records = self.store.get_many([int(memory_id) for memory_id, _ in hits])
+            bm25_scores = {int(memory_id): score for memory_id, score in hits}
+            top_memories = [mem["content"] for mem in records]
             
             return {
                 "status": "success",
                 "memories": top_memories,
+                "scores": [bm25_scores.get(mem["id"]) for mem in records],
                 "count": len(top_memories)
             }
         except Exception as e:
@@ -108,7 +116,7 @@ class SimpleMemoryClient:
         try:
             console.print("📚 [blue]Fetching all memories[/blue]")
             
-            memory_texts = [mem["content"] for mem in self.memories]
+            memory_texts = [mem["content"] for mem in self.store.scan()]
             
             return {
                 "status": "success",
@@ -127,15 +135,23 @@ class SimpleGeminiChat:
         self.memory = memory_client
         self.conversation_history = []
         self.session_start = datetime.now()
+        # GEMINI_STREAMING renders the answer as it is generated
+        self.streaming = streaming_enabled()
+        self.first_token_seconds = []
+        # Relevance threshold, de-duplication and token budget for retrieved memories
+        self.context_builder = ContextBuilder()
         
     def get_context_from_memory(self, user_input: str) -> str:
         """Search for relevant context from memory"""
         try:
-            result = self.memory.search_memories(user_input, limit=3)
+            result = self.memory.search_memories(user_input, limit=self.context_builder.candidates)
             
             if result["status"] == "success" and result["memories"]:
+                memories = self.context_builder.select(result["memories"], result.get("scores"), "bm25")
+                if not memories:
+                    return ""
                 context = "Previous relevant information:\n"
-                for i, memory in enumerate(result["memories"], 1):
+                for i, memory in enumerate(memories, 1):
                     context += f"{i}. {memory}\n"
                 return context
             return ""
@@ -169,9 +185,8 @@ class SimpleGeminiChat:
             else:
                 prompt = user_input
             
-            # Generate response
-            response = self.model.generate_content(prompt)
-            answer = response.text if response.text else "Sorry, I couldn't generate a response."
+            # Generate response (streamed answers are rendered while they arrive)
+            answer = self.generate(prompt)
             
             # Save conversation to memory
             self.save_conversation_to_memory(user_input, answer)
@@ -191,6 +206,19 @@ class SimpleGeminiChat:
             console.print(f"❌ [red]{error_msg}[/red]")
             return error_msg
     
+    def generate(self, prompt: str) -> str:
+        """Ask Gemini; in streaming mode the answer panel is rendered live"""
+        if self.streaming:
+            started = time.perf_counter()
+            response = self.model.generate_content(prompt, stream=True)
+            request_seconds = time.perf_counter() - started
+            answer, first_token = render_stream(response, console)
+            if first_token is not None:
+                self.first_token_seconds.append(request_seconds + first_token)
+            return answer
+        response = self.model.generate_content(prompt)
+        return response.text if response.text else EMPTY_ANSWER
+
     def get_session_stats(self) -> Dict[str, Any]:
         """Current session statistics"""
         total_questions = len(self.conversation_history)
@@ -201,7 +229,10 @@ class SimpleGeminiChat:
             "total_questions": total_questions,
             "questions_with_context": questions_with_context,
             "session_duration": str(session_duration).split('.')[0],
-            "context_usage_rate": f"{questions_with_context/total_questions*100:.1f}%" if total_questions > 0 else "0%"
+            "context_usage_rate": f"{questions_with_context/total_questions*100:.1f}%" if total_questions > 0 else "0%",
+            "context_memories": "{selected}/{candidates} used, {tokens} tokens".format(**self.context_builder.stats()),
+            "time_to_first_token": (f"{sum(self.first_token_seconds) / len(self.first_token_seconds):.2f}s avg"
+                                    if self.first_token_seconds else "-")
         }
 
 def display_welcome():
@@ -250,6 +281,11 @@ def display_stats(chat_client: SimpleGeminiChat):
     table.add_row("Questions with Context", str(stats["questions_with_context"]))
     table.add_row("Context Usage Rate", stats["context_usage_rate"])
     table.add_row("Session Duration", stats["session_duration"])
+    table.add_row("Context Memories", stats["context_memories"])
+    table.add_row("Time To First Token", stats["time_to_first_token"])
+    log_stats = chat_client.memory.store.stats()
+    table.add_row("Stored Memories", str(log_stats["memories"]))
+    table.add_row("Memory Log Size", f"{log_stats['log_bytes'] / 1024:.1f} KB")
     
     console.print(table)
 
@@ -331,6 +367,11 @@ def main():
                 # Regular chat
                 console.print(f"🔍 [blue]Searching memories for:[/blue] {user_input}")
                 
+                if chat_client.streaming:
+                    # The answer panel renders itself while tokens arrive
+                    chat_client.chat_with_context(user_input)
+                    continue
+
                 with console.status("[bold green]Thinking...") as status:
                     answer = chat_client.chat_with_context(user_input)
                 
@@ -342,6 +383,8 @@ def main():
                 break
             except Exception as e:
                 console.print(f"❌ [red]Error: {e}[/red]")
+        
+        memory_client.close()
     
     except Exception as e:
         console.print(f"❌ [red]Fatal error: {e}[/red]")
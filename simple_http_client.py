@@ -84,15 +84,20 @@ class SimpleHTTPMemoryClient:
             return []
     
     async def get_all_memories(self) -> List[str]:
-        """Get all memories"""
+        """Get all memories, following the server's page cursors"""
         try:
-            response = await self.client.get(f"{self.api_url}/get_all_memories")
-            if response.status_code == 200:
+            memories = []
+            params = {}
+            while True:
+                response = await self.client.get(f"{self.api_url}/get_all_memories", params=params)
+                if response.status_code != 200:
+                    console.print(f"❌ [red]Failed to get memories:[/red] {response.status_code} - {response.text}")
+                    return memories
                 result = response.json()
-                return result.get("memories", [])
-            else:
-                console.print(f"❌ [red]Failed to get memories:[/red] {response.status_code} - {response.text}")
-                return []
+                memories.extend(result.get("memories", []))
+                if not result.get("next_cursor"):
+                    return memories
+                params = {"cursor": result["next_cursor"]}
         except Exception as e:
             console.print(f"❌ [red]Error getting memories:[/red] {e}")
             return []
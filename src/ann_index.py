@@ -0,0 +1,370 @@
+"""
+ANN index management
+--------------------
+Operators choose how the collection's vector column is indexed and how hard
+each search looks:
+
+- `AnnIndexConfig` holds the build parameters (HNSW `m` / `ef_construction`
+  or IVFFlat `lists`) and the default query-time `ef_search` / `probes`.
+- `AnnIndexManager` builds or rebuilds the table-wide vector index online:
+  the new index is created CONCURRENTLY in a background thread, and the old
+  one is dropped only once the new one is valid, so searches never lose their
+  index. It also reports index sizes, build progress and recall estimates
+  (ANN top-k against an exact scan for sampled rows).
+- `TunedVectorStore` applies ef_search / probes to every search. Per-request
+  values come from `with_search_params`, which sets a context variable around
+  the Mem0 call running on the executor thread. Memory.search hands the
+  vector lookup to a fresh thread pool that does not inherit that variable,
+  so searches that take overrides go through `vector_search`, which runs the
+  lookup on the calling thread.
+
+Index names follow vecs' `ix_vector_cosine_ops_<method>_...` convention so
+vecs still recognizes the index as the collection's own.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from vector_table import VectorTable, sql_literal
+
+METHODS = ("hnsw", "ivfflat")
+
+# Per-request overrides, set by with_search_params on the thread running the Mem0 call
+_search_params: ContextVar[Optional[Dict[str, int]]] = ContextVar("ann_search_params", default=None)
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name, "")
+    return int(value) if value else None
+
+
+@dataclass
+class AnnIndexConfig:
+    """Build and query parameters for the collection's vector index.
+
+    Configuration (environment variables):
+        ANN_INDEX_METHOD: hnsw or ivfflat (default: hnsw)
+        ANN_HNSW_M / ANN_HNSW_EF_CONSTRUCTION: HNSW graph degree and build beam (default: 16 / 64)
+        ANN_IVFFLAT_LISTS: IVFFlat lists, 0 derives them from the row count (default: 0)
+        ANN_EF_SEARCH / ANN_PROBES: default query-time ef_search / probes, empty keeps the backend's default
+    """
+    method: str = "hnsw"
+    m: int = 16
+    ef_construction: int = 64
+    lists: int = 0
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "AnnIndexConfig":
+        return cls(
+            method=os.getenv("ANN_INDEX_METHOD", "hnsw").lower(),
+            m=int(os.getenv("ANN_HNSW_M", "16")),
+            ef_construction=int(os.getenv("ANN_HNSW_EF_CONSTRUCTION", "64")),
+            lists=int(os.getenv("ANN_IVFFLAT_LISTS", "0")),
+            ef_search=_optional_int("ANN_EF_SEARCH"),
+            probes=_optional_int("ANN_PROBES")
+        ).validate()
+
+    def validate(self) -> "AnnIndexConfig":
+        if self.method not in METHODS:
+            raise ValueError(f"Unknown ANN index method: {self.method} (expected one of {', '.join(METHODS)})")
+        if not 2 <= self.m <= 100:
+            raise ValueError("m must be between 2 and 100")
+        if self.ef_construction < 2 * self.m:
+            raise ValueError("ef_construction must be at least 2 * m")
+        if not 0 <= self.lists <= 32768:
+            raise ValueError("lists must be between 1 and 32768 (0 = derive from row count)")
+        if self.ef_search is not None and not 1 <= self.ef_search <= 1000:
+            raise ValueError("ef_search must be between 1 and 1000")
+        if self.probes is not None and self.probes < 1:
+            raise ValueError("probes must be at least 1")
+        return self
+
+    def lists_for(self, rows: int) -> int:
+        """pgvector's guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+        if self.lists:
+            return self.lists
+        if rows <= 1_000_000:
+            return max(10, rows // 1000)
+        return int(math.sqrt(rows))
+
+    def index_name(self, rows: int) -> str:
+        suffix = uuid.uuid4().hex[:7]
+        if self.method == "hnsw":
+            return f"ix_vector_cosine_ops_hnsw_m{self.m}_efc{self.ef_construction}_{suffix}"
+        return f"ix_vector_cosine_ops_ivfflat_nl{self.lists_for(rows)}_{suffix}"
+
+    def using_clause(self, rows: int = 0) -> str:
+        if self.method == "hnsw":
+            return f"USING hnsw (vec vector_cosine_ops) WITH (m = {self.m}, ef_construction = {self.ef_construction})"
+        return f"USING ivfflat (vec vector_cosine_ops) WITH (lists = {self.lists_for(rows)})"
+
+
+def current_search_params() -> Dict[str, int]:
+    """The per-request ef_search / probes overrides in effect, if any."""
+    return dict(_search_params.get() or {})
+
+
+def with_search_params(fn: Callable, ef_search: Optional[int] = None, probes: Optional[int] = None) -> Callable:
+    """Wrap fn so vector searches it triggers use these ef_search / probes values."""
+    params = {key: value for key, value in (("ef_search", ef_search), ("probes", probes)) if value}
+    if not params:
+        return fn
+    AnnIndexConfig(ef_search=params.get("ef_search"), probes=params.get("probes")).validate()
+
+    @wraps(fn)
+    def call(*args, **kwargs):
+        token = _search_params.set(params)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _search_params.reset(token)
+    return call
+
+
+def vector_search(mem0_client, query: str, scope: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """Memory.search's vector lookup, run on the calling thread so with_search_params overrides apply."""
+    if not hasattr(mem0_client, "_search_vector_store"):
+        return mem0_client.search(query, **scope, limit=limit)
+    filters = {key: value for key, value in scope.items() if value}
+    if not any(key in filters for key in ("user_id", "agent_id", "run_id")):
+        raise ValueError("One of the filters: user_id, agent_id or run_id is required!")
+    return {"results": mem0_client._search_vector_store(query, filters, limit)}
+
+
+class TunedVectorStore:
+    """Wraps a pgvector store so each search runs with the effective ef_search / probes."""
+
+    def __init__(self, vector_store, manager: "AnnIndexManager"):
+        self._store = vector_store
+        self.manager = manager
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def search_params(self) -> Dict[str, int]:
+        config = self.manager.config
+        params = {"ef_search": config.ef_search, "probes": config.probes}
+        params.update(current_search_params())
+        return {key: value for key, value in params.items() if value is not None}
+
+    def search(self, query, vectors, limit=5, filters=None):
+        params = self.search_params()
+        if not params:
+            return self._store.search(query, vectors, limit, filters)
+        if hasattr(self._store, "execute_ddl"):
+            return self._store.search(query, vectors, limit, filters, **params)
+
+        # vecs store: Mem0's wrapper doesn't forward these, so query the collection directly
+        from mem0.vector_stores.supabase import OutputData
+
+        results = self._store.collection.query(
+            data=vectors, limit=limit, filters=self._store._preprocess_filters(filters),
+            include_metadata=True, include_value=True,
+            ef_search=params.get("ef_search"), probes=params.get("probes")
+        )
+        return [OutputData(id=str(result[0]), score=float(result[1]), payload=result[2]) for result in results]
+
+
+class AnnIndexManager:
+    """Builds, reports and evaluates the collection's table-wide vector index."""
+
+    def __init__(self, vector_store, config: Optional[AnnIndexConfig] = None):
+        self.vector_table = VectorTable(vector_store)
+        self.supported = self.vector_table.supported
+        self.config = config or AnnIndexConfig.from_env()
+        self._lock = threading.Lock()
+        self._build: Dict[str, Any] = {"state": "idle"}
+
+    # -- Reporting ----------------------------------------------------------
+
+    def indexes(self) -> List[Dict[str, Any]]:
+        """Vector indexes on the table with their method, parameters and size."""
+        rows = self.vector_table.query(
+            "SELECT c.relname, am.amname, c.reloptions, pg_relation_size(c.oid), i.indisvalid, "
+            "pg_get_expr(i.indpred, i.indrelid) "
+            "FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_class t ON t.oid = i.indrelid "
+            "JOIN pg_am am ON am.oid = c.relam "
+            f"WHERE t.relnamespace = 'vecs'::regnamespace AND t.relname = {sql_literal(self.vector_table.name)} "
+            "AND am.amname IN ('hnsw', 'ivfflat') ORDER BY c.relname"
+        )
+        return [
+            {
+                "name": name,
+                "method": method,
+                "options": dict(option.split("=", 1) for option in (options or [])),
+                "size_bytes": size,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "valid": valid,
+                "partial": predicate is not None,
+                "predicate": predicate
+            }
+            for name, method, options, size, valid, predicate in rows
+        ]
+
+    def row_count(self) -> int:
+        """Planner row estimate, falling back to COUNT(*) on never-analyzed tables."""
+        estimate = self.vector_table.query(
+            f"SELECT reltuples::bigint FROM pg_class WHERE oid = {sql_literal(self.vector_table.qualified)}::regclass"
+        )[0][0]
+        if estimate is None or estimate < 0:
+            return self.vector_table.query(f"SELECT COUNT(*) FROM {self.vector_table.qualified}")[0][0]
+        return estimate
+
+    def build_status(self) -> Dict[str, Any]:
+        """State of the current or last build, with live progress while building."""
+        with self._lock:
+            status = dict(self._build)
+        if status["state"] == "building":
+            try:
+                progress = self.vector_table.query(
+                    "SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total "
+                    "FROM pg_stat_progress_create_index "
+                    f"WHERE relid = {sql_literal(self.vector_table.qualified)}::regclass"
+                )
+                if progress:
+                    phase, blocks_done, blocks_total, tuples_done, tuples_total = progress[0]
+                    status["progress"] = {
+                        "phase": phase,
+                        "blocks_done": blocks_done,
+                        "blocks_total": blocks_total,
+                        "tuples_done": tuples_done,
+                        "tuples_total": tuples_total
+                    }
+            except Exception as e:
+                status["progress"] = {"error": str(e)}
+            status["elapsed_seconds"] = round(time.time() - status["started_at"], 1)
+        return status
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "supported": self.supported,
+            "config": asdict(self.config),
+            "rows": self.row_count(),
+            "indexes": self.indexes(),
+            "build": self.build_status()
+        }
+
+    # -- Building -----------------------------------------------------------
+
+    def start_build(self, config: Optional[AnnIndexConfig] = None, replace: bool = True) -> Dict[str, Any]:
+        """Start an online (re)build in the background; raises RuntimeError if one is running."""
+        if not self.supported:
+            raise RuntimeError("ANN index management requires a pgvector vector store")
+        config = (config or self.config).validate()
+        with self._lock:
+            if self._build["state"] == "building":
+                raise RuntimeError(f"An index build is already running: {self._build['index']}")
+            rows = self.row_count()
+            name = config.index_name(rows)
+            self._build = {
+                "state": "building",
+                "index": name,
+                "config": asdict(config),
+                "started_at": time.time()
+            }
+        threading.Thread(target=self._run_build, args=(config, name, rows, replace),
+                         name="ann-index-build", daemon=True).start()
+        return self.build_status()
+
+    def _run_build(self, config: AnnIndexConfig, name: str, rows: int, replace: bool):
+        table = self.vector_table.qualified
+        previous = [index["name"] for index in self.indexes() if not index["partial"]]
+        print(f"🔄 Building ANN index {name} ({config.method}) on {table}")
+        try:
+            setup = []
+            work_mem = os.getenv("ANN_BUILD_MAINTENANCE_WORK_MEM", "")
+            if work_mem:
+                setup.append(f"SET maintenance_work_mem = {sql_literal(work_mem)}")
+            self.vector_table.execute(
+                *setup,
+                f'CREATE INDEX CONCURRENTLY "{name}" ON {table} {config.using_clause(rows)}',
+                *(["RESET maintenance_work_mem"] if setup else [])
+            )
+            if replace:
+                for old in previous:
+                    self.vector_table.execute(f'DROP INDEX CONCURRENTLY IF EXISTS vecs."{old}"')
+            self.config = config
+            with self._lock:
+                self._build.update(state="done", finished_at=time.time(), replaced=previous if replace else [])
+            print(f"✅ ANN index {name} ready" + (f", dropped {', '.join(previous)}" if replace and previous else ""))
+        except Exception as e:
+            print(f"❌ ANN index build failed: {e}")
+            # A failed CONCURRENTLY build leaves an invalid index behind
+            try:
+                self.vector_table.execute(f'DROP INDEX CONCURRENTLY IF EXISTS vecs."{name}"')
+            except Exception:
+                pass
+            with self._lock:
+                self._build.update(state="failed", finished_at=time.time(), error=str(e))
+
+    # -- Recall -------------------------------------------------------------
+
+    def estimate_recall(self, samples: int = 20, k: int = 10, ef_search: Optional[int] = None,
+                        probes: Optional[int] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Compare ANN top-k with an exact scan for `samples` stored vectors used as queries."""
+        if not self.supported:
+            raise RuntimeError("ANN index management requires a pgvector vector store")
+        table = self.vector_table.qualified
+        where = f"WHERE (metadata -> 'user_id') = {sql_literal(json.dumps(user_id))}::jsonb" if user_id else ""
+        sample_ids = [row[0] for row in self.vector_table.query(
+            f"SELECT id FROM {table} {where} ORDER BY random() LIMIT {int(samples)}"
+        )]
+        ef_search = ef_search or self.config.ef_search
+        probes = probes or self.config.probes
+
+        ann_setup = []
+        if ef_search:
+            ann_setup.append(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+        if probes:
+            ann_setup.append(f"SET LOCAL ivfflat.probes = {int(probes)}")
+        exact_setup = ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+
+        recalls, ann_ms, exact_ms = [], [], []
+        for sample_id in sample_ids:
+            sql = (
+                f"SELECT id FROM {table} {where} "
+                f"ORDER BY vec <=> (SELECT vec FROM {table} WHERE id = {sql_literal(sample_id)}) LIMIT {int(k)}"
+            )
+            started = time.perf_counter()
+            approximate = {row[0] for row in self.vector_table.query(sql, ann_setup)}
+            ann_ms.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            exact = {row[0] for row in self.vector_table.query(sql, exact_setup)}
+            exact_ms.append((time.perf_counter() - started) * 1000)
+            if exact:
+                recalls.append(len(approximate & exact) / len(exact))
+
+        return {
+            "samples": len(recalls),
+            "k": k,
+            "ef_search": ef_search,
+            "probes": probes,
+            "user_id": user_id,
+            "recall": round(sum(recalls) / len(recalls), 4) if recalls else None,
+            "min_recall": round(min(recalls), 4) if recalls else None,
+            "avg_ann_ms": round(sum(ann_ms) / len(ann_ms), 2) if ann_ms else None,
+            "avg_exact_ms": round(sum(exact_ms) / len(exact_ms), 2) if exact_ms else None
+        }
+
+
+def install_ann_tuning(mem0_client) -> Optional[AnnIndexManager]:
+    """Create the index manager and route searches through TunedVectorStore on pgvector backends."""
+    manager = AnnIndexManager(mem0_client.vector_store)
+    if not manager.supported:
+        return None
+    mem0_client.vector_store = TunedVectorStore(mem0_client.vector_store, manager)
+    print(f"✅ ANN index management enabled ({manager.config.method}, "
+          f"ef_search={manager.config.ef_search or 'default'}, probes={manager.config.probes or 'default'})")
+    return manager
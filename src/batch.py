@@ -0,0 +1,109 @@
+"""
+Batch memory ingestion
+----------------------
+Helpers behind `POST /save_memories` and the `save_memories` MCP tool.
+
+- Verbatim saves (`infer=False`) embed every text in a single forward pass and
+  write all rows to the vector store with one bulk upsert.
+- Extracted saves (`infer=True`) group texts into shared extraction prompts so
+  N texts cost N / group_size Gemini round trips instead of N.
+"""
+
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pytz
+
+
+def embed_texts(embedder, texts: List[str]) -> List[List[float]]:
+    """Embed a list of texts with as few forward passes as the embedder allows."""
+    if not texts:
+        return []
+    if hasattr(embedder, "embed_batch"):
+        return embedder.embed_batch(texts)
+    if hasattr(embedder, "model") and hasattr(embedder.model, "encode"):
+        # HuggingFace sentence-transformer: one batched encode call
+        return embedder.model.encode(texts, convert_to_numpy=True).tolist()
+    return [embedder.embed(text, "add") for text in texts]
+
+
+def insert_raw_memories(mem0_client, texts: List[str], scope: Dict[str, str],
+                        metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Store texts verbatim under a tenant scope: one embedding pass and one bulk upsert."""
+    vectors = embed_texts(mem0_client.embedding_model, texts)
+    created_at = datetime.now(pytz.timezone("US/Pacific")).isoformat()
+
+    ids, payloads = [], []
+    for text in texts:
+        payload = dict(metadata or {})
+        payload.update(scope)
+        payload.update({
+            "data": text,
+            "hash": hashlib.md5(text.encode()).hexdigest(),
+            "created_at": created_at
+        })
+        ids.append(str(uuid.uuid4()))
+        payloads.append(payload)
+
+    mem0_client.vector_store.insert(vectors=vectors, payloads=payloads, ids=ids)
+    for memory_id, text in zip(ids, texts):
+        mem0_client.db.add_history(memory_id, None, text, "ADD", created_at=created_at)
+
+    return [{"id": memory_id, "memory": text, "event": "ADD"} for memory_id, text in zip(ids, texts)]
+
+
+def group_texts(texts: List[str], group_size: int) -> List[List[int]]:
+    """Split text indexes into extraction groups of at most group_size items."""
+    group_size = max(1, group_size)
+    return [list(range(start, min(start + group_size, len(texts)))) for start in range(0, len(texts), group_size)]
+
+
+async def save_memories(mem0_client, executor, texts: List[str], scope: Dict[str, str],
+                        infer: bool = True, group_size: Optional[int] = None) -> Dict[str, Any]:
+    """Save many texts at once.
+
+    Returns `items` (one result per input text, in order) and, when infer=True,
+    `groups` with the memory events produced by each shared extraction prompt.
+
+    Configuration (environment variables):
+        BATCH_EXTRACTION_GROUP_SIZE: texts per shared extraction prompt when infer=True (default: 10)
+    """
+    if not texts:
+        return {"items": [], "groups": []}
+
+    if not infer:
+        try:
+            rows = await executor.run(insert_raw_memories, mem0_client, texts, scope)
+        except Exception as e:
+            return {"items": [{"index": i, "success": False, "error": str(e)} for i in range(len(texts))], "groups": []}
+        return {"items": [{"index": i, "success": True, **row} for i, row in enumerate(rows)], "groups": []}
+
+    group_size = group_size or int(os.getenv("BATCH_EXTRACTION_GROUP_SIZE", "10"))
+    groups = group_texts(texts, group_size)
+
+    async def run_group(indexes: List[int]):
+        messages = [{"role": "user", "content": texts[i]} for i in indexes]
+        return await executor.run(mem0_client.add, messages, **scope)
+
+    # Groups are independent extraction calls, so they run concurrently on the executor
+    outcomes = await asyncio.gather(*(run_group(indexes) for indexes in groups), return_exceptions=True)
+
+    items: List[Dict[str, Any]] = [None] * len(texts)
+    group_results = []
+    for group_number, (indexes, outcome) in enumerate(zip(groups, outcomes)):
+        if isinstance(outcome, Exception):
+            group_results.append({"group": group_number, "indexes": indexes, "success": False, "error": str(outcome)})
+        else:
+            events = outcome.get("results", []) if isinstance(outcome, dict) else outcome
+            group_results.append({"group": group_number, "indexes": indexes, "success": True, "results": events})
+        # Facts extracted from a shared prompt can't be attributed to a single input,
+        # so each item points at the group that processed it
+        for i in indexes:
+            items[i] = {"index": i, "success": not isinstance(outcome, Exception), "group": group_number}
+            if isinstance(outcome, Exception):
+                items[i]["error"] = str(outcome)
+    return {"items": items, "groups": group_results}
@@ -0,0 +1,129 @@
+"""
+Prompt context assembly for the chat clients
+--------------------------------------------
+Turns memory search results into the "relevant context" block of a prompt.
+Clients fetch a few more candidates than they expect to use, and
+ContextBuilder then:
+
+- drops weak hits: vector results farther than CONTEXT_MAX_DISTANCE (cosine
+  distance, as the server's stores report it; similarity scores are converted
+  first), and keyword (BM25) results scoring below CONTEXT_MIN_RELATIVE_SCORE
+  of the best hit, since BM25 scores have no absolute scale;
+- drops near-duplicates, i.e. memories whose term sets overlap an already
+  selected memory by CONTEXT_DEDUPE_THRESHOLD (Jaccard) or more, such as the
+  same question saved in two conversations (numbers, dates and times are left
+  out of the comparison, so conversation timestamps do not keep them apart);
+- packs the rest in rank order into CONTEXT_TOKEN_BUDGET estimated tokens.
+  A memory is shortened to CONTEXT_MAX_MEMORY_TOKENS, or to what is left of
+  the budget; once less than MIN_PIECE_TOKENS remain, only memories that fit
+  whole are added.
+
+Results without a score (older servers return bare strings) skip the
+threshold but are still de-duplicated and packed.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from lexical_index import tokenize
+
+SCORE_KINDS = ("distance", "similarity", "bm25")
+
+# Same estimate as file ingestion uses for chunk sizes
+CHARS_PER_TOKEN = 4
+# A memory shortened below this is not worth its place in the prompt
+MIN_PIECE_TOKENS = 32
+DIGITS_RE = re.compile(r"[\d\-.:/]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _dedupe_terms(text: str) -> set:
+    return {term for term in tokenize(text) if not DIGITS_RE.fullmatch(term)}
+
+
+def _shorten(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + " …"
+
+
+class ContextBuilder:
+    """Relevance threshold, de-duplication and token budget for prompt context.
+
+    Configuration (environment variables):
+        CONTEXT_CANDIDATES: memories clients fetch before filtering (default: 8)
+        CONTEXT_TOKEN_BUDGET: estimated tokens of memory text per prompt (default: 600)
+        CONTEXT_MAX_MEMORY_TOKENS: longer memories are shortened to this (default: 200)
+        CONTEXT_MAX_DISTANCE: drop vector hits with a larger cosine distance (default: 0.7)
+        CONTEXT_MIN_RELATIVE_SCORE: drop BM25 hits below this share of the best score (default: 0.2)
+        CONTEXT_DEDUPE_THRESHOLD: term-set Jaccard similarity treated as a duplicate (default: 0.8)
+    """
+
+    def __init__(self):
+        self.candidates = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+        self.token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+        self.max_memory_tokens = int(os.getenv("CONTEXT_MAX_MEMORY_TOKENS", "200"))
+        self.max_distance = float(os.getenv("CONTEXT_MAX_DISTANCE", "0.7"))
+        self.min_relative_score = float(os.getenv("CONTEXT_MIN_RELATIVE_SCORE", "0.2"))
+        self.dedupe_threshold = float(os.getenv("CONTEXT_DEDUPE_THRESHOLD", "0.8"))
+        self.counters = {"candidates": 0, "selected": 0, "below_threshold": 0, "duplicates": 0,
+                         "over_budget": 0, "tokens": 0}
+
+    def _relevant(self, scores: Sequence[Optional[float]], score_kind: str) -> List[bool]:
+        if score_kind not in SCORE_KINDS:
+            raise ValueError(f"Unknown score kind {score_kind!r} (expected one of {', '.join(SCORE_KINDS)})")
+        if score_kind == "bm25":
+            best = max((score for score in scores if score is not None), default=0.0)
+            return [score is None or best <= 0 or score >= self.min_relative_score * best for score in scores]
+        if score_kind == "similarity":
+            return [score is None or 1.0 - score <= self.max_distance for score in scores]
+        return [score is None or score <= self.max_distance for score in scores]
+
+    def select(self, memories: Sequence[Any], scores: Optional[Sequence[Optional[float]]] = None,
+               score_kind: str = "distance") -> List[str]:
+        """Memories (ranked best first) to put in the prompt.
+
+        `memories` holds strings or result dicts with "memory" and optional "score".
+        """
+        texts, item_scores = [], []
+        for i, memory in enumerate(memories):
+            if isinstance(memory, dict):
+                texts.append(str(memory.get("memory", "")))
+                item_scores.append(memory.get("score"))
+            else:
+                texts.append(str(memory))
+                item_scores.append(None)
+            if scores is not None and i < len(scores):
+                item_scores[-1] = scores[i]
+
+        selected, selected_terms = [], []
+        budget = self.token_budget
+        self.counters["candidates"] += len(texts)
+        for text, relevant in zip(texts, self._relevant(item_scores, score_kind)):
+            if not relevant:
+                self.counters["below_threshold"] += 1
+                continue
+            terms = _dedupe_terms(text)
+            if any(terms and len(terms & seen) / len(terms | seen) >= self.dedupe_threshold for seen in selected_terms):
+                self.counters["duplicates"] += 1
+                continue
+            limit = min(self.max_memory_tokens, budget)
+            if limit < MIN_PIECE_TOKENS and estimate_tokens(text) > limit:
+                self.counters["over_budget"] += 1
+                continue
+            text = _shorten(text, limit)
+            budget = max(0, budget - estimate_tokens(text))
+            selected.append(text)
+            selected_terms.append(terms)
+        self.counters["selected"] += len(selected)
+        self.counters["tokens"] += self.token_budget - budget
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, token_budget=self.token_budget)
@@ -0,0 +1,174 @@
+"""
+Dynamic micro-batching for embeddings
+-------------------------------------
+Concurrent `search_memories` / `save_memory` calls each ask the embedder for
+one vector, and each of those is a separate forward pass. `EmbeddingBatcher`
+sits between Mem0 and the embedder: callers enqueue their texts and block,
+a single dispatcher thread drains the queue into one batched forward pass and
+hands every caller its own rows back.
+
+Batching is dynamic: an idle server dispatches a lone request immediately;
+once requests overlap (the previous batch held more than one request) the
+dispatcher waits up to the batching window for more, stopping early at
+max_batch texts or once as many callers as in the previous batch have
+joined. Requests that arrive while a batch is encoding form the next
+batch.
+
+The same batcher backs the shared embedding service used in multi-worker mode.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from batch import embed_texts
+from executor import ProcessPoolEmbedder
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode requests into batched calls on one dispatcher thread.
+
+    Configuration (environment variables):
+        EMBED_BATCH_MAX_SIZE: most texts per forward pass (default: 32)
+        EMBED_BATCH_WINDOW_MS: longest wait for more requests once traffic overlaps (default: 5)
+    """
+
+    def __init__(self, encode: Callable[[List[str]], Sequence], max_batch: Optional[int] = None,
+                 window_ms: Optional[float] = None, name: str = "embed-batcher"):
+        self.encode = encode
+        self.max_batch = max_batch or int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+        window_ms = window_ms if window_ms is not None else float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._last_batch_requests = 0
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.waited_batches = 0
+        self._encode_seconds = 0.0
+        self._queue_seconds = 0.0
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Sequence:
+        """Embed texts as part of the next batch; blocks until the rows are ready."""
+        if not texts:
+            return []
+        future: Future = Future()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self) -> List[tuple]:
+        pending = [self._queue.get()]
+        count = len(pending[0][0])
+
+        # Whatever queued up while the previous batch was encoding joins immediately
+        while count < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            count += len(item[0])
+
+        # Only pay the window when traffic is actually concurrent, and stop
+        # waiting once as many callers have joined as made up the last batch
+        expected = self._last_batch_requests if self._last_batch_requests > len(pending) else None
+        if count < self.max_batch and self.window > 0 and (len(pending) > 1 or expected):
+            with self._lock:
+                self.waited_batches += 1
+            deadline = time.perf_counter() + self.window
+            while count < self.max_batch and (expected is None or len(pending) < expected):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                count += len(item[0])
+        return pending
+
+    def _loop(self):
+        while True:
+            pending = self._collect()
+            self._last_batch_requests = len(pending)
+            texts = [text for batch_texts, _, _ in pending for text in batch_texts]
+            started = time.perf_counter()
+            try:
+                vectors = self.encode(texts)
+            except Exception as e:
+                for _, future, _ in pending:
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            with self._lock:
+                self.requests += len(pending)
+                self.batches += 1
+                self.texts += len(texts)
+                self._encode_seconds += finished - started
+                self._queue_seconds += sum(started - queued_at for _, _, queued_at in pending)
+
+            offset = 0
+            for batch_texts, future, _ in pending:
+                future.set_result(vectors[offset:offset + len(batch_texts)])
+                offset += len(batch_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "window_ms": self.window * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "texts": self.texts,
+                "waited_batches": self.waited_batches,
+                "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "avg_encode_ms": round(self._encode_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+                "avg_queue_ms": round(self._queue_seconds / self.requests * 1000, 2) if self.requests else 0.0
+            }
+
+
+def _as_list(row) -> List[float]:
+    return row.tolist() if hasattr(row, "tolist") else list(row)
+
+
+class BatchingEmbedder:
+    """Mem0-compatible embedder whose calls go through an EmbeddingBatcher."""
+
+    def __init__(self, embedder, batcher: EmbeddingBatcher):
+        self._embedder = embedder
+        self.batcher = batcher
+
+    def __getattr__(self, name):
+        return getattr(self._embedder, name)
+
+    def embed(self, text, memory_action=None):
+        # The sentence-transformer embedder ignores memory_action, so every action shares a batch
+        return _as_list(self.batcher.submit([text])[0])
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return [_as_list(row) for row in self.batcher.submit(texts)]
+
+
+def install_embedding_batcher(mem0_client) -> Optional[EmbeddingBatcher]:
+    """Route the client's embedder through an EmbeddingBatcher unless disabled.
+
+    Skipped when embeddings already leave the process: the shared embedding
+    service batches on its side, and the process pool spreads single calls
+    over several model copies.
+    """
+    if os.getenv("EMBED_BATCH_ENABLED", "true").lower() == "false":
+        return None
+    embedder = mem0_client.embedding_model
+    if getattr(embedder, "remote", False) or isinstance(embedder, ProcessPoolEmbedder):
+        return None
+    batcher = EmbeddingBatcher(lambda texts: embed_texts(embedder, texts))
+    mem0_client.embedding_model = BatchingEmbedder(embedder, batcher)
+    print(f"✅ Embedding micro-batching enabled (batch ≤ {batcher.max_batch}, window {batcher.window * 1000:.0f} ms)")
+    return batcher
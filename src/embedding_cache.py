@@ -0,0 +1,204 @@
+"""
+Query embedding cache
+---------------------
+LRU + TTL cache in front of the embedder for `search` embeddings. Clients send
+many repeated or near-identical queries, and each one otherwise costs a full
+sentence-transformer forward pass.
+
+Keys are (embedder model, normalized query text). Normalization collapses
+whitespace and case-folds, which is lossless for the uncased all-MiniLM-L6-v2
+tokenizer. The cache can optionally be persisted across restarts as a
+memory-mapped float32 matrix with a JSON key sidecar.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch import embed_texts
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case-fold a query for use as a cache key."""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """Thread-safe LRU + TTL cache of float32 embeddings with a memory cap.
+
+    Configuration (environment variables):
+        EMBED_CACHE_ENABLED: set to "false" to disable the cache (default: true)
+        EMBED_CACHE_MAX_MB: memory cap for cached vectors and keys (default: 64)
+        EMBED_CACHE_TTL: seconds an entry stays valid (default: 3600)
+        EMBED_CACHE_PATH: file to persist the cache to on shutdown, empty disables (default: empty)
+    """
+
+    def __init__(self,
+                 max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None,
+                 path: Optional[str] = None):
+        self.max_bytes = max_bytes or int(float(os.getenv("EMBED_CACHE_MAX_MB", "64")) * 1024 * 1024)
+        self.ttl = ttl if ttl is not None else float(os.getenv("EMBED_CACHE_TTL", "3600"))
+        self.path = path if path is not None else os.getenv("EMBED_CACHE_PATH", "")
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.path:
+            self.load()
+
+    @staticmethod
+    def _entry_size(key: Tuple[str, str], vector: np.ndarray) -> int:
+        return vector.nbytes + len(key[0]) + len(key[1])
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        key = (model, normalize_query(text))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            vector, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model: str, text: str, vector, expires_at: Optional[float] = None):
+        key = (model, normalize_query(text))
+        vector = np.asarray(vector, dtype=np.float32)
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, expires_at or time.time() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple[str, str]):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, vector)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persistent": bool(self.path)
+            }
+
+    def save(self):
+        """Write unexpired entries to EMBED_CACHE_PATH (float32 matrix + JSON key sidecar)."""
+        if not self.path:
+            return
+        now = time.time()
+        with self._lock:
+            live = [(key, vector, expires_at) for key, (vector, expires_at) in self._entries.items() if expires_at > now]
+        if not live:
+            return
+
+        dims = live[0][1].shape[0]
+        live = [entry for entry in live if entry[1].shape[0] == dims]
+        matrix = np.memmap(self.path + ".tmp", dtype=np.float32, mode="w+", shape=(len(live), dims))
+        for row, (_, vector, _) in enumerate(live):
+            matrix[row] = vector
+        matrix.flush()
+        del matrix
+
+        sidecar = {
+            "dims": dims,
+            "keys": [[model, text, expires_at] for (model, text), _, expires_at in live]
+        }
+        with open(self.path + ".keys.tmp", "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+        os.replace(self.path + ".tmp", self.path)
+        os.replace(self.path + ".keys.tmp", self.path + ".keys.json")
+        print(f"💾 Saved {len(live)} cached query embeddings to {self.path}")
+
+    def load(self):
+        """Load a persisted cache, skipping entries that have expired."""
+        keys_path = self.path + ".keys.json"
+        if not (os.path.exists(self.path) and os.path.exists(keys_path)):
+            return
+        try:
+            with open(keys_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+            keys = sidecar["keys"]
+            matrix = np.memmap(self.path, dtype=np.float32, mode="r", shape=(len(keys), sidecar["dims"]))
+            now = time.time()
+            loaded = 0
+            for row, (model, text, expires_at) in enumerate(keys):
+                if expires_at > now:
+                    self.put(model, text, np.array(matrix[row]), expires_at=expires_at)
+                    loaded += 1
+            del matrix
+            print(f"✅ Loaded {loaded} cached query embeddings from {self.path}")
+        except Exception as e:
+            print(f"⚠️ Could not load embedding cache from {self.path}: {e}")
+
+
+class CachedEmbedder:
+    """Wraps a Mem0 embedder and serves `search` embeddings from an EmbeddingCache."""
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self._embedder = embedder
+        self.cache = cache
+        self.model_name = getattr(embedder.config, "model", None) or type(embedder).__name__
+
+    def __getattr__(self, name):
+        return getattr(self._embedder, name)
+
+    def embed(self, text, memory_action=None):
+        if memory_action != "search":
+            return self._embedder.embed(text, memory_action)
+        vector = self.cache.get(self.model_name, text)
+        if vector is not None:
+            return vector.tolist()
+        embedding = self._embedder.embed(text, memory_action)
+        self.cache.put(self.model_name, text, embedding)
+        return embedding
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return embed_texts(self._embedder, texts)
+
+
+def install_embedding_cache(mem0_client) -> Optional[EmbeddingCache]:
+    """Put an EmbeddingCache in front of the client's embedder unless disabled."""
+    if os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    cache = EmbeddingCache()
+    mem0_client.embedding_model = CachedEmbedder(mem0_client.embedding_model, cache)
+    print(f"✅ Query embedding cache enabled ({cache.max_bytes // (1024 * 1024)} MB, TTL {cache.ttl:.0f}s)")
+    return cache
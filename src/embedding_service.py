@@ -0,0 +1,203 @@
+"""
+Shared embedding service
+------------------------
+In multi-worker mode (HTTP_WORKERS > 1) every uvicorn worker would otherwise
+load its own copy of the sentence-transformer. Instead one service process
+owns the model and serves all workers over a Unix socket; each worker's Mem0
+client gets a `RemoteEmbedder` in place of the HuggingFace embedder.
+
+Requests arriving from different workers are micro-batched into a single
+`encode` call by an `EmbeddingBatcher` (window EMBEDDING_SERVICE_MAX_WAIT_MS).
+
+Wire format: every message is a 4-byte big-endian length followed by the
+body. Requests are JSON (`{"texts": [...]}` or `{"op": "stats"}`); responses
+start with a status byte: 0 = float32 matrix (`!II` rows, dims, then the
+row-major data), 1 = error message, 2 = JSON.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher
+
+_LENGTH = struct.Struct("!I")
+_SHAPE = struct.Struct("!II")
+
+STATUS_VECTORS = 0
+STATUS_ERROR = 1
+STATUS_JSON = 2
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("Embedding service connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock: socket.socket, body: bytes):
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return _recv_exact(sock, size)
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serves one worker connection until it closes."""
+
+    def handle(self):
+        batcher: EmbeddingBatcher = self.server.batcher
+        while True:
+            try:
+                request = json.loads(recv_frame(self.request))
+            except (ConnectionError, OSError):
+                return
+            try:
+                if request.get("op") == "stats":
+                    send_frame(self.request, bytes([STATUS_JSON]) + json.dumps(batcher.stats()).encode())
+                    continue
+                vectors = np.ascontiguousarray(batcher.submit(request["texts"]), dtype=np.float32)
+                send_frame(self.request, bytes([STATUS_VECTORS]) + _SHAPE.pack(*vectors.shape) + vectors.tobytes())
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_frame(self.request, bytes([STATUS_ERROR]) + str(e).encode())
+
+
+class _EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str, max_batch: Optional[int] = None, max_wait_ms: Optional[float] = None):
+    """Load the model once and serve embedding requests on socket_path (blocks)."""
+    from dotenv import load_dotenv
+    from sentence_transformers import SentenceTransformer
+    from utils import build_embedder_config
+
+    load_dotenv()
+    max_batch = max_batch or int(os.getenv("EMBEDDING_SERVICE_MAX_BATCH", "64"))
+    max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_SERVICE_MAX_WAIT_MS", "5"))
+
+    config = build_embedder_config()
+    model = SentenceTransformer(config["model"], **config.get("model_kwargs", {}))
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(texts, convert_to_numpy=True)
+
+    # The socket only appears once the model is loaded, so workers block until it is usable
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = _EmbeddingServer(socket_path, _RequestHandler)
+    server.batcher = EmbeddingBatcher(encode, max_batch, max_wait_ms, name="embedding-service-batcher")
+    print(f"✅ Embedding service listening on {socket_path} (batch ≤ {max_batch}, wait ≤ {max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def start_embedding_service(socket_path: str) -> multiprocessing.Process:
+    """Run serve() in a child process; used by the HTTP server's multi-worker mode."""
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(socket_path,), name="embedding-service", daemon=True
+    )
+    process.start()
+    print(f"🔄 Started embedding service process (pid {process.pid})")
+    return process
+
+
+class RemoteEmbedder:
+    """Mem0-compatible embedder that forwards to the shared embedding service.
+
+    Each thread keeps its own connection, so concurrent Mem0 calls from the
+    executor reach the service in parallel and can share a batch.
+
+    Configuration (environment variables):
+        EMBEDDING_SERVICE_SOCKET: Unix socket of the embedding service
+        EMBEDDING_SERVICE_CONNECT_TIMEOUT: seconds to wait for the service to come up (default: 120)
+    """
+
+    remote = True
+
+    def __init__(self, socket_path: str, config: Optional[Dict[str, Any]] = None,
+                 connect_timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        config = dict(config or {})
+        self.config = SimpleNamespace(model=config.get("model"), embedding_dims=config.get("embedding_dims"))
+        self.connect_timeout = connect_timeout or float(os.getenv("EMBEDDING_SERVICE_CONNECT_TIMEOUT", "120"))
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            return sock
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.socket_path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                sock.close()
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Embedding service not available at {self.socket_path}")
+                time.sleep(0.2)
+        self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def _call(self, request: Dict[str, Any]) -> bytes:
+        body = json.dumps(request).encode()
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_frame(sock, body)
+                response = recv_frame(sock)
+                break
+            except (ConnectionError, OSError):
+                # The service may have restarted; reconnect once
+                self._reset()
+                if attempt:
+                    raise
+        if response[0] == STATUS_ERROR:
+            raise RuntimeError(f"Embedding service error: {response[1:].decode()}")
+        return response
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self._call({"texts": list(texts)})
+        rows, dims = _SHAPE.unpack_from(response, 1)
+        return np.frombuffer(response, dtype=np.float32, offset=1 + _SHAPE.size).reshape(rows, dims).tolist()
+
+    def embed(self, text, memory_action=None):
+        return self.embed_batch([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters reported by the service."""
+        return json.loads(self._call({"op": "stats"})[1:])
+
+
+if __name__ == "__main__":
+    serve(os.getenv("EMBEDDING_SERVICE_SOCKET") or "/tmp/mem0-embedder.sock")
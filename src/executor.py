@@ -0,0 +1,181 @@
+"""
+Executor layer for blocking Mem0 calls
+--------------------------------------
+Mem0's `add`/`search`/`get_all` are synchronous: they run Gemini extraction,
+the sentence-transformer forward pass and the pgvector round trip on the
+calling thread. Running them directly inside an `async def` endpoint blocks the
+event loop, so every Mem0 call made by the HTTP and MCP servers goes through a
+`Mem0Executor` instead.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the executor queue is full and a call is rejected."""
+
+
+# Per-process embedder used by the optional embedding process pool
+_process_embedder = None
+
+
+def _init_process_embedder(model_name: str):
+    """Load the sentence-transformer once in each worker process."""
+    global _process_embedder
+    from sentence_transformers import SentenceTransformer
+    _process_embedder = SentenceTransformer(model_name)
+
+
+def _embed_in_process(texts):
+    """Embed a string or list of strings in a worker process."""
+    return _process_embedder.encode(texts, convert_to_numpy=True).tolist()
+
+
+class ProcessPoolEmbedder:
+    """Drop-in replacement for Mem0's embedder that runs the forward pass in a process pool.
+
+    Mem0 calls `embedding_model.embed(text, memory_action)` from whatever thread
+    runs `add`/`search`, so the executor threads block on the future while the
+    CPU-bound encode happens outside this process's GIL.
+    """
+
+    def __init__(self, embedder, pool: ProcessPoolExecutor, executor: "Mem0Executor"):
+        self.config = embedder.config
+        self._embedder = embedder
+        self._pool = pool
+        self._executor = executor
+
+    def embed(self, text, memory_action=None):
+        self._executor._embed_started()
+        try:
+            return self._pool.submit(_embed_in_process, text).result()
+        finally:
+            self._executor._embed_finished()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        self._executor._embed_started()
+        try:
+            return self._pool.submit(_embed_in_process, list(texts)).result()
+        finally:
+            self._executor._embed_finished()
+
+
+class Mem0Executor:
+    """Bounded thread pool (plus optional embedding process pool) for Mem0 calls.
+
+    Configuration (environment variables):
+        MEM0_EXECUTOR_THREADS: worker threads for Mem0 calls (default: 8)
+        MEM0_EXECUTOR_MAX_QUEUE: calls allowed to wait for a thread before new
+            calls are rejected with ExecutorBusyError (default: 256)
+        MEM0_EMBED_PROCESSES: size of the embedding process pool, 0 disables it (default: 0)
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 embed_processes: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("MEM0_EXECUTOR_THREADS", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("MEM0_EXECUTOR_MAX_QUEUE", "256"))
+        self.embed_processes = embed_processes if embed_processes is not None else int(os.getenv("MEM0_EMBED_PROCESSES", "0"))
+
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mem0")
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._embed_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    def install(self, mem0_client, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        """Route the client's embedder through the process pool when one is configured."""
+        if self.embed_processes > 0 and getattr(mem0_client.embedding_model, "remote", False):
+            print("⚠️ Embedding runs in the shared embedding service; ignoring MEM0_EMBED_PROCESSES")
+            self.embed_processes = 0
+        if self.embed_processes > 0 and self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.embed_processes,
+                initializer=_init_process_embedder,
+                initargs=(model_name,)
+            )
+            mem0_client.embedding_model = ProcessPoolEmbedder(mem0_client.embedding_model, self._processes, self)
+            print(f"✅ Embedding process pool started with {self.embed_processes} processes")
+        return mem0_client
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable on the executor and await its result."""
+        with self._lock:
+            if self._queued + self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusyError(
+                    f"Mem0 executor is saturated ({self._in_flight} running, {self._queued} queued)"
+                )
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._threads, self._tracked, partial(fn, *args, **kwargs), time.perf_counter()
+        )
+
+    def _tracked(self, call: Callable, submitted_at: float) -> Any:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+            self._total_wait += started_at - submitted_at
+        try:
+            result = call()
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        else:
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._total_run += time.perf_counter() - started_at
+
+    def _embed_started(self):
+        with self._lock:
+            self._embed_in_flight += 1
+
+    def _embed_finished(self):
+        with self._lock:
+            self._embed_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, in-flight calls and latency counters."""
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / finished * 1000, 2) if finished else 0.0,
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0.0,
+                "embed_processes": self.embed_processes if self._processes else 0,
+                "embed_in_flight": self._embed_in_flight
+            }
+
+    def shutdown(self):
+        """Stop accepting work and release the pools."""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes:
+            self._processes.shutdown(wait=False, cancel_futures=True)
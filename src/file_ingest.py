@@ -0,0 +1,344 @@
+"""
+Streaming file ingestion
+------------------------
+Backs `POST /load_file_simple`. Instead of reading a whole file into one
+message (one giant extraction call that can overflow the LLM context), the
+file is read in fixed-size blocks and split into token-bounded, overlapping
+chunks along paragraph and sentence boundaries:
+
+- Paragraphs (blank-line separated) are split into sentences; sentences are
+  packed into a chunk until the next one would pass INGEST_CHUNK_TOKENS.
+  Chunks end on a paragraph break when one falls in the second half of the
+  chunk. A sentence longer than a whole chunk is split on whitespace.
+- Each chunk repeats the last sentences of the previous one, up to
+  INGEST_CHUNK_OVERLAP_TOKENS, so facts spanning a boundary keep context.
+- Chunk boundaries are partly content-defined: a paragraph whose CRC32 is
+  divisible by ANCHOR_MODULUS ends the chunk once it is half full. After an
+  edit the chunking falls back into step at the next such paragraph, so with
+  an IngestManifest only the chunks around the edit count as new.
+- Tokens are estimated as characters / 4, which is close enough for sizing
+  prompts and needs no tokenizer.
+
+Chunks are grouped into batches of INGEST_FILE_BATCH_SIZE and handed to
+INGEST_FILE_CONCURRENCY worker threads through a bounded queue, so the reader
+stays at most a few batches ahead of extraction (back-pressure) and memory use
+does not grow with file size. With infer=True every chunk goes through Mem0's
+extraction; with infer=False a batch is embedded in one pass and stored
+verbatim. Progress is reported through a callback after every batch.
+
+Given an IngestManifest, unchanged files are skipped by stat signature or
+content hash, chunks whose hash is already recorded are not sent again, and
+memories of chunks that disappeared from the file are deleted. Loads of the
+same file in the same scope (a direct load, a queued job, a directory sync)
+wait for each other through the manifest's file lock.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from batch import insert_raw_memories
+from ingest_manifest import IngestManifest, content_hash, hash_file
+
+CHARS_PER_TOKEN = 4
+READ_BLOCK_BYTES = 64 * 1024
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+# About one paragraph in ANCHOR_MODULUS ends a chunk regardless of where the chunk started
+ANCHOR_MODULUS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def read_paragraphs(file_path: str, on_read: Optional[Callable[[bytes], None]] = None) -> Iterator[str]:
+    """Yield the file's paragraphs, reading READ_BLOCK_BYTES at a time.
+
+    `on_read` sees every raw block. JSON files are pretty-printed first (they
+    are parsed whole, as before).
+    """
+    if file_path.endswith(".json"):
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        if on_read:
+            on_read(raw)
+        text = raw.decode("utf-8", errors="replace")
+        try:
+            text = json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+        except ValueError:
+            pass
+        yield from (p.strip() for p in PARAGRAPH_RE.split(text) if p.strip())
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(READ_BLOCK_BYTES)
+            if on_read and block:
+                on_read(block)
+            buffer += decoder.decode(block, final=not block)
+            parts = PARAGRAPH_RE.split(buffer)
+            # The last part may continue in the next block
+            buffer = parts.pop() if block else ""
+            for part in parts:
+                if part.strip():
+                    yield part.strip()
+            if not block:
+                if buffer.strip():
+                    yield buffer.strip()
+                return
+
+
+def _split_long(sentence: str, max_tokens: int) -> List[str]:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces, current = [], ""
+    for word in sentence.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {word}" if current else word
+        while len(current) > max_chars:
+            pieces.append(current[:max_chars])
+            current = current[max_chars:]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_paragraphs(paragraphs: Iterator[str], max_tokens: int, overlap_tokens: int) -> Iterator[str]:
+    """Pack sentences into overlapping chunks of at most max_tokens (estimated)."""
+    units: List[Tuple[str, bool]] = []  # (sentence, ends a paragraph)
+    tokens = 0
+
+    def render(parts: List[Tuple[str, bool]]) -> str:
+        text = ""
+        for i, (sentence, _) in enumerate(parts):
+            if i:
+                text += "\n\n" if parts[i - 1][1] else " "
+            text += sentence
+        return text
+
+    def overlap_of(parts: List[Tuple[str, bool]]) -> List[Tuple[str, bool]]:
+        kept, kept_tokens = [], 0
+        for unit in reversed(parts):
+            kept_tokens += estimate_tokens(unit[0])
+            if kept_tokens > overlap_tokens:
+                break
+            kept.insert(0, unit)
+        return kept
+
+    for paragraph in paragraphs:
+        sentences = [s for s in SENTENCE_RE.split(paragraph) if s.strip()]
+        pieces = []
+        for sentence in sentences:
+            pieces.extend(_split_long(sentence, max_tokens) if estimate_tokens(sentence) > max_tokens else [sentence])
+        for i, sentence in enumerate(pieces):
+            size = estimate_tokens(sentence)
+            if units and tokens + size > max_tokens:
+                # Prefer ending on a paragraph break in the second half of the chunk
+                cut = len(units)
+                for j in range(len(units) - 1, 0, -1):
+                    if units[j - 1][1] and sum(estimate_tokens(u[0]) for u in units[:j]) >= max_tokens // 2:
+                        cut = j
+                        break
+                emitted, rest = units[:cut], units[cut:]
+                yield render(emitted)
+                units = overlap_of(emitted) + rest
+                tokens = sum(estimate_tokens(u[0]) for u in units)
+                # Drop overlap that would not leave room for the next sentence
+                while units and tokens + size > max_tokens:
+                    tokens -= estimate_tokens(units.pop(0)[0])
+            units.append((sentence, i == len(pieces) - 1))
+            tokens += size
+        if units and tokens >= max_tokens // 2 and zlib.crc32(paragraph.encode("utf-8")) % ANCHOR_MODULUS == 0:
+            yield render(units)
+            units = overlap_of(units)
+            tokens = sum(estimate_tokens(u[0]) for u in units)
+    if units:
+        yield render(units)
+
+
+def ingest_file(mem0_client, file_path: str, scope: Dict[str, str], infer: bool = True,
+                progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                manifest: Optional[IngestManifest] = None,
+                chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None,
+                batch_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Stream a file into memory chunk by chunk; returns the final progress record.
+
+    Configuration (environment variables):
+        INGEST_CHUNK_TOKENS: estimated tokens per chunk (default: 400)
+        INGEST_CHUNK_OVERLAP_TOKENS: tokens repeated from the previous chunk (default: 50)
+        INGEST_FILE_BATCH_SIZE: chunks per work item (default: 4)
+        INGEST_FILE_CONCURRENCY: batches processed at once (default: 4)
+    """
+    chunk_tokens = chunk_tokens or int(os.getenv("INGEST_CHUNK_TOKENS", "400"))
+    overlap_tokens = overlap_tokens if overlap_tokens is not None else int(os.getenv("INGEST_CHUNK_OVERLAP_TOKENS", "50"))
+    batch_size = batch_size or int(os.getenv("INGEST_FILE_BATCH_SIZE", "4"))
+    concurrency = concurrency or int(os.getenv("INGEST_FILE_CONCURRENCY", "4"))
+
+    started = time.perf_counter()
+    stat = os.stat(file_path)
+    manifest_path = os.path.abspath(file_path)
+    lock = threading.Lock()
+    state: Dict[str, Any] = {
+        "file_path": file_path,
+        "bytes_total": stat.st_size,
+        "bytes_read": 0,
+        "chunks_read": 0,
+        "chunks_done": 0,
+        "chunks_unchanged": 0,
+        "chunks_failed": 0,
+        "chunks_retired": 0,
+        "memories": 0,
+        "memories_retired": 0,
+        "errors": [],
+        "status": "running"
+    }
+
+    def report():
+        if progress:
+            with lock:
+                snapshot = dict(state, errors=list(state["errors"]))
+            progress(snapshot)
+
+    def finish(status: str) -> Dict[str, Any]:
+        with lock:
+            state["status"] = status
+            state["seconds"] = round(time.perf_counter() - started, 3)
+            state["errors"] = state["errors"][:20]
+        report()
+        return state
+
+    # Two loads of the same file must not both see its new chunks as unrecorded
+    guard = manifest.file_lock(scope, manifest_path) if manifest is not None else nullcontext()
+    with guard:
+        known: Dict[str, List[str]] = {}
+        if manifest is not None:
+            record = manifest.file_record(scope, manifest_path)
+            if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+                state["chunks_unchanged"] = record["chunks"]
+                return finish("unchanged")
+            if record and record["size"] == stat.st_size and hash_file(file_path) == record["file_hash"]:
+                # Touched but identical: refresh the stat signature only
+                manifest.record_file(scope, manifest_path, stat, record["file_hash"], record["chunks"])
+                state["chunks_unchanged"] = record["chunks"]
+                return finish("unchanged")
+            known = manifest.chunk_memories(scope, manifest_path)
+
+        file_digest = hashlib.sha256()
+
+        def on_read(block: bytes):
+            file_digest.update(block)
+            with lock:
+                state["bytes_read"] += len(block)
+
+        def remember(chunk_hash: str, events) -> int:
+            """Record the memories a chunk wrote (added or updated); returns how many events there were."""
+            memory_ids = [e["id"] for e in events or []
+                          if isinstance(e, dict) and e.get("event", "ADD") in ("ADD", "UPDATE") and e.get("id")]
+            if manifest is not None:
+                manifest.record_chunk(scope, manifest_path, chunk_hash, memory_ids)
+            return len(events or [])
+
+        def process(first_index: int, chunks: List[Tuple[str, str]]):
+            metadata = {"source_file": file_path}
+            if infer:
+                for offset, (chunk_hash, chunk) in enumerate(chunks):
+                    try:
+                        result = mem0_client.add([{"role": "user", "content": chunk}], **scope,
+                                                 metadata={**metadata, "chunk_index": first_index + offset})
+                        events = result.get("results", []) if isinstance(result, dict) else result
+                        created = remember(chunk_hash, events)
+                        with lock:
+                            state["chunks_done"] += 1
+                            state["memories"] += created
+                    except Exception as e:
+                        with lock:
+                            state["chunks_failed"] += 1
+                            state["errors"].append(f"chunk {first_index + offset}: {e}")
+            else:
+                try:
+                    rows = insert_raw_memories(mem0_client, [chunk for _, chunk in chunks], scope, metadata)
+                    for (chunk_hash, _), row in zip(chunks, rows):
+                        remember(chunk_hash, [row])
+                    with lock:
+                        state["chunks_done"] += len(chunks)
+                        state["memories"] += len(rows)
+                except Exception as e:
+                    with lock:
+                        state["chunks_failed"] += len(chunks)
+                        state["errors"].append(f"chunks {first_index}-{first_index + len(chunks) - 1}: {e}")
+            report()
+
+        # Bounded: the reader blocks once `concurrency` batches are waiting
+        work: "queue.Queue[Optional[Tuple[int, List[Tuple[str, str]]]]]" = queue.Queue(maxsize=concurrency)
+
+        def worker():
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                process(*item)
+
+        seen = set()
+        workers = [threading.Thread(target=worker, name=f"file-ingest-{i}", daemon=True) for i in range(concurrency)]
+        for thread in workers:
+            thread.start()
+        try:
+            batch: List[Tuple[str, str]] = []
+            first_index = 0
+            chunks = chunk_paragraphs(read_paragraphs(file_path, on_read), chunk_tokens, overlap_tokens)
+            for index, chunk in enumerate(chunks):
+                chunk_hash = content_hash(chunk.encode("utf-8"))
+                with lock:
+                    state["chunks_read"] = index + 1
+                    if chunk_hash in known or chunk_hash in seen:
+                        state["chunks_unchanged"] += 1
+                if chunk_hash in known or chunk_hash in seen:
+                    seen.add(chunk_hash)
+                    continue
+                seen.add(chunk_hash)
+                if not batch:
+                    first_index = index
+                batch.append((chunk_hash, chunk))
+                if len(batch) == batch_size:
+                    work.put((first_index, batch))
+                    batch = []
+            if batch:
+                work.put((first_index, batch))
+        finally:
+            for _ in workers:
+                work.put(None)
+            for thread in workers:
+                thread.join()
+
+        if manifest is not None:
+            # Chunks that no longer occur in the file take their memories with them
+            removed = [chunk_hash for chunk_hash in known if chunk_hash not in seen]
+            for chunk_hash in removed:
+                for memory_id in known[chunk_hash]:
+                    try:
+                        mem0_client.delete(memory_id)
+                        state["memories_retired"] += 1
+                    except Exception as e:
+                        # Already deleted through another path
+                        print(f"⚠️ Could not retire memory {memory_id} of {file_path}: {e}")
+            manifest.forget_chunks(scope, manifest_path, removed)
+            state["chunks_retired"] = len(removed)
+            if not state["chunks_failed"]:
+                # Failed chunks are retried on the next load because the stat signature is not recorded
+                manifest.record_file(scope, manifest_path, stat, file_digest.hexdigest(), len(seen))
+
+        if not state["chunks_failed"]:
+            return finish("done")
+        return finish("failed" if not state["chunks_done"] else "partial")
@@ -5,17 +5,38 @@ HTTP API Server for MCP-Mem0 functionality
 Creates an HTTP REST API wrapper around the MCP memory functionality.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 from dotenv import load_dotenv
 import uvicorn
+import asyncio
+import glob
 import json
 import os
+import sys
 import json as json_lib
 
 from utils import get_mem0_client
+from executor import Mem0Executor, ExecutorBusyError
+from ingest_queue import IngestQueue, make_mem0_handler, recover_interrupted
+from ingest_manifest import IngestManifest
+from directory_sync import DirectorySync, scan_directory
+from batch import save_memories as save_memories_batch
+from file_ingest import ingest_file
+from embedding_batcher import install_embedding_batcher
+from embedding_cache import install_embedding_cache
+from search_cache import install_search_cache
+from lexical_index import SEARCH_MODES, default_search_mode, hybrid_search, install_lexical_index
+from pagination import fetch_page, DEFAULT_PAGE_SIZE
+from search_results import MSGPACK_MEDIA_TYPE, SCORE_KIND, flatten_results, pack, structured_results, wants_msgpack
+from tenants import tenant_scope, TenantIndexManager
+from ann_index import AnnIndexConfig, install_ann_tuning, vector_search, with_search_params
+from startup import StartupState
 
 load_dotenv()
 
@@ -25,27 +46,114 @@ DEFAULT_USER_ID = "user"
 # Initialize Mem0 client
 mem0_client = None
 
+# Executor that runs the blocking Mem0 calls off the event loop
+mem0_executor = None
+
+# Durable queue for asynchronous (write-behind) saves
+ingest_queue = None
+
+# Hashes of ingested files and chunks, so re-loading a file only processes what changed
+ingest_manifest = None
+
+# Recursive directory ingestion and its background watches
+directory_sync = None
+
+# Micro-batching scheduler in front of the embedder
+embedding_batcher = None
+
+# Cache of query embeddings in front of the embedder
+embedding_cache = None
+
+# Cache of search results, invalidated per user on writes
+search_cache = None
+
+# BM25 index over memory text for hybrid search
+lexical_index = None
+
+# Per-tenant vector index management
+tenant_indexes = None
+
+# Table-wide ANN index management and search tuning
+ann_indexes = None
+
+# Startup phase timings and readiness
+startup_state = StartupState()
+
+def initialize_components():
+    """Build the Mem0 client and the layers around it, then warm the embedder"""
+    global mem0_client, mem0_executor, ingest_queue, ingest_manifest, directory_sync, embedding_batcher, embedding_cache, search_cache, tenant_indexes, ann_indexes, lexical_index
+    mem0_client = get_mem0_client(startup_state)
+    with startup_state.phase("executor"):
+        mem0_executor = Mem0Executor()
+        mem0_executor.install(mem0_client)
+        embedding_batcher = install_embedding_batcher(mem0_client)
+    with startup_state.phase("ann_index"):
+        # Installed before the search cache so cached results are keyed by the tuning in effect
+        ann_indexes = install_ann_tuning(mem0_client)
+    with startup_state.phase("caches"):
+        embedding_cache = install_embedding_cache(mem0_client)
+        search_cache = install_search_cache(mem0_client)
+    with startup_state.phase("lexical_index"):
+        lexical_index = install_lexical_index(mem0_client)
+    with startup_state.phase("ingest_queue"):
+        ingest_manifest = IngestManifest()
+        directory_sync = DirectorySync(mem0_client, ingest_manifest)
+        ingest_queue = IngestQueue(make_mem0_handler(mem0_client, ingest_manifest, directory_sync))
+        directory_sync.attach_queue(ingest_queue)
+        ingest_queue.start()
+    with startup_state.phase("tenant_indexes"):
+        tenant_indexes = TenantIndexManager(mem0_client.vector_store)
+        tenant_indexes.start()
+    with startup_state.phase("embedder_warmup"):
+        # First forward pass initializes the model's kernels and, if enabled, the process pool
+        mem0_client.embedding_model.embed("warmup", "add")
+    startup_state.mark_ready()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize the Mem0 client on startup"""
-    global mem0_client
+    """Start Mem0 initialization in the background so / answers while the server warms up"""
+    print("🔄 Starting Mem0 client initialization...")
+    print(f"📊 DATABASE_URL: {os.environ.get('DATABASE_URL', 'NOT SET')}")
+    print(f"🔑 LLM_PROVIDER: {os.environ.get('LLM_PROVIDER', 'NOT SET')}")
+    print(f"🔑 LLM_API_KEY: {'SET' if os.environ.get('LLM_API_KEY') else 'NOT SET'}")
+
+    async def initialize():
+        try:
+            await asyncio.to_thread(initialize_components)
+            print(f"✅ Mem0 client initialized successfully")
+        except Exception as e:
+            print(f"❌ Failed to initialize Mem0 client: {e}")
+            import traceback
+            traceback.print_exc()
+            startup_state.mark_failed(e)
+            if os.getenv("EXIT_ON_STARTUP_FAILURE", "true").lower() != "false":
+                # A server that can never become ready must exit so the orchestrator restarts it
+                print("❌ Exiting: startup failed (set EXIT_ON_STARTUP_FAILURE=false to keep serving /ready for debugging)")
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(1)
+
+    init_task = asyncio.create_task(initialize())
     try:
-        print("🔄 Starting Mem0 client initialization...")
-        print(f"📊 DATABASE_URL: {os.environ.get('DATABASE_URL', 'NOT SET')}")
-        print(f"🔑 LLM_PROVIDER: {os.environ.get('LLM_PROVIDER', 'NOT SET')}")
-        print(f"🔑 LLM_API_KEY: {'SET' if os.environ.get('LLM_API_KEY') else 'NOT SET'}")
-        
-        mem0_client = get_mem0_client()
-        print(f"✅ Mem0 client initialized successfully")
         yield
-    except Exception as e:
-        print(f"❌ Failed to initialize Mem0 client: {e}")
-        import traceback
-        traceback.print_exc()
-        raise
     finally:
-        # Cleanup if needed
-        pass
+        if not init_task.done():
+            init_task.cancel()
+        if tenant_indexes:
+            tenant_indexes.stop()
+        if directory_sync:
+            directory_sync.stop()
+        if ingest_queue:
+            ingest_queue.stop()
+        if mem0_executor:
+            mem0_executor.shutdown()
+        if ingest_manifest:
+            # Last of the ingest pieces: queue workers and loads record files and chunks until they stop
+            ingest_manifest.close()
+        if embedding_cache:
+            embedding_cache.save()
+        if mem0_client and hasattr(mem0_client.vector_store, "close"):
+            mem0_client.vector_store.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -64,90 +172,362 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Paths that answer before the server is warm
+READY_EXEMPT_PATHS = {"/", "/ready", "/stats", "/docs", "/openapi.json"}
+
+@app.middleware("http")
+async def require_ready(request: Request, call_next):
+    """Reject memory operations with 503 until startup has finished"""
+    if not startup_state.ready and request.url.path not in READY_EXEMPT_PATHS:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server failed to start" if startup_state.error else "Server is warming up",
+                     "startup": startup_state.report()}
+        )
+    return await call_next(request)
+
 # Request models
-class SaveMemoryRequest(BaseModel):
+class TenantRequest(BaseModel):
+    user_id: str = DEFAULT_USER_ID
+    agent_id: Optional[str] = None
+    run_id: Optional[str] = None
+
+    def scope(self):
+        return tenant_scope(self.user_id, self.agent_id, self.run_id)
+
+class SaveMemoryRequest(TenantRequest):
     text: str
+    async_ingest: bool = False
+
+class SaveMemoriesRequest(TenantRequest):
+    texts: List[str]
+    infer: bool = True
 
-class SearchMemoryRequest(BaseModel):
+class SyncDirectoryRequest(TenantRequest):
+    directory: str
+    include: Optional[str] = None
+    recursive: bool = True
+    infer: bool = True
+    watch: bool = False
+    watch_interval: Optional[float] = None
+
+class SearchMemoryRequest(TenantRequest):
     query: str
     limit: int = 3
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    mode: Optional[str] = None
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    structured: bool = False
+
+class AnnIndexBuildRequest(BaseModel):
+    method: Optional[str] = None
+    m: Optional[int] = None
+    ef_construction: Optional[int] = None
+    lists: Optional[int] = None
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    replace: bool = True
 
 # API endpoints
 @app.get("/")
 async def root():
-    """Health check endpoint"""
+    """Health check endpoint: 503 once startup has failed"""
+    if startup_state.error:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": startup_state.error})
     return {"status": "ok", "message": "MCP-Mem0 HTTP API is running"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness endpoint: 200 only once the embedder, vector store and queues are warm"""
+    report = startup_state.report()
+    if not report["ready"]:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics for sizing the server"""
+    return {
+        "startup": startup_state.report(),
+        "executor": mem0_executor.stats() if mem0_executor else None,
+        "ingest_queue": ingest_queue.stats() if ingest_queue else None,
+        "ingest_manifest": ingest_manifest.stats() if ingest_manifest else None,
+        "directory_sync": directory_sync.stats() if directory_sync else None,
+        "embedding_batcher": embedding_batcher.stats() if embedding_batcher else None,
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "search_cache": search_cache.stats() if search_cache else None,
+        "lexical_index": lexical_index.stats() if lexical_index else None,
+        "vector_store": await asyncio.to_thread(vector_store_stats),
+        "embedding_service": await asyncio.to_thread(embedding_service_stats),
+        "worker_pid": os.getpid()
+    }
+
+def vector_store_stats():
+    """Pool and per-operation metrics from stores that report them (VECTOR_STORE=pgpool)"""
+    store = getattr(mem0_client, "vector_store", None)
+    if not hasattr(store, "stats"):
+        return None
+    try:
+        return store.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
+def embedding_service_stats():
+    """Batching counters from the shared embedding service, when this worker uses one"""
+    embedder = getattr(mem0_client, "embedding_model", None)
+    if not getattr(embedder, "remote", False):
+        return None
+    try:
+        return embedder.stats()
+    except Exception as e:
+        return {"error": str(e)}
+
 @app.post("/save_memory")
 async def save_memory(request: SaveMemoryRequest):
     """Save information to long-term memory"""
     try:
         messages = [{"role": "user", "content": request.text}]
-        result = mem0_client.add(messages, user_id=DEFAULT_USER_ID)
+        if request.async_ingest:
+            job_id = ingest_queue.enqueue(request.user_id, {"messages": messages, "scope": request.scope()})
+            return {
+                "success": True,
+                "message": f"Queued memory for saving: {request.text[:100]}..." if len(request.text) > 100 else f"Queued memory for saving: {request.text}",
+                "job_id": job_id,
+                "status": "queued"
+            }
+        result = await mem0_executor.run(mem0_client.add, messages, **request.scope())
         return {
             "success": True,
             "message": f"Successfully saved memory: {request.text[:100]}..." if len(request.text) > 100 else f"Successfully saved memory: {request.text}",
             "result": result
         }
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving memory: {str(e)}")
 
+@app.post("/save_memories")
+async def save_memories(request: SaveMemoriesRequest):
+    """Save a batch of texts to long-term memory"""
+    try:
+        result = await save_memories_batch(mem0_client, mem0_executor, request.texts, request.scope(), infer=request.infer)
+        saved = sum(1 for item in result["items"] if item["success"])
+        return {
+            "success": saved == len(request.texts),
+            "message": f"Saved {saved} of {len(request.texts)} memories",
+            "results": result["items"],
+            "groups": result["groups"]
+        }
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving memories: {str(e)}")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the status of an asynchronous ingest job"""
+    job = ingest_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {"success": True, "job": job}
+
 @app.get("/get_all_memories")
-async def get_all_memories():
-    """Get all stored memories for the user"""
+async def get_all_memories(cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                           user_id: str = DEFAULT_USER_ID, agent_id: Optional[str] = None, run_id: Optional[str] = None):
+    """Get stored memories for the user, one page at a time (pass next_cursor back to continue)"""
     try:
-        memories = mem0_client.get_all(user_id=DEFAULT_USER_ID)
-        if isinstance(memories, dict) and "results" in memories:
-            flattened_memories = [memory["memory"] for memory in memories["results"]]
-        else:
-            flattened_memories = memories
+        items, next_cursor = await mem0_executor.run(
+            fetch_page, mem0_client, tenant_scope(user_id, agent_id, run_id), cursor, page_size
+        )
         return {
             "success": True,
-            "memories": flattened_memories
+            "memories": [item["memory"] for item in items],
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving memories: {str(e)}")
 
+@app.get("/get_all_memories/stream")
+async def stream_all_memories(page_size: int = 500, user_id: str = DEFAULT_USER_ID,
+                              agent_id: Optional[str] = None, run_id: Optional[str] = None):
+    """Stream every memory for the user as NDJSON, holding one page in memory at a time"""
+    scope = tenant_scope(user_id, agent_id, run_id)
+
+    async def generate():
+        cursor = None
+        try:
+            while True:
+                items, cursor = await mem0_executor.run(fetch_page, mem0_client, scope, cursor, page_size)
+                for item in items:
+                    yield json.dumps(item, ensure_ascii=False) + "\n"
+                if not cursor:
+                    break
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({"error": f"Error streaming memories: {str(e)}"}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.post("/search_memories")
-async def search_memories(request: SearchMemoryRequest):
-    """Search memories using semantic search"""
+async def search_memories(request: SearchMemoryRequest, http_request: Request):
+    """Search memories using semantic or hybrid (BM25 + vector) search
+
+    With `structured`, each memory is a record with id, score (cosine distance), timestamps and metadata
+    instead of its text. Send `Accept: application/msgpack` for a MessagePack-encoded response.
+    """
+    msgpack_response = wants_msgpack(http_request.headers.get("accept", ""))
     try:
-        memories = mem0_client.search(request.query, user_id=DEFAULT_USER_ID, limit=request.limit)
-        if isinstance(memories, dict) and "results" in memories:
-            flattened_memories = [memory["memory"] for memory in memories["results"]]
+        mode = (request.mode or default_search_mode()).lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r} (expected one of {', '.join(SEARCH_MODES)})")
+        if mode == "hybrid":
+            search = with_search_params(hybrid_search, request.ef_search, request.probes)
+            memories = await mem0_executor.run(search, mem0_client, lexical_index, request.query, request.scope(),
+                                               request.limit, request.vector_weight, request.lexical_weight)
         else:
-            flattened_memories = memories
+            search = with_search_params(vector_search, request.ef_search, request.probes)
+            memories = await mem0_executor.run(search, mem0_client, request.query, request.scope(), request.limit)
+        if request.structured:
+            body = {"success": True, "score_kind": SCORE_KIND, "memories": structured_results(memories)}
+        else:
+            body = {"success": True, "memories": flatten_results(memories)}
+        if msgpack_response:
+            try:
+                return Response(pack(body), media_type=MSGPACK_MEDIA_TYPE)
+            except RuntimeError as e:
+                raise HTTPException(status_code=406, detail=str(e))
+        return body
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching memories: {str(e)}")
+    
+
+
+
+@app.get("/admin/tenants")
+async def list_tenants():
+    """Memory counts per tenant and whether each has its own vector index"""
+    try:
+        tenants = await mem0_executor.run(tenant_indexes.list_tenants)
         return {
             "success": True,
-            "memories": flattened_memories
+            "supported": tenant_indexes.supported,
+            "min_rows": tenant_indexes.min_rows,
+            "tenants": tenants
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching memories: {str(e)}")
-    
+        raise HTTPException(status_code=500, detail=f"Error listing tenants: {e}")
 
+@app.post("/admin/tenants/{user_id}/index")
+async def build_tenant_index(user_id: str):
+    """Build a dedicated vector index for one tenant"""
+    if not tenant_indexes.supported:
+        raise HTTPException(status_code=400, detail="Per-tenant indexes require the pgvector (supabase) vector store")
+    try:
+        index_name = await mem0_executor.run(tenant_indexes.ensure_tenant_index, user_id)
+        return {"success": True, "user_id": user_id, "index": index_name}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building tenant index: {e}")
+
+@app.get("/admin/ann_index")
+async def ann_index_report():
+    """Vector index method, parameters, size and build progress"""
+    if ann_indexes is None:
+        raise HTTPException(status_code=400, detail="ANN index management requires a pgvector vector store")
+    try:
+        return {"success": True, **await mem0_executor.run(ann_indexes.report)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading ANN index: {e}")
 
+@app.post("/admin/ann_index")
+async def build_ann_index(request: AnnIndexBuildRequest):
+    """Build (or rebuild) the vector index online with the given method and parameters"""
+    if ann_indexes is None:
+        raise HTTPException(status_code=400, detail="ANN index management requires a pgvector vector store")
+    overrides = {key: value for key, value in request.model_dump(exclude={"replace"}).items() if value is not None}
+    try:
+        config = AnnIndexConfig(**{**asdict(ann_indexes.config), **overrides}).validate()
+        build = await mem0_executor.run(ann_indexes.start_build, config, request.replace)
+        return {"success": True, "build": build}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building ANN index: {e}")
+
+@app.get("/admin/ann_index/recall")
+async def ann_index_recall(samples: int = 20, k: int = 10, ef_search: Optional[int] = None,
+                           probes: Optional[int] = None, user_id: Optional[str] = None):
+    """Estimate recall@k of the ANN index against exact search for sampled stored vectors"""
+    if ann_indexes is None:
+        raise HTTPException(status_code=400, detail="ANN index management requires a pgvector vector store")
+    try:
+        estimate = await mem0_executor.run(ann_indexes.estimate_recall, samples, k, ef_search, probes, user_id)
+        return {"success": True, **estimate}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error estimating recall: {e}")
 
 @app.get("/list_files")
-async def list_files(directory: str = "test_files"):
-    """List available files in directory"""
+async def list_files(directory: str = "test_files", recursive: bool = False):
+    """List available files in directory (and its subdirectories with recursive=true)"""
     try:
         if not os.path.exists(directory):
             return {"files": [], "message": f"Directory {directory} not found"}
-        
-        files = []
-        for file in os.listdir(directory):
-            file_path = os.path.join(directory, file)
-            if os.path.isfile(file_path):
-                files.append({
-                    "name": file,
-                    "path": file_path,
-                    "size": os.path.getsize(file_path)
-                })
-        
+
+        files = [
+            {"name": os.path.basename(path), "path": path, "size": stat.st_size}
+            for path, stat in scan_directory(directory, recursive=recursive)
+        ]
         return {"files": files, "count": len(files)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing files: {e}")
 
+@app.post("/sync_directory")
+async def sync_directory(request: SyncDirectoryRequest):
+    """Queue a load of every new or changed file under a directory, optionally keep watching it.
+
+    Returns a `job_id`; poll `GET /jobs/{job_id}` for progress and the final report.
+    """
+    try:
+        # One lane per directory: a second sync of the same tree (or a watch pass) waits for the first
+        job_id = directory_sync.enqueue(request.directory, request.scope(), request.include, request.recursive,
+                                        request.infer)
+        response = {"success": True, "job_id": job_id, "status": "queued"}
+        if request.watch:
+            response["watch_id"] = directory_sync.watch(
+                request.directory, request.scope(), request.include, request.recursive, request.infer,
+                request.watch_interval
+            )
+        return response
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing directory: {e}")
+
+@app.get("/sync_directory/watches")
+async def list_directory_watches():
+    """Directories being re-synced in the background, with each one's last report"""
+    return {"watches": directory_sync.watches()}
+
+@app.delete("/sync_directory/watches/{watch_id}")
+async def stop_directory_watch(watch_id: str):
+    """Stop re-syncing a watched directory"""
+    if not directory_sync.stop_watch(watch_id):
+        raise HTTPException(status_code=404, detail=f"Watch not found: {watch_id}")
+    return {"success": True, "watch_id": watch_id}
+
     
 
 # @app.post("/load_file")
@@ -198,49 +578,111 @@ async def list_files(directory: str = "test_files"):
 
 @app.post("/load_file_simple")
 async def load_file_simple(request: dict):
-    """Load text from file and save to memory - simple working version"""
+    """Load files into memory as overlapping chunks.
+
+    `file_path` loads one file and waits for it (`"async_ingest": true` queues it and
+    returns a `job_id`); `pattern` (e.g. "test_files/*.txt") queues every matching file
+    as its own job so they load in parallel. Poll `GET /jobs/{job_id}` for progress.
+    Files and chunks already loaded for the same user are skipped (see ingest_manifest).
+    `"infer": false` stores the chunks verbatim instead of extracting facts.
+    """
     try:
         file_path = request.get("file_path")
-        if not file_path:
-            raise HTTPException(status_code=400, detail="file_path is required")
-        
-        # Read the file directly
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
-        
-        if file_path.endswith('.json'):
-            try:
-                data = json_lib.loads(content)
-                content = json_lib.dumps(data, indent=2, ensure_ascii=False)
-            except:
-                pass 
-            
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        if not content.strip():
-            raise HTTPException(status_code=400, detail="File is empty")
-        
-        # Use the exact same approach as save_memory - just pass content directly
-        messages = [{"role": "user", "content": content}]
-        result = mem0_client.add(messages, user_id=DEFAULT_USER_ID)
-        
+        pattern = request.get("pattern")
+        if not file_path and not pattern:
+            raise HTTPException(status_code=400, detail="file_path or pattern is required")
+
+        user_id = request.get("user_id") or DEFAULT_USER_ID
+        scope = tenant_scope(user_id, request.get("agent_id"), request.get("run_id"))
+        infer = request.get("infer", True)
+
+        if pattern:
+            paths = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+            if not paths:
+                raise HTTPException(status_code=404, detail=f"No files match: {pattern}")
+        else:
+            if not os.path.exists(file_path):
+                raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+            if os.path.getsize(file_path) == 0:
+                raise HTTPException(status_code=400, detail="File is empty")
+            paths = [file_path]
+
+        if pattern or request.get("async_ingest"):
+            # One lane per file: files load in parallel, up to INGEST_WORKERS at a time
+            jobs = [
+                {
+                    "file_path": path,
+                    "job_id": ingest_queue.enqueue(
+                        user_id, {"file_path": path, "scope": scope, "infer": infer},
+                        kind="ingest_file", lane=f"{user_id}:file:{os.path.abspath(path)}"
+                    )
+                }
+                for path in paths
+            ]
+            return {
+                "success": True,
+                "message": f"Queued {len(jobs)} file(s) for loading",
+                "jobs": jobs,
+                "status": "queued"
+            }
+
+        result = await mem0_executor.run(ingest_file, mem0_client, file_path, scope, infer, manifest=ingest_manifest)
         return {
-            "success": True,
-            "message": f"Successfully loaded file: {file_path}",
+            "success": result["status"] in ("done", "unchanged"),
+            "message": f"Loaded file: {file_path} ({result['chunks_done']} new, {result['chunks_unchanged']} unchanged, "
+                       f"{result['chunks_retired']} removed chunks)",
             "file_path": file_path,
-            "content_length": len(content),
+            "content_length": result["bytes_read"],
             "result": result
         }
-        
+
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error loading file: {e}")
         raise HTTPException(status_code=500, detail=f"Error loading file: {e}")
 
 
+def run_multi_worker(workers: int, host: str, port: int):
+    """Run N uvicorn workers that share one embedding service process"""
+    from embedding_service import start_embedding_service
+
+    socket_path = os.getenv("EMBEDDING_SERVICE_SOCKET") or "/tmp/mem0-embedder.sock"
+    os.environ["EMBEDDING_SERVICE_SOCKET"] = socket_path
+
+    # Recover the ingest queue once here; workers share the queue file
+    recover_interrupted(os.getenv("INGEST_QUEUE_PATH", "ingest_queue.db"))
+    os.environ["INGEST_RECOVER_ON_START"] = "false"
+
+    # Search-cache invalidation is per process, so a write in one worker would
+    # leave stale results cached in the others
+    if os.environ.get("SEARCH_CACHE_ENABLED", "true").lower() != "false":
+        print("⚠️ Search result cache is disabled in multi-worker mode")
+    os.environ["SEARCH_CACHE_ENABLED"] = "false"
+    # Same for the in-memory BM25 index: other workers' writes would never reach it
+    if os.environ.get("HYBRID_SEARCH_ENABLED", "true").lower() != "false":
+        print("⚠️ Hybrid search is disabled in multi-worker mode")
+    os.environ["HYBRID_SEARCH_ENABLED"] = "false"
+    if os.environ.get("EMBED_CACHE_PATH"):
+        print("⚠️ EMBED_CACHE_PATH is ignored in multi-worker mode (workers would overwrite each other's file)")
+        os.environ["EMBED_CACHE_PATH"] = ""
+
+    service = start_embedding_service(socket_path)
+    try:
+        print(f"🚀 Starting {workers} HTTP workers on {host}:{port}")
+        uvicorn.run("http_server:app", host=host, port=port, workers=workers)
+    finally:
+        service.terminate()
+        service.join(timeout=5)
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        app,
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", "8050"))
-    )
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8050"))
+    workers = int(os.getenv("HTTP_WORKERS", "1"))
+    if workers > 1:
+        run_multi_worker(workers, host, port)
+    else:
+        uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,176 @@
+"""
+Ingest manifest
+---------------
+Content-addressed record of what file ingestion has already stored, so
+loading the same file again costs (almost) nothing:
+
+- Per file and tenant scope: size, mtime and a SHA-256 of the content. A
+  matching size and mtime skips the file without reading it; a matching hash
+  (touched but unchanged file) skips it after one read.
+- Per chunk: a SHA-256 of the chunk text and the ids of the memories it
+  produced. A changed file only sends chunks with new hashes through
+  extraction and embedding; memories of chunks that no longer occur are
+  deleted.
+
+Stored in SQLite next to the ingest queue, so several server processes can
+share it. `file_lock` serializes ingestion of one file per scope across
+threads and, through flock on `<manifest>.locks/`, across processes, so two
+loads of the same file cannot both treat its new chunks as unseen.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: threads of one process are still serialized
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scope_key(scope: Dict[str, str]) -> str:
+    return json.dumps({k: v for k, v in sorted(scope.items()) if v}, separators=(",", ":"))
+
+
+class IngestManifest:
+    """Per-file and per-chunk hashes of ingested files, keyed by tenant scope.
+
+    Configuration (environment variables):
+        INGEST_MANIFEST_PATH: SQLite file holding the manifest (default: ingest_manifest.db)
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("INGEST_MANIFEST_PATH", "ingest_manifest.db")
+        self.lock_dir = self.db_path + ".locks"
+        self._lock = threading.Lock()
+        self._file_locks: Dict[Tuple[str, str], list] = {}
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                scope TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                file_hash TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (scope, path)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                scope TEXT NOT NULL,
+                path TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                memory_ids TEXT NOT NULL,
+                PRIMARY KEY (scope, path, chunk_hash)
+            )
+        """)
+
+    @contextmanager
+    def file_lock(self, scope: Dict[str, str], path: str) -> Iterator[None]:
+        """Hold while reading, ingesting and recording one file, so concurrent loads of it run one at a time."""
+        key = (scope_key(scope), path)
+        with self._lock:
+            entry = self._file_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0], self._process_lock(key):
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._file_locks[key]
+
+    @contextmanager
+    def _process_lock(self, key: Tuple[str, str]) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.lock_dir, exist_ok=True)
+        name = hashlib.sha1("\0".join(key).encode("utf-8")).hexdigest()
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def file_record(self, scope: Dict[str, str], path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, file_hash, chunks FROM files WHERE scope = ? AND path = ?",
+                (scope_key(scope), path)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def file_signatures(self, scope: Dict[str, str]) -> Dict[str, Tuple[int, int]]:
+        """(size, mtime_ns) of every file recorded for the scope, for skipping unchanged files in bulk."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE scope = ?", (scope_key(scope),)
+            ).fetchall()
+        return {row["path"]: (row["size"], row["mtime_ns"]) for row in rows}
+
+    def chunk_memories(self, scope: Dict[str, str], path: str) -> Dict[str, List[str]]:
+        """Memory ids per known chunk hash of the file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_hash, memory_ids FROM chunks WHERE scope = ? AND path = ?",
+                (scope_key(scope), path)
+            ).fetchall()
+        return {row["chunk_hash"]: json.loads(row["memory_ids"]) for row in rows}
+
+    def record_chunk(self, scope: Dict[str, str], path: str, chunk_hash: str, memory_ids: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks (scope, path, chunk_hash, memory_ids) VALUES (?, ?, ?, ?)",
+                (scope_key(scope), path, chunk_hash, json.dumps(memory_ids))
+            )
+
+    def forget_chunks(self, scope: Dict[str, str], path: str, chunk_hashes: Iterable[str]):
+        key = scope_key(scope)
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE scope = ? AND path = ? AND chunk_hash = ?",
+                [(key, path, chunk_hash) for chunk_hash in chunk_hashes]
+            )
+
+    def record_file(self, scope: Dict[str, str], path: str, stat: os.stat_result, file_hash: str, chunks: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (scope, path, size, mtime_ns, file_hash, chunks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (scope_key(scope), path, stat.st_size, stat.st_mtime_ns, file_hash, chunks, time.time())
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"files": files, "chunks": chunks, "path": self.db_path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
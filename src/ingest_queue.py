@@ -0,0 +1,275 @@
+"""
+Write-behind ingestion queue
+----------------------------
+Durable SQLite-backed job queue for asynchronous `save_memory` calls.
+Jobs are persisted before the caller gets a job id back, drained by a pool of
+background worker threads, and processed strictly in order per lane: a lane's
+next job is only claimed once its previous job has finished. The lane is the
+user id for saves, so each user's writes stay ordered, while file ingestion
+jobs get one lane per file and load in parallel. Long jobs report progress
+into the job record. Claims happen inside a write transaction, so several
+server processes (multi-worker mode) can share one queue file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from file_ingest import ingest_file
+
+
+class JobIncomplete(Exception):
+    """Raised by a handler whose job finished with errors; the job keeps the handler's result.
+
+    `status` is "failed" (nothing was stored) or "partial" (some of the work was stored).
+    """
+
+    def __init__(self, status: str, result: Any, errors):
+        super().__init__("; ".join(str(error) for error in errors) or status)
+        self.status = status
+        self.result = result
+
+
+class IngestQueue:
+    """Durable per-lane FIFO job queue with a background worker pool.
+
+    Configuration (environment variables):
+        INGEST_QUEUE_PATH: SQLite file holding the queue (default: ingest_queue.db)
+        INGEST_WORKERS: number of background worker threads (default: 2)
+        INGEST_RECOVER_ON_START: re-queue jobs left running by a crash (default: true);
+            multi-worker mode recovers once in the parent and disables it in workers
+    """
+
+    def __init__(self,
+                 handler: Callable[[Dict[str, Any]], Any],
+                 db_path: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 recover: Optional[bool] = None):
+        self.handler = handler
+        self.db_path = db_path or os.getenv("INGEST_QUEUE_PATH", "ingest_queue.db")
+        self.num_workers = workers or int(os.getenv("INGEST_WORKERS", "2"))
+        if recover is None:
+            recover = os.getenv("INGEST_RECOVER_ON_START", "true").lower() != "false"
+
+        self._conn = _connect(self.db_path)
+        if recover:
+            recover_interrupted(self._conn)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._workers = []
+
+    def start(self):
+        """Start the background workers."""
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"ingest-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        print(f"✅ Ingest queue started with {self.num_workers} workers ({self.db_path})")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers; unfinished jobs stay queued for the next start."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+
+    def enqueue(self, user_id: str, payload: Dict[str, Any], kind: str = "add", lane: Optional[str] = None) -> str:
+        """Persist a job and return its id. Jobs sharing a lane (default: the user id) run one at a time."""
+        job_id = str(uuid.uuid4())
+        with self._wakeup:
+            self._conn.execute(
+                "INSERT INTO jobs (id, user_id, lane, kind, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, user_id, lane or user_id, kind, json.dumps(payload), time.time())
+            )
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job's status record, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "user_id": row["user_id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": json.loads(row["progress"]) if row["progress"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {row["status"]: row["n"] for row in rows}
+        return {
+            "workers": self.num_workers,
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "partial": counts.get("partial", 0),
+            "failed": counts.get("failed", 0)
+        }
+
+    def _report(self, job_id: str, progress: Dict[str, Any]):
+        """Store a running job's latest progress record."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress, default=str), job_id))
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Claim the oldest queued job whose lane has nothing in flight. Caller holds the lock."""
+        # BEGIN IMMEDIATE takes the write lock up front, so no other process can
+        # claim between the SELECT and the UPDATE
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' "
+                "AND lane NOT IN (SELECT lane FROM jobs WHERE status = 'running') "
+                "ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (time.time(), row["id"])
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _worker_loop(self):
+        while True:
+            with self._wakeup:
+                row = None
+                while not self._stopping:
+                    row = self._claim()
+                    if row is not None:
+                        break
+                    self._wakeup.wait(timeout=1.0)
+                if self._stopping:
+                    if row is not None:
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE id = ?", (row["id"],)
+                        )
+                    return
+
+            job = {
+                "job_id": row["id"],
+                "user_id": row["user_id"],
+                "kind": row["kind"],
+                "payload": json.loads(row["payload"]),
+                "report": partial(self._report, row["id"])
+            }
+            try:
+                result = self.handler(job)
+                status, result_json, error = "done", json.dumps(result, default=str), None
+            except JobIncomplete as e:
+                print(f"❌ Ingest job {job['job_id']} {e.status}: {e}")
+                status, result_json, error = e.status, json.dumps(e.result, default=str), str(e)
+            except Exception as e:
+                print(f"❌ Ingest job {job['job_id']} failed: {e}")
+                status, result_json, error = "failed", None, str(e)
+
+            with self._wakeup:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, result_json, error, time.time(), job["job_id"])
+                )
+                # The lane's next job may now be claimable
+                self._wakeup.notify_all()
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open the queue database, creating the schema if needed."""
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT UNIQUE NOT NULL,
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """)
+    # Columns added after the first release; queue files created before them are migrated in place
+    for column in ("lane TEXT", "progress TEXT"):
+        try:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass  # already present
+    conn.execute("UPDATE jobs SET lane = user_id WHERE lane IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_seq ON jobs (status, seq)")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_lane ON jobs (status, lane)")
+    return conn
+
+
+def recover_interrupted(conn_or_path) -> int:
+    """Re-queue jobs left running by a crash. Accepts a connection or a database path."""
+    conn = _connect(conn_or_path) if isinstance(conn_or_path, str) else conn_or_path
+    recovered = conn.execute(
+        "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+    ).rowcount
+    if recovered:
+        print(f"🔄 Re-queued {recovered} interrupted ingest jobs")
+    if isinstance(conn_or_path, str):
+        conn.close()
+    return recovered
+
+
+def make_mem0_handler(mem0_client, manifest=None, directory_sync=None) -> Callable[[Dict[str, Any]], Any]:
+    """Build the job handler that applies queued jobs to a Mem0 client.
+
+    File ingestion jobs skip content already recorded in `manifest` (an IngestManifest), if given;
+    directory sync jobs need `directory_sync` (a DirectorySync).
+    """
+    def handle(job: Dict[str, Any]) -> Any:
+        payload = job["payload"]
+        if job["kind"] == "add":
+            scope = payload.get("scope") or {"user_id": job["user_id"]}
+            return mem0_client.add(payload["messages"], **scope)
+        if job["kind"] == "ingest_file":
+            scope = payload.get("scope") or {"user_id": job["user_id"]}
+            result = ingest_file(mem0_client, payload["file_path"], scope, infer=payload.get("infer", True),
+                                 progress=job["report"], manifest=manifest)
+            if result["status"] in ("failed", "partial"):
+                raise JobIncomplete(result["status"], result, result["errors"])
+            return result
+        if job["kind"] == "sync_directory" and directory_sync is not None:
+            scope = payload.get("scope") or {"user_id": job["user_id"]}
+            report = directory_sync.sync(payload["directory"], scope, payload.get("include"),
+                                         payload.get("recursive", True), payload.get("infer", True),
+                                         progress=job["report"])
+            if report["files_failed"]:
+                loaded = report["files_changed"] + report["files_unchanged"]
+                raise JobIncomplete("partial" if loaded else "failed", report, report["errors"])
+            return report
+        raise ValueError(f"Unknown ingest job kind: {job['kind']}")
+    return handle
@@ -0,0 +1,314 @@
+"""
+Hybrid lexical + vector search
+------------------------------
+Semantic search alone ranks exact names and identifiers ("Whiskers",
+"ERR_4012") poorly: the embedding of a rare token says little about it.
+`LexicalIndex` is an in-memory BM25 inverted index over memory text, and
+`hybrid_search` fuses its ranking with Mem0's vector ranking by weighted
+reciprocal rank fusion:
+
+    score(memory) = vector_weight / (k + vector_rank) + lexical_weight / (k + lexical_rank)
+
+The index is kept current by `LexicalIndexedStore`, which wraps the vector
+store and re-indexes every insert, update and delete Mem0 makes, and is
+filled from the existing rows once at startup. Postings are partitioned by
+user_id, so a query only touches the posting lists of its own tenant's terms
+instead of scanning every memory.
+
+The index is per process; like the search result cache it is disabled in
+multi-worker mode, where writes made by other workers would be missed.
+`save` / `load` persist it as JSON (per-memory term counts; postings are
+rebuilt on load), which the file-based simple client uses to keep its index
+next to its memory log.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from ann_index import vector_search
+from pagination import fetch_page, format_memory
+
+# Words joined by - _ . : / (error codes, file names, versions) are indexed whole and by part
+TOKEN_RE = re.compile(r"\w+(?:[-.:/]\w+)*")
+PART_SPLIT_RE = re.compile(r"[-_.:/]")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or our that the "
+    "their them they this to was we were what when where which who will with you your".split()
+)
+SEARCH_MODES = ("vector", "hybrid")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group(0)
+        if token not in STOPWORDS:
+            tokens.append(token)
+        parts = [part for part in PART_SPLIT_RE.split(token) if part]
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in STOPWORDS)
+    return tokens
+
+
+class _Partition:
+    """Posting lists and length statistics for one user's memories."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+
+class LexicalIndex:
+    """Incrementally maintained BM25 index over memory text, partitioned by user_id.
+
+    Configuration (environment variables):
+        BM25_K1: term frequency saturation (default: 1.2)
+        BM25_B: document length normalisation (default: 0.75)
+    """
+
+    def __init__(self, k1: Optional[float] = None, b: Optional[float] = None):
+        self.k1 = k1 if k1 is not None else float(os.getenv("BM25_K1", "1.2"))
+        self.b = b if b is not None else float(os.getenv("BM25_B", "0.75"))
+        self._partitions: Dict[Optional[str], _Partition] = {}
+        # memory id -> (user_id, agent_id/run_id scope, term counts)
+        self._docs: Dict[str, Tuple[Optional[str], Dict[str, Any], Counter]] = {}
+        self._lock = threading.Lock()
+        self.searches = 0
+        self._search_seconds = 0.0
+        self.bootstrap_seconds: Optional[float] = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, memory_id: str, payload: Optional[dict]):
+        """Index (or re-index) a memory from its stored payload."""
+        payload = payload or {}
+        memory_id = str(memory_id)
+        terms = Counter(tokenize(payload.get("data") or ""))
+        user_id = payload.get("user_id")
+        scope = {key: payload[key] for key in ("agent_id", "run_id") if key in payload}
+        with self._lock:
+            self._remove_locked(memory_id)
+            self._add_terms_locked(memory_id, user_id, scope, terms)
+
+    def remove(self, memory_id: str):
+        with self._lock:
+            self._remove_locked(str(memory_id))
+
+    def _remove_locked(self, memory_id: str):
+        doc = self._docs.pop(memory_id, None)
+        if doc is None:
+            return
+        user_id, _, terms = doc
+        partition = self._partitions[user_id]
+        for term in terms:
+            posting = partition.postings.get(term)
+            if posting is not None:
+                posting.pop(memory_id, None)
+                if not posting:
+                    del partition.postings[term]
+        partition.total_length -= partition.lengths.pop(memory_id, 0)
+        if not partition.lengths:
+            del self._partitions[user_id]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._docs)
+
+    def _add_terms_locked(self, memory_id: str, user_id: Optional[str], scope: Dict[str, Any], terms: Counter):
+        partition = self._partitions.setdefault(user_id, _Partition())
+        for term, count in terms.items():
+            partition.postings.setdefault(term, {})[memory_id] = count
+        length = sum(terms.values())
+        partition.lengths[memory_id] = length
+        partition.total_length += length
+        self._docs[memory_id] = (user_id, scope, terms)
+
+    def save(self, path: str):
+        """Write the index to path atomically."""
+        with self._lock:
+            docs = {memory_id: [user_id, scope, dict(terms)] for memory_id, (user_id, scope, terms) in self._docs.items()}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": docs}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Replace the index contents with the ones saved at path; returns the document count."""
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        with self._lock:
+            self._partitions.clear()
+            self._docs.clear()
+            for memory_id, (user_id, scope, terms) in saved["docs"].items():
+                self._add_terms_locked(memory_id, user_id, scope, Counter(terms))
+            return len(self._docs)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+            self._docs.clear()
+
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """Top `limit` (memory id, BM25 score) pairs among memories matching filters."""
+        started = time.perf_counter()
+        filters = filters or {}
+        terms = set(tokenize(query))
+        extra = {key: value for key, value in filters.items() if key != "user_id"}
+        scores: Dict[str, float] = {}
+        with self._lock:
+            if "user_id" in filters:
+                partitions = [self._partitions.get(filters["user_id"])]
+            else:
+                partitions = list(self._partitions.values())
+            for partition in partitions:
+                if partition is None or not partition.lengths:
+                    continue
+                count = len(partition.lengths)
+                avg_length = partition.total_length / count or 1.0
+                for term in terms:
+                    posting = partition.postings.get(term)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for memory_id, tf in posting.items():
+                        if extra and any(self._docs[memory_id][1].get(k) != v for k, v in extra.items()):
+                            continue
+                        norm = self.k1 * (1 - self.b + self.b * partition.lengths[memory_id] / avg_length)
+                        scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            self.searches += 1
+            self._search_seconds += time.perf_counter() - started
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def bootstrap(self, mem0_client, page_size: int = 1000) -> int:
+        """Index every stored memory, paging through the vector store."""
+        started = time.perf_counter()
+        cursor, indexed = None, 0
+        while True:
+            items, cursor = fetch_page(mem0_client, {}, cursor, page_size)
+            for item in items:
+                payload = {key: item[key] for key in ("user_id", "agent_id", "run_id") if key in item}
+                payload["data"] = item.get("memory")
+                self.add(item["id"], payload)
+            indexed += len(items)
+            if not cursor:
+                break
+        self.bootstrap_seconds = time.perf_counter() - started
+        return indexed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "users": len(self._partitions),
+                "terms": sum(len(p.postings) for p in self._partitions.values()),
+                "searches": self.searches,
+                "avg_search_ms": round(self._search_seconds / self.searches * 1000, 3) if self.searches else 0.0,
+                "bootstrap_seconds": round(self.bootstrap_seconds, 3) if self.bootstrap_seconds is not None else None
+            }
+
+
+class LexicalIndexedStore:
+    """Wraps a Mem0 vector store and mirrors every write into a LexicalIndex."""
+
+    def __init__(self, vector_store, index: LexicalIndex):
+        self._store = vector_store
+        self.index = index
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def insert(self, vectors, payloads=None, ids=None):
+        result = self._store.insert(vectors=vectors, payloads=payloads, ids=ids)
+        for memory_id, payload in zip(ids or [], payloads or []):
+            self.index.add(memory_id, payload)
+        return result
+
+    def update(self, vector_id, vector=None, payload=None):
+        result = self._store.update(vector_id=vector_id, vector=vector, payload=payload)
+        if payload is not None:
+            self.index.add(vector_id, payload)
+        return result
+
+    def delete(self, vector_id):
+        result = self._store.delete(vector_id=vector_id)
+        self.index.remove(vector_id)
+        return result
+
+    def delete_col(self):
+        result = self._store.delete_col()
+        self.index.clear()
+        return result
+
+
+def install_lexical_index(mem0_client) -> Optional[LexicalIndex]:
+    """Mirror writes into a BM25 index and fill it from the stored memories, unless disabled."""
+    if os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "false":
+        return None
+    index = LexicalIndex()
+    mem0_client.vector_store = LexicalIndexedStore(mem0_client.vector_store, index)
+    try:
+        indexed = index.bootstrap(mem0_client)
+        print(f"✅ Lexical index ready ({indexed} memories in {index.bootstrap_seconds:.2f}s)")
+    except Exception as e:
+        # New writes are still indexed; older memories only match by vector
+        print(f"⚠️ Could not load existing memories into the lexical index: {e}")
+    return index
+
+
+def default_search_mode() -> str:
+    return os.getenv("SEARCH_MODE", "vector").lower()
+
+
+def hybrid_search(mem0_client, index: Optional[LexicalIndex], query: str, scope: Dict[str, Any], limit: int = 3,
+                  vector_weight: float = 1.0, lexical_weight: float = 1.0) -> Dict[str, List[Dict[str, Any]]]:
+    """Vector and BM25 rankings fused by weighted reciprocal rank fusion, in Mem0's result shape.
+
+    Configuration (environment variables):
+        HYBRID_RRF_K: rank offset k; larger values flatten the gap between top ranks (default: 60)
+        HYBRID_CANDIDATES: results taken from each ranking before fusion (default: max(4 * limit, 20))
+    """
+    if index is None:
+        raise ValueError("Hybrid search is disabled (HYBRID_SEARCH_ENABLED=false or multi-worker mode)")
+    if vector_weight < 0 or lexical_weight < 0 or vector_weight + lexical_weight == 0:
+        raise ValueError("vector_weight and lexical_weight must be non-negative and not both zero")
+    rrf_k = float(os.getenv("HYBRID_RRF_K", "60"))
+    candidates = int(os.getenv("HYBRID_CANDIDATES", "0")) or max(4 * limit, 20)
+
+    vector_hits: List[Dict[str, Any]] = []
+    if vector_weight > 0:
+        results = vector_search(mem0_client, query, scope, candidates)
+        vector_hits = results.get("results", []) if isinstance(results, dict) else results
+    lexical_hits = index.search(query, scope, candidates) if lexical_weight > 0 else []
+
+    fused: Dict[str, float] = {}
+    for rank, hit in enumerate(vector_hits, start=1):
+        fused[hit["id"]] = fused.get(hit["id"], 0.0) + vector_weight / (rrf_k + rank)
+    for rank, (memory_id, _) in enumerate(lexical_hits, start=1):
+        fused[memory_id] = fused.get(memory_id, 0.0) + lexical_weight / (rrf_k + rank)
+
+    by_id = {hit["id"]: hit for hit in vector_hits}
+    lexical_scores = dict(lexical_hits)
+    results = []
+    for memory_id, score in heapq.nlargest(limit, fused.items(), key=lambda item: item[1]):
+        item = by_id.get(memory_id)
+        if item is None:
+            # Found only by the lexical index: load the row it points at
+            stored = mem0_client.vector_store.get(vector_id=memory_id)
+            if stored is None:
+                continue
+            item = format_memory(memory_id, stored.payload or {})
+        item = dict(item)
+        item["fused_score"] = round(score, 6)
+        if memory_id in lexical_scores:
+            item["bm25_score"] = round(lexical_scores[memory_id], 4)
+        results.append(item)
+    return {"results": results}
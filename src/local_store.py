@@ -0,0 +1,586 @@
+"""
+Embedded local vector store
+---------------------------
+Mem0 vector store for single-node and edge deployments that keeps everything
+on local disk, so the server starts without Postgres and a search never leaves
+the process.
+
+- Vectors live in `<collection>.f32`, a float32 array the store memory-maps
+  (one row per slot, grown by doubling). They are L2-normalised on write, so
+  cosine similarity is a plain dot product.
+- Ids and payloads (one entry per slot, null for free slots) live in the
+  `<collection>.json` snapshot plus the `<collection>.log` journal: every
+  write appends one JSON line per changed slot, so a write costs the size of
+  the change, not of the collection. Once the journal holds as many entries
+  as the collection has rows (and at least LOCAL_STORE_COMPACT_MIN_ENTRIES),
+  it is folded into a new snapshot, written atomically. Snapshot plus journal
+  are the source of truth for which slots are live; a torn last line from a
+  crash is ignored on load.
+- Search is a brute-force NumPy matrix-vector product over the slots that
+  pass the filters, followed by argpartition for the top k. Mem0's session
+  keys (user_id, agent_id, run_id) are indexed, so a per-user search only
+  touches that user's rows.
+- With LOCAL_STORE_HNSW=true (needs `pip install hnswlib`) an in-memory HNSW
+  graph answers searches whose candidate set is at least
+  LOCAL_STORE_HNSW_MIN_ROWS rows; smaller sets stay exact. The graph is
+  rebuilt from the vector file on startup.
+- LOCAL_STORE_QUANTIZATION=int8 or pq keeps compact codes (see
+  quantization.py) in memory and scans those instead of the float32 file;
+  the best `limit * LOCAL_STORE_RERANK_FACTOR` rows are then re-ranked with
+  the full-precision vectors, which are only read for that shortlist. Codes
+  are re-encoded from the vector file on startup; pq trains its codebooks
+  once the collection has LOCAL_STORE_PQ_TRAIN_ROWS rows and searches stay
+  exact until then.
+
+Scores are cosine distances (lower is closer), like the pgvector stores.
+Select it with VECTOR_STORE=local.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ann_index import current_search_params
+from quantization import SCORE_BLOCK_ROWS, ProductQuantizer, make_quantizer
+
+# Payload keys Mem0 filters on; equality lookups on these use a posting index
+INDEXED_KEYS = ("user_id", "agent_id", "run_id")
+
+
+@dataclass
+class OutputData:
+    """Result row in the shape Mem0 expects from a vector store."""
+    id: Optional[str]
+    score: Optional[float]
+    payload: Optional[dict]
+
+
+def _normalize(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorStore:
+    """Mem0 vector store on a memory-mapped float32 file with a JSON metadata snapshot and journal.
+
+    Configuration (environment variables):
+        LOCAL_STORE_PATH: directory holding the vector and metadata files (default: local_store)
+        LOCAL_STORE_HNSW: build an HNSW graph with hnswlib for large searches (default: false)
+        LOCAL_STORE_HNSW_MIN_ROWS: candidate rows below which search stays brute force (default: 10000)
+        LOCAL_STORE_HNSW_M / LOCAL_STORE_HNSW_EF_CONSTRUCTION: graph build parameters (default: 16 / 100)
+        LOCAL_STORE_HNSW_EF_SEARCH: default ef for HNSW queries (default: 64)
+        LOCAL_STORE_QUANTIZATION: none, int8 or pq (default: none)
+        LOCAL_STORE_RERANK_FACTOR: quantized candidates re-ranked per requested result (default: 4)
+        LOCAL_STORE_PQ_SUBVECTORS: pq bytes per row; must divide the dimension (default: 48)
+        LOCAL_STORE_PQ_TRAIN_ROWS: rows needed (and sampled) to train pq codebooks (default: 1024)
+        LOCAL_STORE_COMPACT_MIN_ENTRIES: journal entries before it may be folded into the snapshot (default: 10000)
+    """
+
+    def __init__(self, collection_name: str = "mem0", embedding_model_dims: int = 384,
+                 path: Optional[str] = None, hnsw: Optional[bool] = None,
+                 quantization: Optional[str] = None):
+        self.collection_name = collection_name
+        self.embedding_model_dims = embedding_model_dims
+        self.path = path or os.getenv("LOCAL_STORE_PATH", "local_store")
+        if hnsw is None:
+            hnsw = os.getenv("LOCAL_STORE_HNSW", "false").lower() == "true"
+        self.hnsw_min_rows = int(os.getenv("LOCAL_STORE_HNSW_MIN_ROWS", "10000"))
+        self.hnsw_m = int(os.getenv("LOCAL_STORE_HNSW_M", "16"))
+        self.hnsw_ef_construction = int(os.getenv("LOCAL_STORE_HNSW_EF_CONSTRUCTION", "100"))
+        self.hnsw_ef_search = int(os.getenv("LOCAL_STORE_HNSW_EF_SEARCH", "64"))
+        self.quantization = (quantization or os.getenv("LOCAL_STORE_QUANTIZATION", "none")).lower()
+        self.rerank_factor = max(1, int(os.getenv("LOCAL_STORE_RERANK_FACTOR", "4")))
+        self.pq_subvectors = int(os.getenv("LOCAL_STORE_PQ_SUBVECTORS", "48"))
+        self.pq_train_rows = max(ProductQuantizer.centroids, int(os.getenv("LOCAL_STORE_PQ_TRAIN_ROWS", "1024")))
+        self.compact_min_entries = int(os.getenv("LOCAL_STORE_COMPACT_MIN_ENTRIES", "10000"))
+
+        self._lock = threading.RLock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+        self._hnsw = None
+        self._hnsw_requested = hnsw
+        self._log = None
+        self._compactions = 0
+
+        self.create_col(embedding_model_dims)
+        print(f"✅ Local vector store ready ({len(self._slot_of)} vectors in {self.vectors_path}, "
+              f"{'HNSW' if self._hnsw is not None else 'brute force'}, quantization {self.quantization})")
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.f32")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.json")
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.path, f"{self.collection_name}.log")
+
+    def _record(self, op: str, started: float):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._ops.setdefault(op, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+
+    # -- Storage ----------------------------------------------------------
+
+    def _load(self):
+        """Open the vector file and rebuild the in-memory indexes from the snapshot and journal."""
+        self._ids: List[Optional[str]] = []
+        self._payloads: List[Optional[dict]] = []
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["dims"] != self.embedding_model_dims:
+                raise ValueError(f"{self.meta_path} holds {meta['dims']}-dim vectors, "
+                                 f"expected {self.embedding_model_dims}")
+            self._ids = meta["ids"]
+            self._payloads = meta["payloads"]
+        replayed = self._replay_log()
+
+        capacity = max(1024, len(self._ids))
+        if os.path.exists(self.vectors_path):
+            capacity = max(capacity, os.path.getsize(self.vectors_path) // (4 * self.embedding_model_dims))
+        self._open_vectors(capacity)
+
+        self._slot_of: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._postings: Dict[Tuple[str, str], Set[int]] = {}
+        for slot, memory_id in enumerate(self._ids):
+            if memory_id is None:
+                self._free.append(slot)
+            else:
+                self._slot_of[memory_id] = slot
+                self._index_payload(slot, self._payloads[slot])
+        self._sorted_ids = sorted(self._slot_of)
+        self._quantizer = make_quantizer(self.quantization, self.embedding_model_dims, self.pq_subvectors)
+        self._encode_all()
+        self._build_hnsw()
+        if replayed or not os.path.exists(self.meta_path):
+            self._compact()
+        else:
+            self._open_log()
+
+    def _replay_log(self) -> int:
+        """Apply journal entries written since the snapshot; returns how many were applied."""
+        if not os.path.exists(self.log_path):
+            return 0
+        applied = 0
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn write at the end of the journal
+                slot = entry["slot"]
+                if slot >= len(self._ids):
+                    grow = slot + 1 - len(self._ids)
+                    self._ids.extend([None] * grow)
+                    self._payloads.extend([None] * grow)
+                self._ids[slot] = entry["id"]
+                self._payloads[slot] = entry["payload"]
+                applied += 1
+        return applied
+
+    def _open_log(self):
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log_entries = 0
+
+    def _open_vectors(self, capacity: int):
+        nbytes = capacity * self.embedding_model_dims * 4
+        with open(self.vectors_path, "ab") as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+        self._capacity = capacity
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(capacity, self.embedding_model_dims))
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        self._vectors.flush()
+        del self._vectors
+        self._open_vectors(capacity)
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+        if self._codes is not None:
+            codes = np.zeros((capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+            codes[:len(self._codes)] = self._codes
+            scales = np.zeros(capacity, dtype=np.float32)
+            scales[:len(self._scales)] = self._scales
+            self._codes, self._scales = codes, scales
+
+    def _persist(self, slots: List[int]):
+        """Flush vectors, then journal the changed slots that mark them live (or free)."""
+        self._vectors.flush()
+        self._log.write("".join(
+            json.dumps({"slot": slot, "id": self._ids[slot], "payload": self._payloads[slot]}) + "\n"
+            for slot in slots
+        ))
+        self._log.flush()
+        self._log_entries += len(slots)
+        if self._log_entries >= max(self.compact_min_entries, len(self._slot_of)):
+            self._compact()
+
+    def _compact(self):
+        """Atomically replace the snapshot with the current state and start an empty journal."""
+        self._vectors.flush()
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dims": self.embedding_model_dims, "ids": self._ids, "payloads": self._payloads}, f)
+        os.replace(tmp_path, self.meta_path)
+        # A crash before the truncate only replays entries the snapshot already holds
+        open(self.log_path, "w").close()
+        self._open_log()
+        self._compactions += 1
+
+    def _build_hnsw(self):
+        self._hnsw = None
+        if not self._hnsw_requested:
+            return
+        try:
+            import hnswlib
+        except ImportError:
+            print("⚠️ LOCAL_STORE_HNSW needs hnswlib (pip install hnswlib); using brute-force search")
+            return
+        index = hnswlib.Index(space="ip", dim=self.embedding_model_dims)
+        index.init_index(max_elements=self._capacity, M=self.hnsw_m,
+                         ef_construction=self.hnsw_ef_construction)
+        slots = self._live_slots()
+        if len(slots):
+            index.add_items(self._vectors[slots], slots)
+        self._hnsw = index
+
+    def _live_slots(self) -> np.ndarray:
+        return np.fromiter(self._slot_of.values(), dtype=np.int64, count=len(self._slot_of))
+
+    def _encode_all(self):
+        """(Re)build the quantized codes for every live row, training pq first if needed."""
+        self._codes = self._scales = None
+        quantizer = self._quantizer
+        if quantizer is None:
+            return
+        if not quantizer.trained:
+            if len(self._slot_of) < self.pq_train_rows:
+                return
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(self._live_slots(), self.pq_train_rows, replace=False))
+            started = time.perf_counter()
+            quantizer.train(np.asarray(self._vectors[sample]))
+            print(f"✅ Trained pq codebooks on {len(sample)} rows in {time.perf_counter() - started:.1f}s")
+
+        codes = np.zeros((self._capacity, quantizer.code_width), dtype=quantizer.dtype)
+        scales = np.zeros(self._capacity, dtype=np.float32)
+        slots = np.sort(self._live_slots())
+        for start in range(0, len(slots), SCORE_BLOCK_ROWS):
+            block = slots[start:start + SCORE_BLOCK_ROWS]
+            codes[block], scales[block] = quantizer.encode(np.asarray(self._vectors[block]))
+        self._codes, self._scales = codes, scales
+
+    # -- Payload indexes --------------------------------------------------
+
+    @staticmethod
+    def _posting_key(key: str, value: Any) -> Tuple[str, str]:
+        return key, json.dumps(value, sort_keys=True)
+
+    def _index_payload(self, slot: int, payload: Optional[dict]):
+        for key in INDEXED_KEYS:
+            if payload and key in payload:
+                self._postings.setdefault(self._posting_key(key, payload[key]), set()).add(slot)
+
+    def _unindex_payload(self, slot: int, payload: Optional[dict]):
+        for key in INDEXED_KEYS:
+            if payload and key in payload:
+                posting = self._postings.get(self._posting_key(key, payload[key]))
+                if posting is not None:
+                    posting.discard(slot)
+                    if not posting:
+                        del self._postings[self._posting_key(key, payload[key])]
+
+    def _candidates(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Slots matching filters, or None for every live slot."""
+        if not filters:
+            return None
+        indexed = [self._postings.get(self._posting_key(key, filters[key]), set())
+                   for key in INDEXED_KEYS if key in filters]
+        if indexed:
+            slots = set.intersection(*indexed) if len(indexed) > 1 else set(indexed[0])
+        else:
+            slots = set(self._slot_of.values())
+        rest = {key: value for key, value in filters.items() if key not in INDEXED_KEYS}
+        if rest:
+            slots = {slot for slot in slots
+                     if all(self._payloads[slot].get(key) == value for key, value in rest.items())}
+        return np.fromiter(sorted(slots), dtype=np.int64, count=len(slots))
+
+    # -- Writes -----------------------------------------------------------
+
+    def _put(self, memory_id: str, vector: np.ndarray, payload: dict,
+             code: Optional[Tuple[np.ndarray, float]] = None):
+        slot = self._slot_of.get(memory_id)
+        if slot is not None:
+            self._unindex_payload(slot, self._payloads[slot])
+        elif self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self._ids)
+            self._grow(slot + 1)
+            self._ids.append(None)
+            self._payloads.append(None)
+
+        self._vectors[slot] = vector
+        if self._ids[slot] is None:
+            bisect.insort(self._sorted_ids, memory_id)
+        self._ids[slot] = memory_id
+        self._payloads[slot] = payload
+        self._slot_of[memory_id] = slot
+        self._index_payload(slot, payload)
+        if self._codes is not None:
+            if code is None:
+                codes, scales = self._quantizer.encode(vector[None, :])
+                code = codes[0], scales[0]
+            self._codes[slot], self._scales[slot] = code
+        if self._hnsw is not None:
+            # Slots are labels: re-adding a freed or existing slot un-deletes and overwrites it
+            self._hnsw.add_items(vector[None, :], [slot])
+        return slot
+
+    # -- Mem0 vector store interface --------------------------------------
+
+    def create_col(self, embedding_model_dims: Optional[int] = None):
+        """Open (or create) the collection's files and load its indexes."""
+        self.embedding_model_dims = embedding_model_dims or self.embedding_model_dims
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            self._load()
+
+    def insert(self, vectors: List[List[float]], payloads: Optional[List[dict]] = None,
+               ids: Optional[List[str]] = None):
+        started = time.perf_counter()
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in vectors]
+        if not payloads:
+            payloads = [{} for _ in vectors]
+        matrix = _normalize(vectors)
+        with self._lock:
+            codes = self._quantizer.encode(matrix) if self._codes is not None else None
+            slots = [self._put(str(memory_id), vector, payload, (codes[0][i], codes[1][i]) if codes else None)
+                     for i, (memory_id, vector, payload) in enumerate(zip(ids, matrix, payloads))]
+            if self._quantizer is not None and self._codes is None:
+                # pq: train once the collection is large enough
+                self._encode_all()
+            self._persist(slots)
+        self._record("insert", started)
+
+    def search(self, query: str, vectors: List[float], limit: int = 5, filters: Optional[dict] = None,
+               ef_search: Optional[int] = None) -> List[OutputData]:
+        """Nearest neighbours by cosine distance among the rows matching filters.
+
+        ef_search (or a per-request override from ann_index.with_search_params)
+        sizes the HNSW candidate list; exact searches ignore it.
+        """
+        started = time.perf_counter()
+        if ef_search is None:
+            ef_search = current_search_params().get("ef_search")
+        query_vector = _normalize(vectors)[0]
+        with self._lock:
+            slots = self._candidates(filters)
+            total = len(self._slot_of) if slots is None else len(slots)
+            if total == 0 or limit <= 0:
+                hits = []
+            elif self._hnsw is not None and total >= self.hnsw_min_rows:
+                hits = self._search_hnsw(query_vector, slots, min(limit, total), ef_search)
+            elif self._codes is not None:
+                hits = self._search_quantized(query_vector, slots, limit)
+            else:
+                hits = self._search_exact(query_vector, slots, limit)
+            results = [OutputData(id=self._ids[slot], score=1.0 - similarity, payload=self._payloads[slot])
+                       for slot, similarity in hits]
+        self._record("search", started)
+        return results
+
+    def _scan(self, score, slots: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the given slots, or every slot in place (no gather copy) with free ones masked out."""
+        if slots is not None:
+            return slots, score(slots)
+        used = len(self._ids)
+        similarities = score(slice(0, used))
+        if self._free:
+            similarities[self._free] = -np.inf
+        return np.arange(used), similarities
+
+    @staticmethod
+    def _top(slots: np.ndarray, similarities: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        if limit < len(slots):
+            top = np.argpartition(-similarities, limit - 1)[:limit]
+        else:
+            top = np.arange(len(slots))
+        top = top[np.argsort(-similarities[top])]
+        top = top[np.isfinite(similarities[top])]
+        return slots[top], similarities[top]
+
+    def _search_exact(self, query_vector: np.ndarray, slots: Optional[np.ndarray], limit: int):
+        slots, similarities = self._scan(lambda rows: self._vectors[rows] @ query_vector, slots)
+        slots, similarities = self._top(slots, similarities, limit)
+        return [(int(slot), float(similarity)) for slot, similarity in zip(slots, similarities)]
+
+    def _search_quantized(self, query_vector: np.ndarray, slots: Optional[np.ndarray], limit: int):
+        """Shortlist from the codes, then re-rank the shortlist with the float32 vectors."""
+        slots, approx = self._scan(
+            lambda rows: self._quantizer.similarities(self._codes[rows], self._scales[rows], query_vector), slots)
+        shortlist, _ = self._top(slots, approx, limit * self.rerank_factor)
+        return self._search_exact(query_vector, np.sort(shortlist), limit)
+
+    def _search_hnsw(self, query_vector: np.ndarray, slots: Optional[np.ndarray], limit: int,
+                     ef_search: Optional[int]):
+        self._hnsw.set_ef(max(ef_search or self.hnsw_ef_search, limit))
+        if slots is None:
+            labels, distances = self._hnsw.knn_query(query_vector, k=limit)
+        else:
+            allowed = set(slots.tolist())
+            labels, distances = self._hnsw.knn_query(query_vector, k=limit, filter=lambda label: label in allowed)
+        # hnswlib's "ip" distance is 1 - dot product
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
+
+    def delete(self, vector_id: str):
+        started = time.perf_counter()
+        with self._lock:
+            slot = self._slot_of.pop(str(vector_id), None)
+            if slot is not None:
+                self._unindex_payload(slot, self._payloads[slot])
+                del self._sorted_ids[bisect.bisect_left(self._sorted_ids, str(vector_id))]
+                self._ids[slot] = None
+                self._payloads[slot] = None
+                self._free.append(slot)
+                if self._hnsw is not None:
+                    self._hnsw.mark_deleted(slot)
+                self._persist([slot])
+        self._record("delete", started)
+
+    def update(self, vector_id: str, vector: Optional[List[float]] = None, payload: Optional[dict] = None):
+        started = time.perf_counter()
+        with self._lock:
+            slot = self._slot_of.get(str(vector_id))
+            if slot is not None:
+                new_vector = _normalize(vector)[0] if vector is not None else np.array(self._vectors[slot])
+                new_payload = payload if payload is not None else self._payloads[slot]
+                self._persist([self._put(str(vector_id), new_vector, new_payload)])
+        self._record("update", started)
+
+    def get(self, vector_id: str) -> Optional[OutputData]:
+        with self._lock:
+            slot = self._slot_of.get(str(vector_id))
+            if slot is None:
+                return None
+            return OutputData(id=self._ids[slot], score=None, payload=self._payloads[slot])
+
+    def list_cols(self) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(self.path) if name.endswith(".json"))
+
+    def delete_col(self):
+        with self._lock:
+            del self._vectors
+            self._log.close()
+            self._log = None
+            for file_path in (self.vectors_path, self.meta_path, self.log_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            self._load()
+
+    def col_info(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.collection_name,
+                "count": len(self._slot_of),
+                "dimension": self.embedding_model_dims,
+                "capacity": self._capacity,
+                "path": self.vectors_path,
+                "index": "hnsw" if self._hnsw is not None else "brute_force",
+                "quantization": self.quantization
+            }
+
+    def list(self, filters: Optional[dict] = None, limit: int = 100) -> List[List[OutputData]]:
+        started = time.perf_counter()
+        with self._lock:
+            slots = self._candidates(filters)
+            if slots is None:
+                slots = sorted(self._slot_of.values())
+            rows = [OutputData(id=self._ids[slot], score=None, payload=self._payloads[slot])
+                    for slot in list(slots)[:limit]]
+        self._record("list", started)
+        return [rows]
+
+    def page(self, filters: Optional[Dict[str, Any]] = None, after_id: Optional[str] = None,
+             limit: int = 50) -> List[Tuple[str, dict]]:
+        """Keyset page of (id, payload) rows ordered by id; used by pagination.fetch_page."""
+        started = time.perf_counter()
+        with self._lock:
+            slots = self._candidates(filters)
+            allowed = None if slots is None else set(slots.tolist())
+            rows = []
+            start = bisect.bisect_right(self._sorted_ids, after_id) if after_id else 0
+            for memory_id in self._sorted_ids[start:]:
+                slot = self._slot_of[memory_id]
+                if allowed is None or slot in allowed:
+                    rows.append((memory_id, self._payloads[slot]))
+                    if len(rows) == limit:
+                        break
+        self._record("page", started)
+        return rows
+
+    # -- Metrics and lifecycle --------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts, file size and per-operation latency."""
+        with self._lock:
+            operations = {
+                op: {"calls": int(s["calls"]), "avg_ms": round(s["seconds"] / s["calls"] * 1000, 2)}
+                for op, s in self._ops.items()
+            }
+            return {
+                "backend": "local",
+                "rows": len(self._slot_of),
+                "free_slots": len(self._free),
+                "capacity": self._capacity,
+                "vector_file_mb": round(self._capacity * self.embedding_model_dims * 4 / 1e6, 2),
+                "index": "hnsw" if self._hnsw is not None else "brute_force",
+                "hnsw_min_rows": self.hnsw_min_rows,
+                "quantization": self.quantization,
+                "quantized": self._codes is not None,
+                "rerank_factor": self.rerank_factor,
+                "scan_bytes_per_row": self.scan_bytes_per_row(),
+                "journal_entries": self._log_entries,
+                "compactions": self._compactions,
+                "operations": operations
+            }
+
+    def scan_bytes_per_row(self) -> int:
+        """Bytes a brute-force search reads per row: codes and scale when quantized, else the vector."""
+        if self._codes is not None:
+            return int(self._codes.shape[1] * self._codes.itemsize + self._scales.itemsize)
+        return self.embedding_model_dims * 4
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -2,6 +2,7 @@ from mcp.server.fastmcp import FastMCP, Context
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 from mem0 import Memory
 import asyncio
@@ -9,6 +10,20 @@ import json
 import os
 
 from utils import get_mem0_client
+from executor import Mem0Executor
+from ingest_queue import IngestQueue, make_mem0_handler
+from ingest_manifest import IngestManifest
+from directory_sync import DirectorySync
+from batch import save_memories as save_memories_batch
+from embedding_batcher import EmbeddingBatcher, install_embedding_batcher
+from embedding_cache import EmbeddingCache, install_embedding_cache
+from search_cache import SearchResultCache, install_search_cache
+from lexical_index import LexicalIndex, SEARCH_MODES, default_search_mode, hybrid_search, install_lexical_index
+from pagination import fetch_page, DEFAULT_PAGE_SIZE
+from search_results import SCORE_KIND, flatten_results, structured_results
+from tenants import tenant_scope, TenantIndexManager
+from ann_index import AnnIndexManager, install_ann_tuning, vector_search, with_search_params
+from startup import StartupState
 
 load_dotenv()
 
@@ -20,6 +35,16 @@ DEFAULT_USER_ID = "user"
 class Mem0Context:
     """Context for the Mem0 MCP server."""
     mem0_client: Memory
+    executor: Mem0Executor
+    ingest_queue: IngestQueue
+    directory_sync: Optional[DirectorySync] = None
+    embedding_batcher: Optional[EmbeddingBatcher] = None
+    embedding_cache: Optional[EmbeddingCache] = None
+    search_cache: Optional[SearchResultCache] = None
+    lexical_index: Optional[LexicalIndex] = None
+    tenant_indexes: Optional[TenantIndexManager] = None
+    ann_indexes: Optional[AnnIndexManager] = None
+    startup: Optional[StartupState] = None
 
 @asynccontextmanager
 async def mem0_lifespan(server: FastMCP) -> AsyncIterator[Mem0Context]:
@@ -30,16 +55,53 @@ async def mem0_lifespan(server: FastMCP) -> AsyncIterator[Mem0Context]:
         server: The FastMCP server instance
         
     Yields:
-        Mem0Context: The context containing the Mem0 client
+        Mem0Context: The context containing the Mem0 client and the services built around it
     """
     # Create and return the Memory client with the helper function in utils.py
-    mem0_client = get_mem0_client()
+    startup = StartupState()
+    mem0_client = get_mem0_client(startup)
+    executor = Mem0Executor()
+    executor.install(mem0_client)
+    embedding_batcher = install_embedding_batcher(mem0_client)
+    embedding_cache = install_embedding_cache(mem0_client)
+    ann_indexes = install_ann_tuning(mem0_client)
+    search_cache = install_search_cache(mem0_client)
+    lexical_index = install_lexical_index(mem0_client)
+    ingest_manifest = IngestManifest()
+    directory_sync = DirectorySync(mem0_client, ingest_manifest)
+    ingest_queue = IngestQueue(make_mem0_handler(mem0_client, ingest_manifest, directory_sync))
+    directory_sync.attach_queue(ingest_queue)
+    ingest_queue.start()
+    tenant_indexes = TenantIndexManager(mem0_client.vector_store)
+    tenant_indexes.start()
+    with startup.phase("embedder_warmup"):
+        mem0_client.embedding_model.embed("warmup", "add")
+    startup.mark_ready()
     
     try:
-        yield Mem0Context(mem0_client=mem0_client)
+        yield Mem0Context(
+            mem0_client=mem0_client,
+            executor=executor,
+            ingest_queue=ingest_queue,
+            directory_sync=directory_sync,
+            embedding_batcher=embedding_batcher,
+            embedding_cache=embedding_cache,
+            search_cache=search_cache,
+            lexical_index=lexical_index,
+            tenant_indexes=tenant_indexes,
+            ann_indexes=ann_indexes,
+            startup=startup
+        )
     finally:
-        # No explicit cleanup needed for the Mem0 client
-        pass
+        tenant_indexes.stop()
+        directory_sync.stop()
+        ingest_queue.stop()
+        ingest_manifest.close()
+        executor.shutdown()
+        if embedding_cache:
+            embedding_cache.save()
+        if hasattr(mem0_client.vector_store, "close"):
+            mem0_client.vector_store.close()
 
 # Initialize FastMCP server with the Mem0 client as context
 mcp = FastMCP(
@@ -51,7 +113,8 @@ mcp = FastMCP(
 )        
 
 @mcp.tool()
-async def save_memory(ctx: Context, text: str) -> str:
+async def save_memory(ctx: Context, text: str, async_ingest: bool = False,
+                      user_id: str = DEFAULT_USER_ID, agent_id: str = "", run_id: str = "") -> str:
     """Save information to your long-term memory.
 
     This tool is designed to store any type of information that might be useful in the future.
@@ -60,41 +123,159 @@ async def save_memory(ctx: Context, text: str) -> str:
     Args:
         ctx: The MCP server provided context which includes the Mem0 client
         text: The content to store in memory, including any relevant details and context
+        async_ingest: Queue the save and return a job id immediately instead of waiting (default: False)
+        user_id: The user whose memories to use (default: "user")
+        agent_id: Optional agent id to scope memories to
+        run_id: Optional run/session id to scope memories to
     """
     try:
+        scope = tenant_scope(user_id, agent_id, run_id)
         mem0_client = ctx.request_context.lifespan_context.mem0_client
+        executor = ctx.request_context.lifespan_context.executor
         messages = [{"role": "user", "content": text}]
-        mem0_client.add(messages, user_id=DEFAULT_USER_ID)
+        if async_ingest:
+            ingest_queue = ctx.request_context.lifespan_context.ingest_queue
+            job_id = ingest_queue.enqueue(user_id, {"messages": messages, "scope": scope})
+            return f"Queued memory for saving (job id: {job_id})"
+        await executor.run(mem0_client.add, messages, **scope)
         return f"Successfully saved memory: {text[:100]}..." if len(text) > 100 else f"Successfully saved memory: {text}"
     except Exception as e:
         return f"Error saving memory: {str(e)}"
 
 @mcp.tool()
-async def get_all_memories(ctx: Context) -> str:
+async def save_memories(ctx: Context, texts: list[str], infer: bool = True,
+                        user_id: str = DEFAULT_USER_ID, agent_id: str = "", run_id: str = "") -> str:
+    """Save several pieces of information to your long-term memory in one call.
+
+    Prefer this over repeated save_memory calls when storing many facts at once, e.g. a user profile.
+    With infer=True the texts share extraction prompts; with infer=False they are stored verbatim
+    using a single embedding pass and one bulk write.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+        texts: The list of contents to store in memory
+        infer: Extract facts with the LLM (True) or store each text as-is (False) (default: True)
+        user_id: The user whose memories to use (default: "user")
+        agent_id: Optional agent id to scope memories to
+        run_id: Optional run/session id to scope memories to
+    """
+    try:
+        lifespan_context = ctx.request_context.lifespan_context
+        result = await save_memories_batch(
+            lifespan_context.mem0_client, lifespan_context.executor, texts,
+            tenant_scope(user_id, agent_id, run_id), infer=infer
+        )
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        return f"Error saving memories: {str(e)}"
+
+@mcp.tool()
+async def get_job_status(ctx: Context, job_id: str) -> str:
+    """Get the status of an asynchronous save or directory sync job.
+
+    Use this to check whether a memory queued with `save_memory(async_ingest=True)` has been stored,
+    or how far a `sync_directory` job has got.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+        job_id: The job id returned when the memory was queued
+    """
+    try:
+        ingest_queue = ctx.request_context.lifespan_context.ingest_queue
+        job = ingest_queue.get(job_id)
+        if job is None:
+            return f"Job not found: {job_id}"
+        return json.dumps(job, indent=2)
+    except Exception as e:
+        return f"Error retrieving job: {str(e)}"
+
+@mcp.tool()
+async def sync_directory(ctx: Context, directory: str, include: str = "", recursive: bool = True,
+                         infer: bool = True, watch: bool = False, watch_interval: float = 0,
+                         user_id: str = DEFAULT_USER_ID, agent_id: str = "", run_id: str = "") -> str:
+    """Load every new or changed file in a directory tree into long-term memory.
+
+    Use this to import a folder of notes or documents in one call. Files that were already
+    loaded and have not changed are skipped, and edited files only re-process the parts
+    that changed. With watch=True the directory keeps being re-synced in the background.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+        directory: The directory to scan
+        include: Comma-separated file name patterns, e.g. "*.txt,*.md" (default: SYNC_INCLUDE)
+        recursive: Also scan subdirectories (default: True)
+        infer: Extract facts with the LLM (True) or store the file chunks as-is (False) (default: True)
+        watch: Keep re-syncing the directory in the background after this pass (default: False)
+        watch_interval: Seconds between background re-syncs (default: SYNC_WATCH_INTERVAL)
+        user_id: The user whose memories to use (default: "user")
+        agent_id: Optional agent id to scope memories to
+        run_id: Optional run/session id to scope memories to
+
+    The sync runs as a background job. Returns the job_id (check it with get_job_status for progress
+    and the final report with file and chunk counts and throughput) and, in watch mode, the watch_id.
+    """
+    try:
+        lifespan_context = ctx.request_context.lifespan_context
+        directory_sync = lifespan_context.directory_sync
+        scope = tenant_scope(user_id, agent_id, run_id)
+        job_id = directory_sync.enqueue(directory, scope, include or None, recursive, infer)
+        response = {"job_id": job_id, "status": "queued"}
+        if watch:
+            response["watch_id"] = directory_sync.watch(directory, scope, include or None, recursive, infer,
+                                                        watch_interval or None)
+        return json.dumps(response, indent=2)
+    except Exception as e:
+        return f"Error syncing directory: {str(e)}"
+
+@mcp.tool()
+async def stop_directory_watch(ctx: Context, watch_id: str) -> str:
+    """Stop re-syncing a directory started with `sync_directory(watch=True)`.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+        watch_id: The watch id returned by sync_directory
+    """
+    if ctx.request_context.lifespan_context.directory_sync.stop_watch(watch_id):
+        return f"Stopped watch {watch_id}"
+    return f"Watch not found: {watch_id}"
+
+@mcp.tool()
+async def get_all_memories(ctx: Context, cursor: str = "", page_size: int = DEFAULT_PAGE_SIZE,
+                           user_id: str = DEFAULT_USER_ID, agent_id: str = "", run_id: str = "") -> str:
     """Get all stored memories for the user.
     
     Call this tool when you need complete context of all previously memories.
 
     Args:
         ctx: The MCP server provided context which includes the Mem0 client
+        cursor: The next_cursor value from a previous call, or empty for the first page
+        page_size: Number of memories per page (default: 50)
+        user_id: The user whose memories to use (default: "user")
+        agent_id: Optional agent id to scope memories to
+        run_id: Optional run/session id to scope memories to
 
-    Returns a JSON formatted list of all stored memories, including when they were created
-    and their content. Results are paginated with a default of 50 items per page.
+    Returns a JSON object with the page of stored memories under "memories" and a
+    "next_cursor" to pass back for the following page (null on the last page).
     """
     try:
         mem0_client = ctx.request_context.lifespan_context.mem0_client
-        memories = mem0_client.get_all(user_id=DEFAULT_USER_ID)
-        if isinstance(memories, dict) and "results" in memories:
-            flattened_memories = [memory["memory"] for memory in memories["results"]]
-        else:
-            flattened_memories = memories
-        return json.dumps(flattened_memories, indent=2)
+        executor = ctx.request_context.lifespan_context.executor
+        items, next_cursor = await executor.run(
+            fetch_page, mem0_client, tenant_scope(user_id, agent_id, run_id), cursor or None, page_size
+        )
+        return json.dumps({
+            "memories": [item["memory"] for item in items],
+            "next_cursor": next_cursor
+        }, indent=2)
     except Exception as e:
         return f"Error retrieving memories: {str(e)}"
 
 @mcp.tool()
-async def search_memories(ctx: Context, query: str, limit: int = 3) -> str:
-    """Search memories using semantic search.
+async def search_memories(ctx: Context, query: str, limit: int = 3,
+                          user_id: str = DEFAULT_USER_ID, agent_id: str = "", run_id: str = "",
+                          ef_search: int = 0, probes: int = 0, mode: str = "",
+                          vector_weight: float = 1.0, lexical_weight: float = 1.0, structured: bool = False) -> str:
+    """Search memories using semantic search, optionally fused with keyword (BM25) search.
 
     This tool should be called to find relevant information from your memory. Results are ranked by relevance.
     Always search your memories before making decisions to ensure you leverage your existing knowledge.
@@ -103,18 +284,66 @@ async def search_memories(ctx: Context, query: str, limit: int = 3) -> str:
         ctx: The MCP server provided context which includes the Mem0 client
         query: Search query string describing what you're looking for. Can be natural language.
         limit: Maximum number of results to return (default: 3)
+        user_id: The user whose memories to use (default: "user")
+        agent_id: Optional agent id to scope memories to
+        run_id: Optional run/session id to scope memories to
+        ef_search: HNSW candidate list size for this search, 0 for the server default (higher = better recall, slower)
+        probes: IVFFlat lists to scan for this search, 0 for the server default
+        mode: "vector" or "hybrid" (vector + BM25, better for exact names, IDs and error codes); empty for the server default
+        vector_weight: Weight of the semantic ranking in hybrid mode (default: 1.0)
+        lexical_weight: Weight of the keyword ranking in hybrid mode (default: 1.0)
+        structured: Return records with id, score (cosine distance, lower is closer), created/updated
+            timestamps and metadata instead of memory texts
     """
     try:
         mem0_client = ctx.request_context.lifespan_context.mem0_client
-        memories = mem0_client.search(query, user_id=DEFAULT_USER_ID, limit=limit)
-        if isinstance(memories, dict) and "results" in memories:
-            flattened_memories = [memory["memory"] for memory in memories["results"]]
+        executor = ctx.request_context.lifespan_context.executor
+        scope = tenant_scope(user_id, agent_id, run_id)
+        mode = (mode or default_search_mode()).lower()
+        if mode not in SEARCH_MODES:
+            return f"Error searching memories: unknown search mode {mode!r} (expected one of {', '.join(SEARCH_MODES)})"
+        if mode == "hybrid":
+            search = with_search_params(hybrid_search, ef_search, probes)
+            memories = await executor.run(search, mem0_client, ctx.request_context.lifespan_context.lexical_index,
+                                          query, scope, limit, vector_weight, lexical_weight)
         else:
-            flattened_memories = memories
-        return json.dumps(flattened_memories, indent=2)
+            search = with_search_params(vector_search, ef_search, probes)
+            memories = await executor.run(search, mem0_client, query, scope, limit)
+        if structured:
+            return json.dumps({"score_kind": SCORE_KIND, "memories": structured_results(memories)}, indent=2,
+                              default=str)
+        return json.dumps(flatten_results(memories), indent=2)
     except Exception as e:
         return f"Error searching memories: {str(e)}"
 
+@mcp.tool()
+async def get_server_stats(ctx: Context) -> str:
+    """Get runtime statistics for the memory server.
+
+    Reports the executor's queue depth and in-flight calls, ingest queue and directory sync counts, embedding
+    batch sizes, hit rates for the query embedding and search result caches, lexical index
+    size, and connection pool metrics when the pooled pgvector store is in use.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+    """
+    try:
+        lifespan_context = ctx.request_context.lifespan_context
+        vector_store = lifespan_context.mem0_client.vector_store
+        return json.dumps({
+            "startup": lifespan_context.startup.report() if lifespan_context.startup else None,
+            "executor": lifespan_context.executor.stats(),
+            "ingest_queue": lifespan_context.ingest_queue.stats(),
+            "directory_sync": lifespan_context.directory_sync.stats() if lifespan_context.directory_sync else None,
+            "embedding_batcher": lifespan_context.embedding_batcher.stats() if lifespan_context.embedding_batcher else None,
+            "embedding_cache": lifespan_context.embedding_cache.stats() if lifespan_context.embedding_cache else None,
+            "search_cache": lifespan_context.search_cache.stats() if lifespan_context.search_cache else None,
+            "lexical_index": lifespan_context.lexical_index.stats() if lifespan_context.lexical_index else None,
+            "vector_store": await lifespan_context.executor.run(vector_store.stats) if hasattr(vector_store, "stats") else None
+        }, indent=2)
+    except Exception as e:
+        return f"Error retrieving stats: {str(e)}"
+
 async def main():
     transport = os.getenv("TRANSPORT", "stdio")
     if transport == 'sse':
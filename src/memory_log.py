@@ -0,0 +1,269 @@
+"""
+Append-only memory log
+----------------------
+Storage engine for the simple (file-based) Gemini client. Each save appends
+one JSON line to the log instead of rewriting the whole file, so a save costs
+O(record) no matter how many memories exist, and a crash can at worst tear
+the last line (which is cut off on the next open).
+
+- Records are `{"op": "put", "id": ..., ...}` or `{"op": "del", "id": ...}`.
+  Ids come from a monotonic counter, so they stay unique across deletes.
+- An offset index (id -> byte offset and length of the live record) is the
+  only per-memory state kept in RAM; records are read on demand and `scan()`
+  streams the file line by line.
+- The index is saved to `<log>.idx` on close and compaction together with
+  the log size it covers, so opening only parses the tail written after it.
+- Compaction rewrites the live records to a new file once superseded bytes
+  exceed MEMORY_LOG_COMPACT_RATIO of the log, then swaps it in atomically.
+- A legacy JSON array file (the old memories.json) is imported on first open.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+class MemoryLog:
+    """Append-only JSONL memory store with an offset index and compaction.
+
+    Configuration (environment variables):
+        MEMORY_LOG_FSYNC: always (fsync every append), interval or never (default: interval)
+        MEMORY_LOG_FSYNC_INTERVAL: seconds between fsyncs with the interval policy (default: 1.0)
+        MEMORY_LOG_COMPACT_RATIO: superseded share of the log that triggers compaction (default: 0.5)
+        MEMORY_LOG_COMPACT_MIN_BYTES: smallest log worth compacting (default: 1048576)
+    """
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None, fsync: Optional[str] = None):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.fsync = (fsync or os.getenv("MEMORY_LOG_FSYNC", "interval")).lower()
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"MEMORY_LOG_FSYNC must be one of {', '.join(FSYNC_POLICIES)}, got {self.fsync!r}")
+        self.fsync_interval = float(os.getenv("MEMORY_LOG_FSYNC_INTERVAL", "1.0"))
+        self.compact_ratio = float(os.getenv("MEMORY_LOG_COMPACT_RATIO", "0.5"))
+        self.compact_min_bytes = int(os.getenv("MEMORY_LOG_COMPACT_MIN_BYTES", str(1024 * 1024)))
+
+        self._lock = threading.RLock()
+        self._offsets: Dict[int, Tuple[int, int]] = {}
+        self._next_id = 1
+        self._dead_bytes = 0
+        self._last_fsync = time.monotonic()
+        self.compactions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path)
+        self._file = open(path, "a+b")
+        self._open()
+        if is_new and legacy_json and os.path.exists(legacy_json):
+            self._import_legacy(legacy_json)
+
+    # -- Opening ----------------------------------------------------------
+
+    def _open(self):
+        """Load the saved index, then replay the part of the log written after it."""
+        start = 0
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            # The inode check rejects an index written for a log that compaction has since replaced
+            stat = os.stat(self.path)
+            if saved["inode"] == stat.st_ino and saved["log_size"] <= stat.st_size:
+                self._offsets = {int(k): tuple(v) for k, v in saved["offsets"].items()}
+                self._next_id = saved["next_id"]
+                self._dead_bytes = saved["dead_bytes"]
+                start = saved["log_size"]
+        except (OSError, ValueError, KeyError):
+            self._offsets, self._next_id, self._dead_bytes = {}, 1, 0
+        self._replay(start)
+
+    def _replay(self, start: int):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record, offset, len(line))
+                offset += len(line)
+        if offset < os.path.getsize(self.path):
+            # Torn write from a crash: drop the partial record
+            print(f"⚠️ Truncating {os.path.getsize(self.path) - offset} bytes of incomplete records from {self.path}")
+            self._file.truncate(offset)
+
+    def _apply(self, record: Dict[str, Any], offset: int, length: int):
+        memory_id = int(record["id"])
+        previous = self._offsets.pop(memory_id, None)
+        if previous is not None:
+            self._dead_bytes += previous[1]
+        if record.get("op") == "del":
+            self._dead_bytes += length
+        else:
+            self._offsets[memory_id] = (offset, length)
+        self._next_id = max(self._next_id, memory_id + 1)
+
+    def _import_legacy(self, legacy_json: str):
+        with open(legacy_json, "r", encoding="utf-8") as f:
+            memories = json.load(f)
+        for memory in memories:
+            self._write({"op": "put", **memory})
+        self._sync(force=True)
+        print(f"📦 Imported {len(memories)} memories from {legacy_json} into {self.path}")
+
+    # -- Writes -----------------------------------------------------------
+
+    def _write(self, record: Dict[str, Any]) -> int:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(line)
+        self._apply(record, offset, len(line))
+        return int(record["id"])
+
+    def _sync(self, force: bool = False):
+        self._file.flush()
+        now = time.monotonic()
+        if force or self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def append(self, fields: Dict[str, Any]) -> int:
+        """Store a new memory and return its id."""
+        with self._lock:
+            memory_id = self._write({"op": "put", "id": self._next_id, **fields})
+            self._sync()
+            return memory_id
+
+    def delete(self, memory_id: int) -> bool:
+        with self._lock:
+            if memory_id not in self._offsets:
+                return False
+            self._write({"op": "del", "id": memory_id})
+            self._sync()
+            self._maybe_compact()
+            return True
+
+    # -- Reads ------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def ids(self) -> List[int]:
+        with self._lock:
+            return list(self._offsets)
+
+    def _read(self, offset: int, length: int) -> Dict[str, Any]:
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return self._public(json.loads(f.read(length)))
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        record.pop("op", None)
+        return record
+
+    def get(self, memory_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            location = self._offsets.get(memory_id)
+            if location is None:
+                return None
+            return self._read(*location)
+
+    def get_many(self, memory_ids: List[int]) -> List[Dict[str, Any]]:
+        """Records for the given ids, in that order (missing ids are skipped)."""
+        with self._lock:
+            self._file.flush()
+            locations = [self._offsets.get(memory_id) for memory_id in memory_ids]
+            with open(self.path, "rb") as f:
+                records = []
+                for location in locations:
+                    if location is not None:
+                        f.seek(location[0])
+                        records.append(self._public(json.loads(f.read(location[1]))))
+                return records
+
+    def scan(self) -> Iterator[Dict[str, Any]]:
+        """Stream the live records in log order without loading the file."""
+        with self._lock:
+            self._file.flush()
+            live = {offset for offset, _ in self._offsets.values()}
+            self._file.seek(0, os.SEEK_END)
+            end = self._file.tell()
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if offset >= end:
+                    break
+                if offset in live:
+                    yield self._public(json.loads(line))
+                offset += len(line)
+
+    # -- Compaction and lifecycle -----------------------------------------
+
+    def _maybe_compact(self):
+        size = self._file.tell()
+        if size >= self.compact_min_bytes and self._dead_bytes > size * self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Rewrite only the live records and swap the new log in atomically."""
+        with self._lock:
+            self._file.flush()
+            tmp_path = self.path + ".compact"
+            offsets: Dict[int, Tuple[int, int]] = {}
+            with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+                for memory_id, (offset, length) in sorted(self._offsets.items(), key=lambda item: item[1][0]):
+                    src.seek(offset)
+                    offsets[memory_id] = (dst.tell(), length)
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a+b")
+            self._offsets, self._dead_bytes = offsets, 0
+            self.compactions += 1
+            self.save_index()
+
+    def save_index(self):
+        """Persist the offset index so the next open skips replaying the log."""
+        with self._lock:
+            self._sync(force=True)
+            self._file.seek(0, os.SEEK_END)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "inode": os.fstat(self._file.fileno()).st_ino,
+                    "log_size": self._file.tell(),
+                    "next_id": self._next_id,
+                    "dead_bytes": self._dead_bytes,
+                    "offsets": self._offsets
+                }, f)
+            os.replace(tmp_path, self.index_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            return {
+                "memories": len(self._offsets),
+                "log_bytes": self._file.tell(),
+                "dead_bytes": self._dead_bytes,
+                "fsync": self.fsync,
+                "compactions": self.compactions
+            }
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self.save_index()
+            self._file.close()
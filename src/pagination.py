@@ -0,0 +1,104 @@
+"""
+Cursor pagination for get_all_memories
+--------------------------------------
+Keyset pagination over the vector table: each page is
+`WHERE metadata @> filters AND id > cursor ORDER BY id LIMIT n`, which the
+primary key index serves without OFFSET scans, so every page costs the same
+no matter how deep the caller is. Cursors are opaque (URL-safe base64 of the
+last id on the page).
+
+Stores without keyset support are paged over one bounded Mem0 listing of up
+to MAX_LISTING_ROWS rows; a scope with more rows than that is an error rather
+than a silently truncated listing.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Payload keys Mem0 stores alongside the memory text; everything else is metadata
+RESERVED_KEYS = {"user_id", "agent_id", "run_id", "hash", "data", "created_at", "updated_at", "id"}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+MAX_LISTING_ROWS = 10000
+
+
+def encode_cursor(last_id: str) -> str:
+    return base64.urlsafe_b64encode(last_id.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def format_memory(memory_id: str, payload: Dict[str, Any], score: Optional[float] = None) -> Dict[str, Any]:
+    """Shape a stored row the same way Mem0's get_all/search results are shaped."""
+    item = {
+        "id": str(memory_id),
+        "memory": payload.get("data"),
+        "hash": payload.get("hash"),
+        "created_at": payload.get("created_at"),
+        "updated_at": payload.get("updated_at")
+    }
+    if score is not None:
+        item["score"] = score
+    for key in ("user_id", "agent_id", "run_id"):
+        if key in payload:
+            item[key] = payload[key]
+    metadata = {k: v for k, v in payload.items() if k not in RESERVED_KEYS}
+    if metadata:
+        item["metadata"] = metadata
+    return item
+
+
+def _fetch_vecs_page(store, filters: Dict[str, Any], after_id: Optional[str], limit: int) -> List[Tuple[str, dict]]:
+    """Keyset query against a vecs-backed (supabase provider) collection."""
+    from sqlalchemy import text
+
+    table_name = store.collection.table.name
+    sql = f'SELECT id, metadata FROM vecs."{table_name}" WHERE metadata @> CAST(:filters AS jsonb)'
+    params = {"filters": json.dumps(filters), "limit": limit}
+    if after_id is not None:
+        sql += " AND id > :after_id"
+        params["after_id"] = after_id
+    sql += " ORDER BY id LIMIT :limit"
+
+    with store.db.Session() as sess:
+        return [(row[0], row[1]) for row in sess.execute(text(sql), params).fetchall()]
+
+
+def fetch_page(mem0_client, filters: Dict[str, Any], cursor: Optional[str] = None,
+               page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Return one page of memories matching filters and the cursor for the next page."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    after_id = decode_cursor(cursor)
+    store = mem0_client.vector_store
+
+    if hasattr(store, "page"):
+        rows = store.page(filters=filters, after_id=after_id, limit=page_size + 1)
+    elif hasattr(store, "collection") and hasattr(store, "db"):
+        rows = _fetch_vecs_page(store, filters, after_id, page_size + 1)
+    else:
+        # Store without keyset support: page over Mem0's bounded listing
+        listed = mem0_client.get_all(**filters, limit=MAX_LISTING_ROWS + 1)
+        listed = listed.get("results", []) if isinstance(listed, dict) else listed
+        if len(listed) > MAX_LISTING_ROWS:
+            raise RuntimeError(f"{type(store).__name__} has more than {MAX_LISTING_ROWS} matching memories and no "
+                               "keyset pagination; use VECTOR_STORE=supabase, pgpool or local to list them all")
+        ordered = sorted(listed, key=lambda m: m["id"])
+        items = [m for m in ordered if after_id is None or m["id"] > after_id][:page_size + 1]
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        return items, encode_cursor(items[-1]["id"]) if has_more and items else None
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    items = [format_memory(memory_id, payload) for memory_id, payload in rows]
+    next_cursor = encode_cursor(str(rows[-1][0])) if has_more and rows else None
+    return items, next_cursor
@@ -0,0 +1,374 @@
+"""
+Pooled pgvector store
+---------------------
+Mem0 vector store backed by a psycopg 3 connection pool instead of vecs'
+per-call SQLAlchemy sessions. It reads and writes the same `vecs."<collection>"`
+table (id, vec, metadata) that the `supabase` provider creates, so switching
+between the two needs no migration.
+
+- The pool keeps PG_POOL_MIN..PG_POOL_MAX connections open, so requests never
+  pay for connection setup and the server can't exhaust Postgres connections.
+- The insert, search, get and page statements are executed with `prepare=True`,
+  so every pooled connection parses each statement once and reuses it.
+- Search filters on `metadata -> '<key>' = '"<value>"'::jsonb`, the same
+  expression vecs generates, so per-tenant partial indexes (see tenants.py)
+  keep matching. PG_PLAN_CACHE_MODE defaults to `force_custom_plan` for that
+  reason: a generic plan cannot use a partial index picked by the parameter.
+- `search` takes per-query `ef_search` / `probes`, applied with SET LOCAL.
+- `asearch` / `ainsert` / `aget` run the same statements on a lazily opened
+  async pool for callers on an event loop.
+
+Select it with VECTOR_STORE=pgpool.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class OutputData:
+    """Result row in the shape Mem0 expects from a vector store."""
+    id: Optional[str]
+    score: Optional[float]
+    payload: Optional[dict]
+
+
+def _vector_literal(vector) -> str:
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+
+class PooledPgVectorStore:
+    """Mem0 vector store on a psycopg connection pool with prepared statements.
+
+    Configuration (environment variables):
+        PG_POOL_MIN: connections kept open (default: 2)
+        PG_POOL_MAX: most connections the pool opens (default: 10)
+        PG_POOL_TIMEOUT: seconds a caller waits for a free connection (default: 30)
+        PG_STATEMENT_CACHE_SIZE: prepared statements kept per connection (default: 100)
+        PG_PLAN_CACHE_MODE: plan_cache_mode for pooled sessions (default: force_custom_plan)
+    """
+
+    def __init__(self, connection_string: str, collection_name: str, embedding_model_dims: int,
+                 min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        from psycopg_pool import ConnectionPool
+
+        self.connection_string = connection_string
+        self.collection_name = collection_name
+        self.embedding_model_dims = embedding_model_dims
+        self.min_size = min_size or int(os.getenv("PG_POOL_MIN", "2"))
+        self.max_size = max_size or int(os.getenv("PG_POOL_MAX", "10"))
+        self.timeout = timeout or float(os.getenv("PG_POOL_TIMEOUT", "30"))
+        self.statement_cache_size = int(os.getenv("PG_STATEMENT_CACHE_SIZE", "100"))
+        self.plan_cache_mode = os.getenv("PG_PLAN_CACHE_MODE", "force_custom_plan")
+
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+        self._async_pool = None
+
+        self.pool = ConnectionPool(
+            connection_string,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.timeout,
+            kwargs={"autocommit": True},
+            configure=self._configure,
+            name=f"mem0-{collection_name}",
+            open=True
+        )
+        self.pool.wait()
+        self.create_col(embedding_model_dims)
+        print(f"✅ pgvector pool ready ({self.min_size}-{self.max_size} connections, table {self.table})")
+
+    @property
+    def table_name(self) -> str:
+        return self.collection_name
+
+    @property
+    def table(self) -> str:
+        return f'vecs."{self.collection_name}"'
+
+    def _configure(self, conn):
+        conn.prepared_max = self.statement_cache_size
+        if self.plan_cache_mode:
+            conn.execute(f"SET plan_cache_mode = {self.plan_cache_mode}")
+
+    def _record(self, op: str, started: float):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._ops.setdefault(op, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+
+    # -- SQL building -----------------------------------------------------
+
+    @staticmethod
+    def _filter_sql(filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """Per-key jsonb equality, matching the predicate vecs renders for `$eq`."""
+        if not filters:
+            return "TRUE", []
+        clauses, params = [], []
+        for key in sorted(filters):
+            clauses.append(f"(metadata -> '{key.replace(chr(39), chr(39) * 2)}') = %s::jsonb")
+            params.append(json.dumps(filters[key]))
+        return " AND ".join(clauses), params
+
+    def _search_sql(self, filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        where, params = self._filter_sql(filters)
+        sql = (
+            f"SELECT id, vec <=> %s::vector AS distance, metadata FROM {self.table} "
+            f"WHERE {where} ORDER BY vec <=> %s::vector LIMIT %s"
+        )
+        return sql, params
+
+    def _insert_sql(self) -> str:
+        return (
+            f"INSERT INTO {self.table} (id, vec, metadata) VALUES (%s, %s::vector, %s::jsonb) "
+            f"ON CONFLICT (id) DO UPDATE SET vec = EXCLUDED.vec, metadata = EXCLUDED.metadata"
+        )
+
+    @staticmethod
+    def _insert_rows(vectors, payloads, ids) -> List[tuple]:
+        if not ids:
+            ids = [str(uuid.uuid4()) for _ in vectors]
+        if not payloads:
+            payloads = [{} for _ in vectors]
+        return [
+            (str(memory_id), _vector_literal(vector), json.dumps(payload))
+            for memory_id, vector, payload in zip(ids, vectors, payloads)
+        ]
+
+    # -- Mem0 vector store interface --------------------------------------
+
+    def create_col(self, embedding_model_dims: Optional[int] = None):
+        """Create the vecs-compatible table and its default indexes if missing."""
+        dims = embedding_model_dims or self.embedding_model_dims
+        with self.pool.connection() as conn:
+            conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            conn.execute("CREATE SCHEMA IF NOT EXISTS vecs")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"id character varying PRIMARY KEY, "
+                f"vec vector({int(dims)}) NOT NULL, "
+                f"metadata jsonb NOT NULL DEFAULT '{{}}'::jsonb)"
+            )
+            has_vector_index = conn.execute(
+                "SELECT 1 FROM pg_indexes WHERE schemaname = 'vecs' AND tablename = %s "
+                "AND indexname LIKE 'ix_vector%%'",
+                (self.collection_name,)
+            ).fetchone()
+            if not has_vector_index:
+                suffix = uuid.uuid4().hex[:7]
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS ix_vector_cosine_ops_hnsw_m16_efc64_{suffix} "
+                    f"ON {self.table} USING hnsw (vec vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+                )
+
+    def insert(self, vectors: List[List[float]], payloads: Optional[List[dict]] = None,
+               ids: Optional[List[str]] = None):
+        started = time.perf_counter()
+        rows = self._insert_rows(vectors, payloads, ids)
+        with self.pool.connection() as conn:
+            with conn.transaction(), conn.cursor() as cur:
+                cur.executemany(self._insert_sql(), rows)
+        self._record("insert", started)
+
+    def search(self, query: str, vectors: List[float], limit: int = 5, filters: Optional[dict] = None,
+               ef_search: Optional[int] = None, probes: Optional[int] = None) -> List[OutputData]:
+        """Nearest neighbours by cosine distance; ef_search/probes tune the ANN scan for this query."""
+        started = time.perf_counter()
+        sql, params = self._search_sql(filters)
+        vector = _vector_literal(vectors)
+        with self.pool.connection() as conn:
+            if ef_search is None and probes is None:
+                rows = conn.execute(sql, [vector, *params, vector, limit], prepare=True).fetchall()
+            else:
+                # SET LOCAL scopes the setting to this transaction, not the pooled connection
+                with conn.transaction():
+                    if ef_search is not None:
+                        conn.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+                    if probes is not None:
+                        conn.execute(f"SET LOCAL ivfflat.probes = {int(probes)}")
+                    rows = conn.execute(sql, [vector, *params, vector, limit], prepare=True).fetchall()
+        self._record("search", started)
+        return [OutputData(id=str(row[0]), score=float(row[1]), payload=row[2]) for row in rows]
+
+    def delete(self, vector_id: str):
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE id = %s", (str(vector_id),), prepare=True)
+        self._record("delete", started)
+
+    def update(self, vector_id: str, vector: Optional[List[float]] = None, payload: Optional[dict] = None):
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            conn.execute(
+                f"UPDATE {self.table} SET vec = COALESCE(%s::vector, vec), "
+                f"metadata = COALESCE(%s::jsonb, metadata) WHERE id = %s",
+                (
+                    _vector_literal(vector) if vector is not None else None,
+                    json.dumps(payload) if payload is not None else None,
+                    str(vector_id)
+                ),
+                prepare=True
+            )
+        self._record("update", started)
+
+    def get(self, vector_id: str) -> Optional[OutputData]:
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f"SELECT id, metadata FROM {self.table} WHERE id = %s", (str(vector_id),), prepare=True
+            ).fetchone()
+        self._record("get", started)
+        if row is None:
+            return None
+        return OutputData(id=str(row[0]), score=None, payload=row[1])
+
+    def list_cols(self) -> List[str]:
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'vecs'").fetchall()
+        return [row[0] for row in rows]
+
+    def delete_col(self):
+        with self.pool.connection() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def col_info(self) -> dict:
+        with self.pool.connection() as conn:
+            count = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            indexes = conn.execute(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = 'vecs' AND tablename = %s",
+                (self.collection_name,)
+            ).fetchall()
+        return {
+            "name": self.collection_name,
+            "count": count,
+            "dimension": self.embedding_model_dims,
+            "indexes": [row[0] for row in indexes]
+        }
+
+    def list(self, filters: Optional[dict] = None, limit: int = 100) -> List[List[OutputData]]:
+        started = time.perf_counter()
+        where, params = self._filter_sql(filters)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, metadata FROM {self.table} WHERE {where} LIMIT %s", [*params, limit]
+            ).fetchall()
+        self._record("list", started)
+        return [[OutputData(id=str(row[0]), score=None, payload=row[1]) for row in rows]]
+
+    def page(self, filters: Optional[Dict[str, Any]] = None, after_id: Optional[str] = None,
+             limit: int = 50) -> List[Tuple[str, dict]]:
+        """Keyset page of (id, payload) rows ordered by id; used by pagination.fetch_page."""
+        started = time.perf_counter()
+        sql = f"SELECT id, metadata FROM {self.table} WHERE metadata @> %s::jsonb AND id > %s ORDER BY id LIMIT %s"
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, (json.dumps(filters or {}), after_id or "", limit), prepare=True).fetchall()
+        self._record("page", started)
+        return [(row[0], row[1]) for row in rows]
+
+    # -- Admin helpers used by tenants.py ---------------------------------
+
+    def execute_ddl(self, *statements: str):
+        """Run DDL outside a transaction (pooled connections are autocommit)."""
+        with self.pool.connection() as conn:
+            for sql in statements:
+                conn.execute(sql)
+
+    def query_sql(self, sql: str, setup: Sequence[str] = ()) -> List[tuple]:
+        """Run a query in one transaction after `setup` statements (e.g. SET LOCAL)."""
+        with self.pool.connection() as conn:
+            with conn.transaction(force_rollback=True):
+                for statement in setup:
+                    conn.execute(statement)
+                return [tuple(row) for row in conn.execute(sql).fetchall()]
+
+    # -- Async API --------------------------------------------------------
+
+    async def _apool(self):
+        if self._async_pool is None:
+            from psycopg_pool import AsyncConnectionPool
+
+            async def configure(conn):
+                conn.prepared_max = self.statement_cache_size
+                if self.plan_cache_mode:
+                    await conn.execute(f"SET plan_cache_mode = {self.plan_cache_mode}")
+
+            self._async_pool = AsyncConnectionPool(
+                self.connection_string,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                timeout=self.timeout,
+                kwargs={"autocommit": True},
+                configure=configure,
+                name=f"mem0-{self.collection_name}-async",
+                open=False
+            )
+            await self._async_pool.open(wait=True)
+        return self._async_pool
+
+    async def asearch(self, query: str, vectors: List[float], limit: int = 5,
+                      filters: Optional[dict] = None) -> List[OutputData]:
+        started = time.perf_counter()
+        sql, params = self._search_sql(filters)
+        vector = _vector_literal(vectors)
+        pool = await self._apool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(sql, [vector, *params, vector, limit], prepare=True)
+            rows = await cur.fetchall()
+        self._record("asearch", started)
+        return [OutputData(id=str(row[0]), score=float(row[1]), payload=row[2]) for row in rows]
+
+    async def ainsert(self, vectors: List[List[float]], payloads: Optional[List[dict]] = None,
+                      ids: Optional[List[str]] = None):
+        started = time.perf_counter()
+        rows = self._insert_rows(vectors, payloads, ids)
+        pool = await self._apool()
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                async with conn.cursor() as cur:
+                    await cur.executemany(self._insert_sql(), rows)
+        self._record("ainsert", started)
+
+    async def aget(self, vector_id: str) -> Optional[OutputData]:
+        started = time.perf_counter()
+        pool = await self._apool()
+        async with pool.connection() as conn:
+            cur = await conn.execute(
+                f"SELECT id, metadata FROM {self.table} WHERE id = %s", (str(vector_id),), prepare=True
+            )
+            row = await cur.fetchone()
+        self._record("aget", started)
+        if row is None:
+            return None
+        return OutputData(id=str(row[0]), score=None, payload=row[1])
+
+    # -- Metrics and lifecycle --------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy and wait counters plus per-operation latency."""
+        with self._lock:
+            operations = {
+                op: {"calls": int(s["calls"]), "avg_ms": round(s["seconds"] / s["calls"] * 1000, 2)}
+                for op, s in self._ops.items()
+            }
+        return {
+            "pool": self.pool.get_stats(),
+            "async_pool": self._async_pool.get_stats() if self._async_pool else None,
+            "statement_cache_size": self.statement_cache_size,
+            "plan_cache_mode": self.plan_cache_mode,
+            "operations": operations
+        }
+
+    def close(self):
+        self.pool.close()
+
+    async def aclose(self):
+        if self._async_pool is not None:
+            await self._async_pool.close()
@@ -0,0 +1,127 @@
+"""
+Vector quantization for the local store
+---------------------------------------
+Compact codes that local_store scans instead of the float32 vectors. Both
+quantizers expect L2-normalised vectors and estimate the dot product with a
+query, so the store can shortlist `limit * LOCAL_STORE_RERANK_FACTOR` rows from
+the codes and re-rank that shortlist with the full-precision vectors.
+
+- `ScalarQuantizer` (int8): one signed byte per dimension plus a float32 scale
+  per row (max |x| / 127). 388 bytes per 384-dim row instead of 1536.
+- `ProductQuantizer` (pq): the vector is split into `subvectors` slices and
+  each slice is replaced by the id of its nearest of 256 k-means centroids,
+  so a row is `subvectors` bytes (48 by default). Scoring uses a per-query
+  lookup table of slice-centroid dot products. It needs training rows before
+  it can encode anything.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Rows scored per block, so int8 -> float32 conversion never materialises the whole table
+SCORE_BLOCK_ROWS = 8192
+
+
+class ScalarQuantizer:
+    """Per-row symmetric int8 quantization."""
+
+    name = "int8"
+    dtype = np.int8
+    trained = True
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.code_width = dims
+
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def similarities(self, codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = slice(start, start + SCORE_BLOCK_ROWS)
+            out[block] = (codes[block].astype(np.float32) @ query) * scales[block]
+        return out
+
+
+class ProductQuantizer:
+    """Product quantization with 256 centroids per subvector (one byte per slice)."""
+
+    name = "pq"
+    dtype = np.uint8
+    centroids = 256
+
+    def __init__(self, dims: int, subvectors: int = 48):
+        if dims % subvectors:
+            raise ValueError(f"{dims} dimensions do not split into {subvectors} subvectors")
+        self.dims = dims
+        self.code_width = subvectors
+        self.subvectors = subvectors
+        self.slice_dims = dims // subvectors
+        self.codebooks: Optional[np.ndarray] = None  # (subvectors, 256, slice_dims)
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _slices(self, matrix: np.ndarray) -> np.ndarray:
+        return matrix.reshape(len(matrix), self.subvectors, self.slice_dims)
+
+    def train(self, sample: np.ndarray, iterations: int = 12, seed: int = 0):
+        """k-means per subvector on `sample` (at least 256 rows)."""
+        if len(sample) < self.centroids:
+            raise ValueError(f"PQ training needs at least {self.centroids} rows, got {len(sample)}")
+        rng = np.random.default_rng(seed)
+        slices = self._slices(np.asarray(sample, dtype=np.float32))
+        codebooks = np.empty((self.subvectors, self.centroids, self.slice_dims), dtype=np.float32)
+        for j in range(self.subvectors):
+            points = slices[:, j, :]
+            centers = points[rng.choice(len(points), self.centroids, replace=False)].copy()
+            for _ in range(iterations):
+                assignment = self._nearest(points, centers)
+                counts = np.bincount(assignment, minlength=self.centroids)
+                sums = np.zeros_like(centers)
+                np.add.at(sums, assignment, points)
+                filled = counts > 0
+                # Empty clusters keep their previous centroid
+                centers[filled] = sums[filled] / counts[filled, None]
+            codebooks[j] = centers
+        self.codebooks = codebooks
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        # argmin ||p - c||^2 == argmax (2 p.c - ||c||^2)
+        return np.argmax(2 * points @ centers.T - (centers ** 2).sum(axis=1), axis=1)
+
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        slices = self._slices(matrix)
+        codes = np.empty((len(matrix), self.subvectors), dtype=np.uint8)
+        for j in range(self.subvectors):
+            codes[:, j] = self._nearest(slices[:, j, :], self.codebooks[j])
+        return codes, np.ones(len(matrix), dtype=np.float32)
+
+    def similarities(self, codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # table[j, c] = query slice j . centroid c of subvector j
+        table = np.einsum("jcd,jd->jc", self.codebooks, query.reshape(self.subvectors, self.slice_dims))
+        out = np.empty(len(codes), dtype=np.float32)
+        columns = np.arange(self.subvectors)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = slice(start, start + SCORE_BLOCK_ROWS)
+            out[block] = table[columns, codes[block].astype(np.intp)].sum(axis=1)
+        return out
+
+
+def make_quantizer(kind: str, dims: int, subvectors: int = 48):
+    """The quantizer LOCAL_STORE_QUANTIZATION names, or None for plain float32."""
+    kind = (kind or "none").lower()
+    if kind in ("", "none", "float32"):
+        return None
+    if kind == "int8":
+        return ScalarQuantizer(dims)
+    if kind == "pq":
+        return ProductQuantizer(dims, subvectors)
+    raise ValueError(f"Unknown quantization {kind!r} (expected none, int8 or pq)")
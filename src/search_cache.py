@@ -0,0 +1,166 @@
+"""
+Search result cache
+-------------------
+Caches vector store search results keyed by (user_id, query embedding hash,
+limit, filters, ANN search parameters). Every write that goes through the wrapped vector store
+(insert, update, delete) bumps that user's generation counter, and the
+generation is part of the key, so a cached result can never outlive a write
+made through this process. A TTL bounds staleness from writers in other
+processes sharing the same database.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ann_index import current_search_params
+
+
+class SearchResultCache:
+    """LRU cache of search results with per-user generation counters.
+
+    Configuration (environment variables):
+        SEARCH_CACHE_ENABLED: set to "false" to disable the cache (default: true)
+        SEARCH_CACHE_MAX_ENTRIES: maximum cached result lists (default: 10000)
+        SEARCH_CACHE_TTL: seconds a result stays valid (default: 300)
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEARCH_CACHE_TTL", "300"))
+
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: Dict[Optional[str], int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._miss_seconds = 0.0
+
+    def generation(self, user_id: Optional[str]) -> tuple:
+        with self._lock:
+            return (self._global_generation, self._generations.get(user_id, 0))
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Bump a user's generation, or every user's when user_id is None."""
+        with self._lock:
+            if user_id is None:
+                self._global_generation += 1
+            else:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def make_key(self, vectors, limit: int, filters: Optional[dict]) -> tuple:
+        user_id = (filters or {}).get("user_id")
+        vector_hash = hashlib.sha1(np.asarray(vectors, dtype=np.float32).tobytes()).hexdigest()
+        filters_key = json.dumps(filters or {}, sort_keys=True, default=str)
+        # Results at a different ef_search / probes are different answers
+        params_key = tuple(sorted(current_search_params().items()))
+        return (user_id, vector_hash, limit, filters_key, params_key, self.generation(user_id))
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def put(self, key: tuple, results, elapsed: float):
+        with self._lock:
+            self._miss_seconds += elapsed
+            self._entries[key] = (list(results), time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "avg_miss_ms": round(avg_miss * 1000, 2),
+                "saved_ms": round(self.hits * avg_miss * 1000, 2)
+            }
+
+
+class CachedVectorStore:
+    """Wraps a Mem0 vector store: serves repeated searches from a SearchResultCache
+    and invalidates the affected user on every write."""
+
+    def __init__(self, vector_store, cache: SearchResultCache):
+        self._store = vector_store
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def search(self, query, vectors, limit=5, filters=None):
+        key = self.cache.make_key(vectors, limit, filters)
+        results = self.cache.get(key)
+        if results is not None:
+            return results
+        started = time.perf_counter()
+        results = self._store.search(query=query, vectors=vectors, limit=limit, filters=filters)
+        self.cache.put(key, results, time.perf_counter() - started)
+        return results
+
+    def insert(self, vectors, payloads=None, ids=None):
+        try:
+            return self._store.insert(vectors=vectors, payloads=payloads, ids=ids)
+        finally:
+            for user_id in {(payload or {}).get("user_id") for payload in (payloads or [{}])}:
+                self.cache.invalidate(user_id)
+
+    def update(self, vector_id, vector=None, payload=None):
+        try:
+            return self._store.update(vector_id=vector_id, vector=vector, payload=payload)
+        finally:
+            self.cache.invalidate((payload or {}).get("user_id"))
+
+    def delete(self, vector_id):
+        user_id = None
+        try:
+            existing = self._store.get(vector_id=vector_id)
+            user_id = existing.payload.get("user_id") if existing and existing.payload else None
+        except Exception:
+            pass
+        try:
+            return self._store.delete(vector_id=vector_id)
+        finally:
+            self.cache.invalidate(user_id)
+
+    def delete_col(self):
+        try:
+            return self._store.delete_col()
+        finally:
+            self.cache.invalidate()
+
+
+def install_search_cache(mem0_client) -> Optional[SearchResultCache]:
+    """Put a SearchResultCache in front of the client's vector store unless disabled."""
+    if os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "false":
+        return None
+    cache = SearchResultCache()
+    mem0_client.vector_store = CachedVectorStore(mem0_client.vector_store, cache)
+    print(f"✅ Search result cache enabled ({cache.max_entries} entries, TTL {cache.ttl:.0f}s)")
+    return cache
@@ -0,0 +1,52 @@
+"""
+Search result shaping
+---------------------
+`search_memories` has always answered with bare memory strings. Callers that
+opt in with `structured` get one record per hit instead: id, memory text,
+score, created/updated timestamps, tenant ids and metadata (plus the fused and
+BM25 scores in hybrid mode), so they can threshold, de-duplicate and cache by
+id. `score` is the vector store's cosine distance: lower is closer.
+
+HTTP clients that send `Accept: application/msgpack` get the same body
+MessagePack-encoded, which is smaller and faster to decode than JSON for
+large result sets. This needs the optional `msgpack` package
+(`pip install -e .[msgpack]`).
+"""
+
+from typing import Any, Dict, List
+
+STRUCTURED_FIELDS = ("id", "memory", "score", "fused_score", "bm25_score", "created_at", "updated_at",
+                     "user_id", "agent_id", "run_id", "metadata")
+SCORE_KIND = "distance"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _results(memories: Any) -> List[Any]:
+    if isinstance(memories, dict) and "results" in memories:
+        return memories["results"]
+    return memories or []
+
+
+def flatten_results(memories: Any) -> List[Any]:
+    """Memory texts only (the default response)."""
+    return [memory["memory"] if isinstance(memory, dict) else memory for memory in _results(memories)]
+
+
+def structured_results(memories: Any) -> List[Dict[str, Any]]:
+    """One record per hit with the fields in STRUCTURED_FIELDS that are set."""
+    return [
+        {field: memory[field] for field in STRUCTURED_FIELDS if memory.get(field) is not None}
+        for memory in _results(memories) if isinstance(memory, dict)
+    ]
+
+
+def wants_msgpack(accept: str) -> bool:
+    return MSGPACK_MEDIA_TYPE in (accept or "").lower()
+
+
+def pack(body: Dict[str, Any]) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        raise RuntimeError("MessagePack responses need the msgpack package (pip install -e .[msgpack])")
+    return msgpack.packb(body, use_bin_type=True, default=str)
@@ -0,0 +1,61 @@
+"""
+Startup phase tracking
+----------------------
+Records how long each initialization phase takes and whether the server is
+fully warm. The HTTP server's `/ready` endpoint reports this, separately from
+the `/` liveness check.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class StartupState:
+    """Thread-safe record of startup phases and overall readiness."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._started_at = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self.ready = False
+        self.error: Optional[str] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase; phases may run concurrently from different threads."""
+        started = time.perf_counter()
+        with self._lock:
+            self._phases[name] = {"status": "running", "seconds": None}
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self._phases[name] = {"status": "failed", "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            raise
+        else:
+            with self._lock:
+                self._phases[name] = {"status": "done", "seconds": round(time.perf_counter() - started, 3)}
+
+    def mark_ready(self):
+        with self._lock:
+            self.ready = True
+            self._finished_at = time.perf_counter()
+        print(f"✅ Server warm in {self._finished_at - self._started_at:.2f}s")
+
+    def mark_failed(self, error: Exception):
+        with self._lock:
+            self.error = str(error)
+            self._finished_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self._finished_at or time.perf_counter()
+            return {
+                "ready": self.ready,
+                "error": self.error,
+                "elapsed_seconds": round(end - self._started_at, 3),
+                "phases": {name: dict(info) for name, info in self._phases.items()}
+            }
@@ -0,0 +1,72 @@
+"""
+Streaming answer rendering for the chat clients
+-----------------------------------------------
+Renders a Gemini `stream=True` response token by token in a rich Live panel,
+so the first words appear after time-to-first-token instead of after the
+whole generation. Returns the finished text (for the memory save) and the
+time to the first chunk.
+
+Clients stream when GEMINI_STREAMING=true (default: off); rich allows only one
+live display at a time, so callers must not wrap these in `console.status`.
+"""
+
+import os
+import time
+from typing import AsyncIterable, Iterable, Optional, Tuple
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+EMPTY_ANSWER = "Sorry, I couldn't generate a response."
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("GEMINI_STREAMING", "false").lower() == "true"
+
+
+def answer_panel(text: str) -> Panel:
+    return Panel(Markdown(text), title="🤖 Gemini", title_align="left", border_style="green", padding=(1, 2))
+
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text parts (e.g. a safety block or the final usage record)
+        return ""
+
+
+def render_stream(chunks: Iterable, console: Console) -> Tuple[str, Optional[float]]:
+    """Render a synchronous stream; returns (answer, seconds to first chunk)."""
+    started = time.perf_counter()
+    first_token, text = None, ""
+    with Live(answer_panel("…"), console=console, refresh_per_second=12, vertical_overflow="visible") as live:
+        for chunk in chunks:
+            piece = _chunk_text(chunk)
+            if not piece:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            text += piece
+            live.update(answer_panel(text))
+        live.update(answer_panel(text or EMPTY_ANSWER))
+    return text or EMPTY_ANSWER, first_token
+
+
+async def render_stream_async(chunks: AsyncIterable, console: Console) -> Tuple[str, Optional[float]]:
+    """Render an async stream (generate_content_async(stream=True)); returns (answer, seconds to first chunk)."""
+    started = time.perf_counter()
+    first_token, text = None, ""
+    with Live(answer_panel("…"), console=console, refresh_per_second=12, vertical_overflow="visible") as live:
+        async for chunk in chunks:
+            piece = _chunk_text(chunk)
+            if not piece:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            text += piece
+            live.update(answer_panel(text))
+        live.update(answer_panel(text or EMPTY_ANSWER))
+    return text or EMPTY_ANSWER, first_token
@@ -0,0 +1,160 @@
+"""
+Multi-tenant scoping and per-tenant vector indexes
+--------------------------------------------------
+Every endpoint and tool accepts a `user_id` (plus optional `agent_id` and
+`run_id`); `tenant_scope` turns those into the Mem0 kwargs / metadata filters.
+
+`TenantIndexManager` keeps search cost proportional to one tenant's data on
+the pgvector backends (vecs `supabase` provider or the pooled pg_store):
+
+- a btree expression index on `metadata -> 'user_id'` and a GIN index on the
+  metadata column serve the filter and keyset-pagination queries, and
+- tenants with at least TENANT_INDEX_MIN_ROWS memories get their own partial
+  HNSW index (`WHERE metadata -> 'user_id' = '"<id>"'`). vecs renders a
+  `user_id` filter as exactly that expression, so the planner picks the
+  tenant's small index instead of filtering a table-wide ANN scan.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from ann_index import AnnIndexConfig
+from vector_table import VectorTable, sql_literal
+
+
+def tenant_scope(user_id: str, agent_id: Optional[str] = None, run_id: Optional[str] = None) -> Dict[str, str]:
+    """Build the Mem0 scope (kwargs for add/search/get_all, and metadata filters)."""
+    scope = {"user_id": user_id}
+    if agent_id:
+        scope["agent_id"] = agent_id
+    if run_id:
+        scope["run_id"] = run_id
+    return scope
+
+
+class TenantIndexManager:
+    """Creates and reports per-tenant partial ANN indexes on the vecs table.
+
+    Configuration (environment variables):
+        TENANT_INDEX_MIN_ROWS: memories a tenant needs before it gets its own index (default: 10000)
+        TENANT_INDEX_SWEEP_SECONDS: interval between background sweeps, 0 disables them (default: 3600)
+    """
+
+    def __init__(self, vector_store, min_rows: Optional[int] = None, sweep_seconds: Optional[float] = None):
+        self.store = vector_store
+        self.min_rows = min_rows or int(os.getenv("TENANT_INDEX_MIN_ROWS", "10000"))
+        self.sweep_seconds = sweep_seconds if sweep_seconds is not None else float(os.getenv("TENANT_INDEX_SWEEP_SECONDS", "3600"))
+        self.vector_table = VectorTable(vector_store)
+        # Tenant partitions keep growing, so they always get HNSW (no training step),
+        # built with the operator's HNSW parameters
+        ann = AnnIndexConfig.from_env()
+        self.index_config = AnnIndexConfig(m=ann.m, ef_construction=ann.ef_construction)
+        self.supported = self.vector_table.supported
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def table_name(self) -> str:
+        return self.vector_table.name
+
+    @property
+    def table(self) -> str:
+        return self.vector_table.qualified
+
+    @staticmethod
+    def index_name(user_id: str) -> str:
+        return f"ix_tenant_{hashlib.md5(user_id.encode()).hexdigest()[:16]}"
+
+    def _execute_ddl(self, sql: str):
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        self.vector_table.execute(sql)
+
+    def _query(self, sql: str) -> List[tuple]:
+        return self.vector_table.query(sql)
+
+    def ensure_metadata_indexes(self):
+        """Create the shared indexes used by tenant filters and pagination."""
+        if not self.supported:
+            return
+        table_name = self.table_name
+        self._execute_ddl(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_{table_name}_user_id" '
+            f"ON {self.table} ((metadata -> 'user_id'))"
+        )
+        self._execute_ddl(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_{table_name}_metadata" '
+            f"ON {self.table} USING gin (metadata jsonb_path_ops)"
+        )
+
+    def ensure_tenant_index(self, user_id: str) -> str:
+        """Build the tenant's partial HNSW index if it does not exist yet."""
+        if not self.supported:
+            raise RuntimeError("Per-tenant indexes require the pgvector (supabase) vector store")
+        name = self.index_name(user_id)
+        predicate = f"(metadata -> 'user_id') = {sql_literal(json.dumps(user_id))}::jsonb"
+        print(f"🔄 Building tenant index {name} for user_id={user_id}")
+        self._execute_ddl(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON {self.table} '
+            f"{self.index_config.using_clause()} WHERE {predicate}"
+        )
+        print(f"✅ Tenant index {name} ready")
+        return name
+
+    def list_tenants(self) -> List[Dict[str, Any]]:
+        """Memory counts per user and whether each user has its own index."""
+        if not self.supported:
+            return []
+        rows = self._query(
+            f"SELECT metadata ->> 'user_id' AS user_id, COUNT(*) FROM {self.table} "
+            f"GROUP BY 1 ORDER BY 2 DESC"
+        )
+        existing = {row[0] for row in self._query(
+            f"SELECT indexname FROM pg_indexes WHERE schemaname = 'vecs' AND tablename = {sql_literal(self.table_name)}"
+        )}
+        return [
+            {
+                "user_id": user_id,
+                "memories": count,
+                "indexed": self.index_name(user_id) in existing if user_id is not None else False
+            }
+            for user_id, count in rows
+        ]
+
+    def sweep(self) -> List[str]:
+        """Index every tenant that has grown past TENANT_INDEX_MIN_ROWS."""
+        if not self.supported:
+            return []
+        with self._lock:
+            built = []
+            for tenant in self.list_tenants():
+                if tenant["user_id"] is not None and tenant["memories"] >= self.min_rows and not tenant["indexed"]:
+                    built.append(self.ensure_tenant_index(tenant["user_id"]))
+            return built
+
+    def start(self):
+        """Create shared indexes and start the periodic background sweep."""
+        if not self.supported:
+            return
+
+        def run():
+            try:
+                self.ensure_metadata_indexes()
+            except Exception as e:
+                print(f"⚠️ Could not create metadata indexes: {e}")
+            while True:
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ Tenant index sweep failed: {e}")
+                if not self.sweep_seconds or self._stop.wait(self.sweep_seconds):
+                    return
+
+        self._thread = threading.Thread(target=run, name="tenant-index-sweep", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,58 @@
+"""
+SQL access to the vector table
+------------------------------
+The admin features (per-tenant indexes, ANN index management) run raw SQL
+against `vecs."<collection>"`. `VectorTable` hides which pgvector backend is
+active: the pooled pg_store runs statements on its pool, the vecs-based
+`supabase` store through its SQLAlchemy engine.
+"""
+
+from typing import List, Sequence
+
+
+def sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class VectorTable:
+    """Backend-neutral DDL and query helpers for the collection table."""
+
+    def __init__(self, vector_store):
+        self.store = vector_store
+        # The pooled store runs SQL itself; the vecs store exposes its SQLAlchemy client
+        self.pooled = hasattr(vector_store, "execute_ddl")
+        self.supported = self.pooled or (hasattr(vector_store, "collection") and hasattr(vector_store, "db"))
+
+    @property
+    def name(self) -> str:
+        return self.store.table_name if self.pooled else self.store.collection.table.name
+
+    @property
+    def qualified(self) -> str:
+        return f'vecs."{self.name}"'
+
+    def execute(self, *statements: str):
+        """Run statements in autocommit mode on one connection (needed for CONCURRENTLY)."""
+        if self.pooled:
+            self.store.execute_ddl(*statements)
+            return
+
+        from sqlalchemy import text
+
+        with self.store.db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for sql in statements:
+                conn.execute(text(sql))
+
+    def query(self, sql: str, setup: Sequence[str] = ()) -> List[tuple]:
+        """Run a query in one transaction after `setup` statements (e.g. SET LOCAL)."""
+        if self.pooled:
+            return self.store.query_sql(sql, setup)
+
+        from sqlalchemy import text
+
+        with self.store.db.Session() as sess:
+            for statement in setup:
+                sess.execute(text(statement))
+            rows = [tuple(row) for row in sess.execute(text(sql)).fetchall()]
+            sess.rollback()
+            return rows
@@ -5,7 +5,6 @@ Comprehensive demonstration of memory capabilities
 """
 import requests
 import json
-import time
 
 BASE_URL = "http://mcp_server:8050"
 
@@ -13,13 +12,25 @@ def save_memory(text):
     response = requests.post(f"{BASE_URL}/save_memory", json={"text": text})
     return response.json() if response.status_code == 200 else None
 
+def save_memories(texts):
+    response = requests.post(f"{BASE_URL}/save_memories", json={"texts": texts})
+    return response.json() if response.status_code == 200 else None
+
 def search_memories(query, limit=3):
     response = requests.post(f"{BASE_URL}/search_memories", json={"query": query, "limit": limit})
     return response.json() if response.status_code == 200 else None
 
 def get_all_memories():
-    response = requests.get(f"{BASE_URL}/get_all_memories")
-    return response.json() if response.status_code == 200 else None
+    memories, params = [], {}
+    while True:
+        response = requests.get(f"{BASE_URL}/get_all_memories", params=params)
+        if response.status_code != 200:
+            return None
+        result = response.json()
+        memories.extend(result.get('memories', []))
+        if not result.get('next_cursor'):
+            return {"success": True, "memories": memories}
+        params = {"cursor": result['next_cursor']}
 
 def test_drive():
     print("🚗 MCP-Mem0 Test Drive")
@@ -37,11 +48,11 @@ def test_drive():
         "I prefer dark roast coffee and drink 3 cups per day"
     ]
     
-    for memory in memories:
-        result = save_memory(memory)
-        if result:
-            print(f"✅ Saved: {memory[:50]}...")
-        time.sleep(1)
+    result = save_memories(memories)
+    if result:
+        for item in result['results']:
+            if item['success']:
+                print(f"✅ Saved: {memories[item['index']][:50]}...")
     
     # Test semantic search capabilities
     print("\n🔍 Testing semantic search...")
@@ -5,6 +5,7 @@ Test script for file loading functionality
 import requests
 import json
 import os
+import time
 
 def test_file_loading():
     print("🧪 Testing File Loading Functionality")
@@ -25,35 +26,47 @@ def test_file_loading():
         print(f"❌ Cannot connect to server: {e}")
         return
     
-    # רשימת קבצים לבדיקה
-    test_files = [
-        "test_files/recipes.txt",
-        "test_files/tech_notes.txt", 
-        "test_files/travel_diary.txt"
-    ]
-    
-    # טעינת קבצים
+    # טעינת כל הקבצים במקביל - כל קובץ הוא job נפרד
     print("\n2. Loading files into memory...")
-    for file_path in test_files:
-        if os.path.exists(file_path):
-            try:
-                response = requests.post(
-                    f"{base_url}/load_file",
-                    json={"file_path": file_path}
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"✅ Loaded {file_path}")
-                    print(f"   Content length: {result['content_length']} characters")
+    try:
+        response = requests.post(
+            f"{base_url}/load_file_simple",
+            json={"pattern": "test_files/*.txt"}
+        )
+        if response.status_code != 200:
+            print(f"❌ Failed to queue files: {response.text}")
+            return
+        jobs = response.json()["jobs"]
+        print(f"✅ Queued {len(jobs)} files")
+    except Exception as e:
+        print(f"❌ Error queueing files: {e}")
+        return
+
+    pending = {job["job_id"]: job["file_path"] for job in jobs}
+    deadline = time.time() + 600
+    while pending and time.time() < deadline:
+        for job_id, file_path in list(pending.items()):
+            job = requests.get(f"{base_url}/jobs/{job_id}").json()["job"]
+            progress = job.get("progress") or {}
+            if job["status"] in ("done", "partial", "failed"):
+                del pending[job_id]
+                result = job.get("result") or {}
+                if job["status"] == "done":
+                    print(f"✅ Loaded {file_path}: {result.get('chunks_done', 0)} chunks, "
+                          f"{result.get('memories', 0)} memories in {result.get('seconds', 0)}s")
+                elif job["status"] == "partial":
+                    print(f"⚠️  Partially loaded {file_path}: {result.get('chunks_failed', 0)} chunks failed: "
+                          f"{job.get('error')}")
                 else:
-                    print(f"❌ Failed to load {file_path}: {response.text}")
-                    
-            except Exception as e:
-                print(f"❌ Error loading {file_path}: {e}")
-        else:
-            print(f"⚠️  File not found: {file_path}")
-    
+                    print(f"❌ Failed to load {file_path}: {job.get('error')}")
+            elif progress:
+                print(f"   ⏳ {file_path}: {progress.get('chunks_done', 0)}/{progress.get('chunks_read', 0)} chunks, "
+                      f"{progress.get('bytes_read', 0)}/{progress.get('bytes_total', 0)} bytes")
+        if pending:
+            time.sleep(1)
+    for file_path in pending.values():
+        print(f"⚠️  Timed out waiting for {file_path}")
+
     # בדיקת חיפוש
     print("\n3. Testing search functionality...")
     search_queries = [
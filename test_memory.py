@@ -67,16 +67,22 @@ def test_memory_system():
     # Test 4: Get all memories
     print("\n4. Getting all memories...")
     try:
-        response = requests.get(f"{BASE_URL}/get_all_memories")
-        if response.status_code == 200:
+        memories, params = [], {}
+        while True:
+            response = requests.get(f"{BASE_URL}/get_all_memories", params=params)
+            if response.status_code != 200:
+                print(f"❌ Failed to get memories: {response.status_code}")
+                print(f"   Error: {response.text}")
+                break
             result = response.json()
-            print("✅ Retrieved all memories!")
-            print(f"   Total memories: {len(result.get('memories', []))}")
-            for i, memory in enumerate(result.get('memories', []), 1):
-                print(f"   Memory {i}: {memory}")
-        else:
-            print(f"❌ Failed to get memories: {response.status_code}")
-            print(f"   Error: {response.text}")
+            memories.extend(result.get('memories', []))
+            if not result.get('next_cursor'):
+                print("✅ Retrieved all memories!")
+                break
+            params = {"cursor": result['next_cursor']}
+        print(f"   Total memories: {len(memories)}")
+        for i, memory in enumerate(memories, 1):
+            print(f"   Memory {i}: {memory}")
     except Exception as e:
         print(f"❌ Error getting memories: {e}")
     
@@ -0,0 +1,42 @@
+"""Shared fixtures: a real Mem0 Memory over the local store with a deterministic embedder."""
+
+import os
+import zlib
+from types import SimpleNamespace
+
+os.environ.setdefault("MEM0_TELEMETRY", "false")
+
+import numpy as np
+import pytest
+
+DIMS = 32
+
+
+class HashingEmbedder:
+    """Bag-of-words embedder: texts sharing words get similar vectors, no model download."""
+
+    def __init__(self, dims: int = DIMS):
+        self.config = SimpleNamespace(embedding_dims=dims)
+
+    def embed(self, text, memory_action=None):
+        vector = np.zeros(self.config.embedding_dims, dtype=np.float32)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % len(vector)] += 1.0
+        return vector.tolist()
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    """PrebuiltMemory over a LocalVectorStore in tmp_path."""
+    from mem0.configs.base import MemoryConfig
+    from mem0.memory.storage import SQLiteManager
+
+    from local_store import LocalVectorStore
+    from utils import PrebuiltMemory
+
+    monkeypatch.setenv("LOCAL_STORE_PATH", str(tmp_path / "store"))
+    config = MemoryConfig(history_db_path=str(tmp_path / "history.db"))
+    store = LocalVectorStore("test", DIMS)
+    client = PrebuiltMemory(config, HashingEmbedder(), store, llm=None, db=SQLiteManager(config.history_db_path))
+    yield client
+    store.close()
@@ -0,0 +1,42 @@
+"""Watch passes go through the ingest queue on the directory's lane."""
+
+import time
+
+from directory_sync import DirectorySync
+from ingest_manifest import IngestManifest
+from ingest_queue import IngestQueue, make_mem0_handler
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_watch_passes_are_queued_on_the_directory_lane(memory, tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(4):
+        (docs / f"note{i}.txt").write_text(f"Note {i}: the standup moved to room {i}.")
+    manifest = IngestManifest(str(tmp_path / "manifest.db"))
+    sync = DirectorySync(memory, manifest, workers=2)
+    queue = IngestQueue(make_mem0_handler(memory, manifest, sync), db_path=str(tmp_path / "queue.db"), workers=2)
+    sync.attach_queue(queue)
+    queue.start()
+    scope = {"user_id": "alice"}
+    try:
+        job_id = sync.enqueue(str(docs), scope, infer=False)
+        watch_id = sync.watch(str(docs), scope, infer=False, interval=0.05)
+        wait_for(lambda: queue.get(job_id)["status"] == "done")
+        (docs / "note9.txt").write_text("Note 9: the release freeze starts Friday.")
+        wait_for(lambda: len(memory.vector_store.list(filters=scope, limit=100)[0]) == 5)
+        watch = sync.watches()[0]
+        assert watch["last_job_id"] is not None
+        assert queue.get(watch["last_job_id"])["kind"] == "sync_directory"
+        sync.stop_watch(watch_id)
+    finally:
+        sync.stop()
+        queue.stop()
+        manifest.close()
+    assert len(memory.vector_store.list(filters=scope, limit=100)[0]) == 5
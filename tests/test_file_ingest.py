@@ -0,0 +1,30 @@
+"""Concurrent loads of one file must store its chunks once."""
+
+import threading
+
+from file_ingest import ingest_file
+from ingest_manifest import IngestManifest
+
+
+def test_concurrent_loads_of_one_file_store_each_chunk_once(memory, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("\n\n".join(f"Note {i}: the build server {i} restarts nightly." for i in range(120)))
+    manifest = IngestManifest(str(tmp_path / "manifest.db"))
+    results = []
+
+    def load():
+        results.append(ingest_file(memory, str(path), {"user_id": "alice"}, infer=False, manifest=manifest,
+                                   chunk_tokens=60, overlap_tokens=0))
+
+    threads = [threading.Thread(target=load) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statuses = sorted(result["status"] for result in results)
+    assert statuses == ["done", "unchanged", "unchanged"]
+    stored = memory.vector_store.list(filters={"user_id": "alice"}, limit=10000)[0]
+    chunks = next(result for result in results if result["status"] == "done")["chunks_done"]
+    assert len(stored) == chunks > 1
+    manifest.close()
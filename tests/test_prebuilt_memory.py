@@ -0,0 +1,44 @@
+"""PrebuiltMemory must stay a drop-in for Memory on the supported Mem0 releases."""
+
+from importlib.metadata import version
+
+import mem0.memory.main as mem0_main
+from mem0.configs.base import MemoryConfig
+
+from conftest import HashingEmbedder
+from utils import PREBUILT_MEM0_VERSIONS, PrebuiltMemory, check_prebuilt_support
+
+
+def test_installed_mem0_is_supported():
+    assert version("mem0ai") in PREBUILT_MEM0_VERSIONS
+    check_prebuilt_support()
+
+
+def test_sets_every_attribute_memory_init_sets(tmp_path, monkeypatch):
+    embedder, store, llm, db = HashingEmbedder(), object(), object(), object()
+    monkeypatch.setattr(mem0_main.EmbedderFactory, "create", lambda *args: embedder)
+    monkeypatch.setattr(mem0_main.VectorStoreFactory, "create", lambda *args: store)
+    monkeypatch.setattr(mem0_main.LlmFactory, "create", lambda *args: llm)
+    monkeypatch.setattr(mem0_main, "SQLiteManager", lambda *args: db)
+    monkeypatch.setattr(mem0_main, "capture_event", lambda *args, **kwargs: None)
+    config = MemoryConfig(history_db_path=str(tmp_path / "history.db"))
+
+    expected = vars(mem0_main.Memory(config))
+    prebuilt = vars(PrebuiltMemory(config, embedder, store, llm, db))
+
+    assert set(prebuilt) == set(expected)
+    assert {key: prebuilt[key] for key in expected} == expected
+
+
+def test_add_search_and_delete(memory):
+    added = memory.add("the deploy runbook lives in the wiki", user_id="alice", infer=False)
+    memory.add("lunch is at noon", user_id="alice", infer=False)
+    memory_id = added["results"][0]["id"]
+
+    hits = memory.search("deploy runbook", user_id="alice", limit=1)["results"]
+    assert hits[0]["id"] == memory_id
+    assert memory.get(memory_id)["memory"] == "the deploy runbook lives in the wiki"
+
+    memory.delete(memory_id)
+    assert [hit["memory"] for hit in memory.get_all(user_id="alice")["results"]] == ["lunch is at noon"]
+    assert [event["event"] for event in memory.history(memory_id)] == ["ADD", "DELETE"]
@@ -0,0 +1,72 @@
+"""Per-request ef_search / probes must reach the vector store through Mem0's search path."""
+
+from ann_index import AnnIndexConfig, TunedVectorStore, current_search_params, vector_search, with_search_params
+from search_cache import CachedVectorStore, SearchResultCache
+
+
+class RecordingStore:
+    """Passes calls through and records the search parameters each search saw."""
+
+    def __init__(self, store):
+        self._store = store
+        self.seen = []
+        self.kwargs = []
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def execute_ddl(self, sql):
+        pass
+
+    def search(self, query, vectors, limit=5, filters=None, **kwargs):
+        self.seen.append(current_search_params())
+        self.kwargs.append(kwargs)
+        return self._store.search(query, vectors, limit, filters)
+
+
+def add(memory, *texts):
+    for text in texts:
+        memory.add(text, user_id="alice", infer=False)
+
+
+def test_overrides_reach_the_store_through_memory(memory):
+    add(memory, "the deploy runbook lives in the wiki", "lunch is at noon")
+    recorder = RecordingStore(memory.vector_store)
+    memory.vector_store = recorder
+
+    search = with_search_params(vector_search, ef_search=200, probes=7)
+    results = search(memory, "deploy runbook", {"user_id": "alice"}, 1)
+
+    assert results["results"][0]["memory"] == "the deploy runbook lives in the wiki"
+    assert recorder.seen == [{"ef_search": 200, "probes": 7}]
+
+
+def test_tuned_store_forwards_overrides(memory):
+    add(memory, "the deploy runbook lives in the wiki")
+    recorder = RecordingStore(memory.vector_store)
+    manager = type("Manager", (), {"config": AnnIndexConfig(ef_search=40)})()
+    memory.vector_store = TunedVectorStore(recorder, manager)
+
+    vector_search(memory, "deploy", {"user_id": "alice"}, 1)
+    with_search_params(vector_search, ef_search=200)(memory, "deploy", {"user_id": "alice"}, 1)
+
+    assert recorder.kwargs == [{"ef_search": 40}, {"ef_search": 200}]
+
+
+def test_tuned_and_untuned_searches_do_not_share_cache_entries(memory):
+    add(memory, "the deploy runbook lives in the wiki")
+    recorder = RecordingStore(memory.vector_store)
+    memory.vector_store = CachedVectorStore(recorder, SearchResultCache())
+
+    vector_search(memory, "deploy", {"user_id": "alice"}, 1)
+    with_search_params(vector_search, ef_search=200)(memory, "deploy", {"user_id": "alice"}, 1)
+    vector_search(memory, "deploy", {"user_id": "alice"}, 1)
+
+    assert recorder.seen == [{}, {"ef_search": 200}]
+
+
+def test_vector_search_matches_memory_search(memory):
+    add(memory, "the deploy runbook lives in the wiki", "lunch is at noon")
+
+    expected = memory.search("deploy runbook", user_id="alice", limit=2)
+    assert vector_search(memory, "deploy runbook", {"user_id": "alice", "agent_id": None}, 2) == expected